@@ -0,0 +1,99 @@
+"""
+Fake-Bedrock benchmark of packed prompts (generate_content_batch_with_llm) against one
+call per item (generate_content_with_llm).
+
+Bedrock is replaced by a fake that answers every prompt and reports tokens as
+len(text) / 4, so the comparison counts calls and tokens, not model latency:
+    PYTHONPATH=src python benchmarks/packed_prompts.py [--items 64] [--chunk-sizes 4 8 16] [--drop-rate 0.05]
+
+--drop-rate leaves that share of entries out of packed answers, which then cost a
+single-item fallback call each.
+"""
+import re
+import json
+import random
+import logging
+import argparse
+
+from penguindb.utils import content_processing_utils as cpu
+
+CONTENT_ID_RE = re.compile(r"- content_id: (\S+)")
+MODEL = 'fake-model'
+
+
+def _tokens(text):
+    return max(1, len(text) // 4)
+
+
+class FakeBedrock:
+    """call_claude_hedged stand-in that counts calls and tokens."""
+
+    def __init__(self, drop_rate=0.0, seed=7):
+        self.rng = random.Random(seed)
+        self.drop_rate = drop_rate
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def _answer(self, content_id):
+        return {'content_id': content_id, 'title': f"A title for {content_id} that is eight words long",
+                'description': 'A generated description of about sixty words. ' * 8,
+                'tags': ['Apache Airflow', 'AWS Glue', 'data lake', 'Python', 'dbt']}
+
+    def __call__(self, prompt, model_id, max_tokens, extract_json):
+        content_ids = CONTENT_ID_RE.findall(prompt)
+        if extract_json:
+            answer = self._answer('single')
+            del answer['content_id']
+            text = json.dumps(answer)
+            response = dict(answer)
+        else:
+            entries = [self._answer(content_id) for content_id in content_ids
+                       if self.rng.random() >= self.drop_rate]
+            text = json.dumps(entries)
+            response = {'raw_response': text}
+        usage = {'input_tokens': _tokens(prompt), 'output_tokens': _tokens(text)}
+        self.calls += 1
+        self.input_tokens += usage['input_tokens']
+        self.output_tokens += usage['output_tokens']
+        return response, {'leg': 'primary', 'model_id': model_id, 'usage': usage}
+
+
+def sample_items(count, seed=7):
+    rng = random.Random(seed)
+    return [{'content_id': f"item-{i:04d}",
+             'description': 'I spent the week moving our batch jobs to incremental loads. ' * rng.randint(2, 12),
+             'tags': rng.sample(['data', 'aws', 'spark', 'kafka', 'python', 'sql', 'dbt'], 3)}
+            for i in range(count)]
+
+
+def run(items, chunk_size, drop_rate):
+    fake = FakeBedrock(drop_rate)
+    cpu.call_claude_hedged = fake
+    log = logging.getLogger('benchmark')
+    if chunk_size == 1:
+        for item in items:
+            cpu.generate_content_with_llm('post', MODEL, item['description'], item['tags'], log, max_retries=1)
+    else:
+        _, errors = cpu.generate_content_batch_with_llm('post', MODEL, items, log, max_retries=1,
+                                                        max_items_per_prompt=chunk_size)
+        assert not errors, errors
+    return fake
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Packed prompt benchmark against a fake Bedrock')
+    parser.add_argument('--items', type=int, default=64)
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[4, 8, 16])
+    parser.add_argument('--drop-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    items = sample_items(args.items)
+    print(f"{args.items} items, drop rate {args.drop_rate:.0%}")
+    print(f"{'mode':<12}  {'calls':>6}  {'calls/item':>10}  {'in tok/item':>11}  {'out tok/item':>12}")
+    for chunk_size in [1] + args.chunk_sizes:
+        fake = run(items, chunk_size, args.drop_rate)
+        mode = 'single' if chunk_size == 1 else f"packed x{chunk_size}"
+        print(f"{mode:<12}  {fake.calls:>6}  {fake.calls / len(items):>10.2f}  "
+              f"{fake.input_tokens / len(items):>11.0f}  {fake.output_tokens / len(items):>12.0f}")
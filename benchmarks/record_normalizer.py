@@ -0,0 +1,150 @@
+"""
+Micro-benchmark of RecordNormalizer against the per-call loops it replaced.
+
+Runs both on the same sheet-shaped records and prints microseconds per record:
+    PYTHONPATH=src python benchmarks/record_normalizer.py [--records 50000] [--repeat 5]
+
+The legacy functions below are copies of validate_field_types, prepare_data_for_dynamodb
+and content_ingestion's cleanup loop as they were before the normalizer.
+"""
+import random
+import argparse
+import timeit
+
+from penguindb.utils.content_processing_utils import DYNAMODB_NORMALIZER, INGESTION_NORMALIZER
+
+
+def legacy_validate_field_types(data):
+    type_validations = {
+        'content_id': str,
+        'media_link': str,
+        'embed_link': str,
+        'tags': (str, list),
+        'generated_tags': (str, list)
+    }
+    for field, expected_type in type_validations.items():
+        if field in data and data[field] is not None:
+            if isinstance(expected_type, tuple):
+                if not any(isinstance(data[field], t) for t in expected_type):
+                    type_names = [t.__name__ for t in expected_type]
+                    return f"Field '{field}' must be one of types: {', '.join(type_names)}"
+            elif not isinstance(data[field], expected_type):
+                return f"Field '{field}' must be of type {expected_type.__name__}"
+    return None
+
+
+def legacy_prepare_data_for_dynamodb(item):
+    dynamodb_item = {}
+    excluded_fields = ['Column 1', 'Column 2', 'Column 3', 'Row', 'Row Number', 'INDEX', 'ID',
+                       'sheet_id', 'headers', 'error_details', 'attempt_count', 'status']
+    for key, value in item.items():
+        if key in excluded_fields:
+            continue
+        if value is None:
+            continue
+        if key == 'content_id':
+            dynamodb_item[key] = value
+            continue
+        if key in ['tags', 'generated_tags'] and isinstance(value, str):
+            if value.strip():
+                tag_list = [tag.strip() for tag in value.split(',') if tag.strip()]
+                if tag_list:
+                    dynamodb_item[key] = tag_list
+        elif key in ['tags', 'generated_tags'] and isinstance(value, list):
+            if value:
+                tag_list = [str(tag).strip() for tag in value if str(tag).strip()]
+                if tag_list:
+                    dynamodb_item[key] = tag_list
+        else:
+            dynamodb_item[key] = value
+    return dynamodb_item
+
+
+def legacy_ingestion(body):
+    error = legacy_validate_field_types(body)
+    if error:
+        return None, error
+    initial_item_data = {}
+    excluded_fields = ['generated_title', 'generated_description', 'generated_tags', 'llm_retries',
+                       'used_fallback', 'status', 'timestamp']
+    for key, value in body.items():
+        if key not in excluded_fields and value is not None and value != '':
+            if isinstance(value, list):
+                filtered_list = [str(v).strip() for v in value if v is not None and str(v).strip()]
+                if filtered_list:
+                    initial_item_data[key] = filtered_list
+            elif isinstance(value, (str, int, float, bool)):
+                initial_item_data[key] = value
+            else:
+                try:
+                    initial_item_data[key] = str(value)
+                except Exception:
+                    pass
+    return initial_item_data, None
+
+
+def legacy_sqs_worker(body):
+    if legacy_validate_field_types(body):
+        return None
+    return legacy_prepare_data_for_dynamodb(body)
+
+
+def normalizer_sqs_worker(body):
+    if DYNAMODB_NORMALIZER.validate(body):
+        return None
+    return DYNAMODB_NORMALIZER.normalize(body, validate=False)[0]
+
+
+def sheet_records(count, seed=7):
+    """Records shaped like the Apps Script payload (headers of the prod sheet plus metadata)."""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        records.append({
+            'content_id': f"{i:08x}-0000-4000-8000-000000000000",
+            'content_type': rng.choice(['post', 'article', 'youtube']),
+            'date_published': '2025-03-01',
+            'title': f"Title {i}",
+            'description': 'lorem ipsum ' * rng.randint(5, 80),
+            'url': f"https://example.com/{i}",
+            'embed_link': '' if i % 3 else f"https://example.com/embed/{i}",
+            'tags': ', '.join(rng.sample(['data', 'aws', 'spark', 'kafka', 'python', 'sql', 'dbt'], 3)),
+            'media_link': '',
+            'status': 'pending',
+            'error_details': '',
+            'last_updated': '2025-03-01T10:00:00Z',
+            'attempt_count': rng.randint(0, 3),
+            'timestamp': '2025-03-01T10:00:00Z',
+            'priority': 'high',
+            'Row': i + 2,
+        })
+    return records
+
+
+def per_record_us(func, records, repeat):
+    best = min(timeit.repeat(lambda: [func(record) for record in records], number=1, repeat=repeat))
+    return best / len(records) * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='RecordNormalizer micro-benchmark')
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    records = sheet_records(args.records)
+    # Both sqs_worker implementations must store the same item ('priority' was excluded later)
+    for record in records[:1000]:
+        expected = legacy_sqs_worker(record)
+        expected.pop('priority', None)
+        assert normalizer_sqs_worker(record) == expected
+
+    cases = [
+        ('ingestion', legacy_ingestion, INGESTION_NORMALIZER.normalize),
+        ('validate + prepare', legacy_sqs_worker, normalizer_sqs_worker),
+    ]
+    print(f"{args.records} records, best of {args.repeat}")
+    for name, legacy, current in cases:
+        before = per_record_us(legacy, records, args.repeat)
+        after = per_record_us(current, records, args.repeat)
+        print(f"  {name:<20} {before:6.2f} -> {after:6.2f} us/record ({before / after:.2f}x)")
@@ -1,5 +1,5 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { getAllContentItems } from '@/lib/dynamodb';
+import { getAllContentItems, getContentItemsPage } from '@/lib/dynamodb';
 import { BlogPost } from '@/types/blog';
 
 // Force this route to be dynamically rendered
@@ -40,6 +40,7 @@ export async function GET(request: NextRequest) {
     const limit = parseInt(searchParams.get('limit') || '10');
     const offset = parseInt(searchParams.get('offset') || '0');
     const searchTags = searchParams.get('tags'); // Get tag search parameter
+    const cursor = searchParams.get('cursor'); // Feed page (month bucket) to read, see nextCursor
     
     // Add validation for limit to prevent excessive loads
     // Increase limit for certain post types that require more cards
@@ -51,8 +52,9 @@ export async function GET(request: NextRequest) {
       safeLimit = Math.min(limit, 50); // Allow more posts for these sections
     }
     
-    // Fetch all content items
-    const items = await getAllContentItems();
+    // With a cursor only one page of the feed projection is read, otherwise fetch all content items
+    const feedPage = cursor !== null ? await getContentItemsPage(cursor) : null;
+    const items = feedPage ? feedPage.items : await getAllContentItems();
     
     // Log the total items fetched from DynamoDB
     // console.log(`API: Fetched ${items.length} total items from DynamoDB`);
@@ -224,8 +226,8 @@ export async function GET(request: NextRequest) {
     // Calculate total count before pagination
     const totalCount = typeFilteredPosts.length;
     
-    // Apply pagination
-    const paginatedPosts = typeFilteredPosts.slice(offset, offset + safeLimit);
+    // Apply pagination, a cursor page is returned whole
+    const paginatedPosts = feedPage ? typeFilteredPosts : typeFilteredPosts.slice(offset, offset + safeLimit);
     
     // Log in development environment
     if (process.env.NODE_ENV === 'development') {
@@ -241,7 +243,8 @@ export async function GET(request: NextRequest) {
       total: totalCount,
       offset,
       limit: safeLimit,
-      type: postType || 'all'
+      type: postType || 'all',
+      ...(cursor !== null ? { cursor, nextCursor: feedPage ? feedPage.nextCursor : null } : {})
     });
   } catch (error) {
     console.error('Error fetching posts:', error);
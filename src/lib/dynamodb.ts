@@ -1,5 +1,6 @@
 import { DynamoDBClient } from '@aws-sdk/client-dynamodb';
 import { DynamoDBDocumentClient, ScanCommand, ScanCommandOutput } from '@aws-sdk/lib-dynamodb';
+import { S3Client, GetObjectCommand } from '@aws-sdk/client-s3';
 
 const client = new DynamoDBClient({
   region: process.env.AWS_REGION || 'us-east-1',
@@ -12,10 +13,82 @@ const docClient = DynamoDBDocumentClient.from(client);
 // Table name for content data
 const CONTENT_TABLE = process.env.DDB_TABLE || 'content_data';
 
+// Pre-sorted feed projection maintained by the feed_projector Lambda (optional)
+const FEED_BUCKET = process.env.FEED_BUCKET;
+const FEED_PREFIX = process.env.FEED_PREFIX || 'feed/';
+
+const s3Client = new S3Client({
+  region: process.env.AWS_REGION || 'us-east-1',
+});
+
+async function readFeedObject(key: string) {
+  const response = await s3Client.send(new GetObjectCommand({ Bucket: FEED_BUCKET, Key: key }));
+  if (!response.Body) return null;
+  return JSON.parse(await response.Body.transformToString());
+}
+
+/**
+ * Fetch the feed manifest: month pages (newest first) with their item counts
+ */
+export async function getFeedManifest(): Promise<{ total: number; buckets: { id: string; count: number }[] } | null> {
+  if (!FEED_BUCKET) return null;
+  try {
+    return await readFeedObject(`${FEED_PREFIX}manifest.json`);
+  } catch (error) {
+    console.error('Error fetching feed manifest:', error);
+    return null;
+  }
+}
+
+/**
+ * Fetch one pre-sorted feed page (items of one month, newest first)
+ */
+export async function getFeedPage(bucketId: string): Promise<any[] | null> {
+  if (!FEED_BUCKET) return null;
+  try {
+    const page = await readFeedObject(`${FEED_PREFIX}buckets/${bucketId}.json`);
+    return page?.items || [];
+  } catch (error) {
+    console.error(`Error fetching feed page ${bucketId}:`, error);
+    return null;
+  }
+}
+
+/**
+ * Fetch one page of the feed projection. The cursor is a manifest bucket id,
+ * the newest bucket is read when it is omitted. Returns null when the projection
+ * is not configured or the page could not be read.
+ */
+export async function getContentItemsPage(cursor?: string | null): Promise<{ items: any[]; nextCursor: string | null } | null> {
+  const manifest = await getFeedManifest();
+  if (!manifest) return null;
+
+  const index = cursor ? manifest.buckets.findIndex(bucket => bucket.id === cursor) : 0;
+  if (index < 0 || index >= manifest.buckets.length) {
+    return { items: [], nextCursor: null };
+  }
+
+  const items = await getFeedPage(manifest.buckets[index].id);
+  if (items === null) return null;
+
+  const next = manifest.buckets[index + 1];
+  return { items, nextCursor: next ? next.id : null };
+}
+
 /**
  * Fetch all content items from DynamoDB
  */
 export async function getAllContentItems() {
+  // Read the pre-sorted projection when it is configured, pages are already in feed order
+  const manifest = await getFeedManifest();
+  if (manifest) {
+    const pages = await Promise.all(manifest.buckets.map(bucket => getFeedPage(bucket.id)));
+    if (pages.every(page => page !== null)) {
+      return pages.flat();
+    }
+    console.warn('Feed projection incomplete, falling back to table scan');
+  }
+
   try {
     // Log environment information to help debug prod vs. dev differences
     // console.log(`DynamoDB Table: ${CONTENT_TABLE}, Region: ${process.env.AWS_REGION || 'us-east-1'}, NODE_ENV: ${process.env.NODE_ENV}`);
@@ -10,6 +10,12 @@ var STATUS = typeof STATUS !== 'undefined' ? STATUS : {
   ERROR: "error"
 };
 
+// Submission lanes: interactive edits are processed ahead of bulk runs
+var PRIORITY = typeof PRIORITY !== 'undefined' ? PRIORITY : {
+  HIGH: "high",
+  LOW: "low"
+};
+
 // Column indices (adjust based on your actual sheet structure)
 var COLUMNS = typeof COLUMNS !== 'undefined' ? COLUMNS : {
   CONTENT_ID: 0,  // Column for unique identifier
@@ -33,7 +39,16 @@ const CONFIG = {
   API_GATEWAY_URL: "https://nksl4ooqzg.execute-api.us-east-1.amazonaws.com/prod/",
   SHEET_NAME: "prod",
   REQUEST_TIMEOUT: 30000, // 30 seconds timeout
-  STATUS_CHECK_API: "" // Optional: API endpoint for status checking (if you create one)
+  STATUS_CHECK_API: "", // Optional: API endpoint for status checking (if you create one)
+  CHANGES_SHEET_NAME: "changes" // Append-only log of status changes, read by getChangedItems
+};
+
+// Columns of the change log sheet
+var CHANGE_COLUMNS = typeof CHANGE_COLUMNS !== 'undefined' ? CHANGE_COLUMNS : {
+  CONTENT_ID: 0,
+  STATUS: 1,
+  CHANGED_AT: 2,
+  ROW: 3  // Row of the item in the main sheet
 };
 
 // =============================================================
@@ -71,7 +86,7 @@ function processNewItems() {
     // Skip header row
     for (let i = 1; i < values.length; i++) {
       if (values[i][COLUMNS.STATUS] === STATUS.NEW) {
-        processRow(sheet, i + 1); // +1 because array is 0-indexed but sheet is 1-indexed
+        processRow(sheet, i + 1, PRIORITY.LOW); // +1 because array is 0-indexed but sheet is 1-indexed
       }
     }
   } catch (error) {
@@ -94,7 +109,7 @@ function retryErrorItems() {
       const attemptCount = values[i][COLUMNS.ATTEMPT_COUNT] || 0;
       
       if (status === STATUS.ERROR && attemptCount < CONFIG.MAX_RETRY_ATTEMPTS) {
-        processRow(sheet, i + 1);
+        processRow(sheet, i + 1, PRIORITY.LOW);
       }
     }
   } catch (error) {
@@ -110,7 +125,8 @@ function isStatusColumnEditedToNew(sheet, range) {
 }
 
 // Process a single row
-function processRow(sheet, rowIndex) {
+// priority: PRIORITY.HIGH for interactive edits (default), PRIORITY.LOW for bulk runs
+function processRow(sheet, rowIndex, priority) {
   try {
     // Get row data
     if (rowIndex <= 1) return; // Skip header row
@@ -156,6 +172,7 @@ function processRow(sheet, rowIndex) {
     // Ensure key fields are included and properly formatted
     data.content_id = contentId;
     data.timestamp = new Date().toISOString();
+    data.priority = priority || PRIORITY.HIGH;
     
     // Log the data being sent
     Logger.log(`Processing row ${rowIndex} with content_id: ${contentId}`);
@@ -388,12 +405,51 @@ function sendToAWS(data) {
 
 // Update status and related columns
 function updateStatus(sheet, rowIndex, status, errorDetails = "") {
+  const now = new Date();
   sheet.getRange(rowIndex, COLUMNS.STATUS + 1).setValue(status);
-  sheet.getRange(rowIndex, COLUMNS.LAST_UPDATED + 1).setValue(new Date());
+  sheet.getRange(rowIndex, COLUMNS.LAST_UPDATED + 1).setValue(now);
   
   if (errorDetails) {
     sheet.getRange(rowIndex, COLUMNS.ERROR_DETAILS + 1).setValue(errorDetails);
   }
+  
+  const contentId = sheet.getRange(rowIndex, COLUMNS.CONTENT_ID + 1).getValue();
+  logStatusChanges([[contentId, status, now, rowIndex]]);
+}
+
+// =============================================================
+// CHANGE LOG (INCREMENTAL POLLING BY THE STATUS CHECKER)
+// =============================================================
+
+// Get the change log sheet, creating it with a header row on first use
+function getChangesSheet() {
+  const spreadsheet = SpreadsheetApp.getActiveSpreadsheet();
+  let changes = spreadsheet.getSheetByName(CONFIG.CHANGES_SHEET_NAME);
+  if (!changes) {
+    changes = spreadsheet.insertSheet(CONFIG.CHANGES_SHEET_NAME);
+    changes.getRange(1, 1, 1, 4).setValues([["content_id", "status", "changed_at", "row"]]);
+    changes.setFrozenRows(1);
+  }
+  return changes;
+}
+
+// Append status changes ([content_id, status, date, row] each) to the change log in one write.
+// Never throws: a lost entry only delays the status checker until the next full sync.
+function logStatusChanges(entries) {
+  entries = entries.filter(entry => entry[0]);
+  if (!entries.length) return;
+  
+  const lock = LockService.getDocumentLock();
+  try {
+    lock.waitLock(10000);
+    const changes = getChangesSheet();
+    changes.getRange(changes.getLastRow() + 1, 1, entries.length, 4).setValues(
+      entries.map(entry => [entry[0].toString(), entry[1], entry[2], entry[3]]));
+  } catch (error) {
+    Logger.log("Error logging status changes: " + error.toString());
+  } finally {
+    lock.releaseLock();
+  }
 }
 
 // To run all rows with "error" status:
@@ -403,6 +459,7 @@ function manualRetry() {
   
   const dataRange = sheet.getDataRange();
   const values = dataRange.getValues();
+  const resetEntries = [];
   
   // Skip header row
   for (let i = 1; i < values.length; i++) {
@@ -411,8 +468,10 @@ function manualRetry() {
       sheet.getRange(i + 1, COLUMNS.ATTEMPT_COUNT + 1).setValue(0);
       // Set status to new
       sheet.getRange(i + 1, COLUMNS.STATUS + 1).setValue(STATUS.NEW);
+      resetEntries.push([values[i][COLUMNS.CONTENT_ID], STATUS.NEW, new Date(), i + 1]);
     }
   }
+  logStatusChanges(resetEntries);
   
   // Then process all "new" rows
   processNewItems();
@@ -435,7 +494,8 @@ function doPost(e) {
       return createErrorResponse("Missing required field: action");
     }
     
-    if (!requestData.content_id) {
+    // Batch updates carry their content_ids in the updates list
+    if (!requestData.content_id && requestData.action.toLowerCase() !== "updatestatuses") {
       Logger.log("Missing required field: content_id");
       return createErrorResponse("Missing required field: content_id");
     }
@@ -486,6 +546,17 @@ function doPost(e) {
           return createErrorResponse(`Error updating status: ${updateError.toString()}`);
         }
         
+      case "updatestatuses":
+        // Batched status updates (reconciliation job, stream notifier): one round trip for many rows
+        try {
+          const updates = Array.isArray(requestData.updates) ? requestData.updates : [];
+          Logger.log(`Processing batch of ${updates.length} status updates`);
+          return createSuccessResponse(updateItemStatuses(updates));
+        } catch (batchError) {
+          Logger.log(`Error updating statuses: ${batchError.toString()}`);
+          return createErrorResponse(`Error updating statuses: ${batchError.toString()}`);
+        }
+        
       default:
         Logger.log(`Unknown action: ${requestData.action}`);
         return createErrorResponse(`Unknown action: ${requestData.action}`);
@@ -518,6 +589,38 @@ function doGet(e) {
           })
         ).setMimeType(ContentService.MimeType.JSON);
       }
+      
+      // Handle getChangedItems action (incremental, cursor-based fetch)
+      if (action === "getChangedItems") {
+        const since = e.parameter.since || "";
+        const limit = parseInt(e.parameter.limit, 10) || 200;
+        Logger.log(`Received request for changed items since '${since}' (limit ${limit})`);
+        const page = getChangedItemsSince(since, limit);
+        return ContentService.createTextOutput(
+          JSON.stringify({
+            status: "success",
+            data: page.items,
+            count: page.items.length,
+            next_cursor: page.nextCursor,
+            has_more: page.hasMore,
+            timestamp: new Date().toISOString()
+          })
+        ).setMimeType(ContentService.MimeType.JSON);
+      }
+      
+      // Handle getAllItems action (full sheet state for the reconciliation job)
+      if (action === "getAllItems") {
+        Logger.log("Received request for all items");
+        const allItems = getAllItemsForReconciliation();
+        return ContentService.createTextOutput(
+          JSON.stringify({
+            status: "success",
+            data: allItems,
+            count: allItems.length,
+            timestamp: new Date().toISOString()
+          })
+        ).setMimeType(ContentService.MimeType.JSON);
+      }
     }
     
     // Default response if no action or unknown action
@@ -601,6 +704,148 @@ function getPendingItemsForStatusChecker() {
   }
 }
 
+// Helper function to get status changes since a cursor, oldest change first.
+// The cursor is the last change log row returned. Only the rows after it are read,
+// so a poll costs O(changes) instead of a read of the whole sheet. An empty cursor
+// (or one from the older "<epoch ms>:<row>" format) starts with a snapshot of the
+// pending rows and returns the current end of the change log as the cursor.
+function getChangedItemsSince(sinceCursor, limit) {
+  const emptyPage = { items: [], nextCursor: sinceCursor || "", hasMore: false };
+  try {
+    const changes = getChangesSheet();
+    const cursorText = sinceCursor ? sinceCursor.toString() : "";
+    if (!/^\d+$/.test(cursorText)) {
+      const lastLoggedRow = changes.getLastRow();
+      const pendingItems = getPendingItemsForStatusChecker().map(item => ({
+        content_id: item.content_id,
+        status: STATUS.PENDING
+      }));
+      Logger.log(`No change log cursor, returning ${pendingItems.length} pending rows up to change ${lastLoggedRow}`);
+      return { items: pendingItems, nextCursor: lastLoggedRow.toString(), hasMore: false };
+    }
+    
+    // Header is row 1, so the first change is row 2
+    const cursor = Math.max(1, parseInt(cursorText, 10));
+    const lastLoggedRow = changes.getLastRow();
+    const count = Math.min(limit, lastLoggedRow - cursor);
+    if (count <= 0) {
+      return { items: [], nextCursor: cursor.toString(), hasMore: false };
+    }
+    
+    const rows = changes.getRange(cursor + 1, 1, count, 4).getValues();
+    const items = rows.filter(row => row[CHANGE_COLUMNS.CONTENT_ID]).map(row => {
+      const changedAt = row[CHANGE_COLUMNS.CHANGED_AT];
+      return {
+        content_id: row[CHANGE_COLUMNS.CONTENT_ID].toString(),
+        status: row[CHANGE_COLUMNS.STATUS] ? row[CHANGE_COLUMNS.STATUS].toString().toLowerCase() : "",
+        last_updated: changedAt instanceof Date ? changedAt.toISOString() : changedAt.toString(),
+        row: row[CHANGE_COLUMNS.ROW]
+      };
+    });
+    
+    const nextCursor = cursor + count;
+    Logger.log(`Returning changes ${cursor + 1}-${nextCursor} of ${lastLoggedRow}`);
+    return { items: items, nextCursor: nextCursor.toString(), hasMore: nextCursor < lastLoggedRow };
+  } catch (error) {
+    Logger.log("Error getting changed items: " + error.toString());
+    return emptyPage;
+  }
+}
+
+// Helper function to get content_id and status of every row in one read
+function getAllItemsForReconciliation() {
+  try {
+    const sheet = SpreadsheetApp.getActiveSpreadsheet().getSheetByName(CONFIG.SHEET_NAME);
+    if (!sheet) {
+      Logger.log("Sheet not found: " + CONFIG.SHEET_NAME);
+      return [];
+    }
+    
+    const values = sheet.getDataRange().getValues();
+    const items = [];
+    
+    // Start from row 1 (skip header row 0)
+    for (let i = 1; i < values.length; i++) {
+      const contentId = values[i][COLUMNS.CONTENT_ID];
+      if (!contentId) continue;
+      items.push({
+        content_id: contentId.toString(),
+        status: values[i][COLUMNS.STATUS] ? values[i][COLUMNS.STATUS].toString().toLowerCase() : "",
+        row: i + 1 // Sheet rows are 1-indexed
+      });
+    }
+    
+    Logger.log(`Returning ${items.length} rows for reconciliation`);
+    return items;
+  } catch (error) {
+    Logger.log("Error getting all items: " + error.toString());
+    return [];
+  }
+}
+
+// Apply many status updates with a single sheet read for the row lookup.
+// Each update is {content_id, status, processed_at, generated_title, generated_tags, error_details}.
+function updateItemStatuses(updates) {
+  const sheet = SpreadsheetApp.getActiveSpreadsheet().getSheetByName(CONFIG.SHEET_NAME);
+  if (!sheet) {
+    throw new Error(`Sheet '${CONFIG.SHEET_NAME}' not found`);
+  }
+  
+  const values = sheet.getDataRange().getValues();
+  const rowsById = {};
+  for (let i = 1; i < values.length; i++) { // Skip header row
+    const contentId = values[i][COLUMNS.CONTENT_ID];
+    if (contentId) rowsById[contentId.toString()] = i + 1;
+  }
+  
+  const validStatusValues = [STATUS.NEW, STATUS.PENDING, STATUS.PROCESSED, STATUS.ERROR];
+  const updated = [];
+  const notFound = [];
+  const changeEntries = [];
+  const now = new Date();
+  
+  updates.forEach(update => {
+    const rowIndex = update && update.content_id ? rowsById[update.content_id.toString()] : undefined;
+    if (!rowIndex) {
+      notFound.push(update ? update.content_id : null);
+      return;
+    }
+    
+    let status = update.status ? update.status.toString().toLowerCase() : STATUS.PROCESSED;
+    if (!validStatusValues.includes(status)) {
+      status = STATUS.ERROR;
+    }
+    
+    sheet.getRange(rowIndex, COLUMNS.STATUS + 1).setValue(status);
+    sheet.getRange(rowIndex, COLUMNS.LAST_UPDATED + 1).setValue(now);
+    changeEntries.push([update.content_id, status, now, rowIndex]);
+    if (status !== STATUS.ERROR) {
+      sheet.getRange(rowIndex, COLUMNS.ERROR_DETAILS + 1).setValue("");
+    } else if (update.error_details) {
+      sheet.getRange(rowIndex, COLUMNS.ERROR_DETAILS + 1).setValue(update.error_details.toString());
+    }
+    if (update.processed_at) {
+      sheet.getRange(rowIndex, COLUMNS.LAST_UPDATED + 1).setNote(`Processed at: ${update.processed_at}`);
+    }
+    if (update.generated_title) {
+      sheet.getRange(rowIndex, COLUMNS.STATUS + 1).setNote(`Generated title: ${update.generated_title}`);
+    }
+    if (Array.isArray(update.generated_tags) && update.generated_tags.length) {
+      sheet.getRange(rowIndex, COLUMNS.TAGS + 1).setNote(`Generated tags: ${update.generated_tags.join(", ")}`);
+    }
+    updated.push(update.content_id);
+  });
+  logStatusChanges(changeEntries);
+  
+  Logger.log(`Batch status update: ${updated.length} updated, ${notFound.length} not found`);
+  return {
+    message: "Statuses updated",
+    updated: updated,
+    not_found: notFound,
+    timestamp: new Date().toISOString()
+  };
+}
+
 // Update the status of an item in the sheet based on content_id
 function updateItemStatus(contentId, status, processedAt, generatedTitle, generatedTags) {
   if (!contentId) {
@@ -627,8 +872,10 @@ function updateItemStatus(contentId, status, processedAt, generatedTitle, genera
   }
   
   // Update the status and timestamp
+  const now = new Date();
   sheet.getRange(rowIndex, COLUMNS.STATUS + 1).setValue(status);
-  sheet.getRange(rowIndex, COLUMNS.LAST_UPDATED + 1).setValue(new Date());
+  sheet.getRange(rowIndex, COLUMNS.LAST_UPDATED + 1).setValue(now);
+  logStatusChanges([[contentId, status, now, rowIndex]]);
   
   // Clear error details if status is no longer ERROR
   if (status !== STATUS.ERROR) {
@@ -885,6 +1132,7 @@ function resetSelectedRowToNew() {
     
     // Track processed rows
     let processedRows = 0;
+    const resetEntries = [];
     
     // Process each selected row
     for (let i = 0; i < numRows; i++) {
@@ -897,13 +1145,16 @@ function resetSelectedRowToNew() {
       sheet.getRange(currentRow, COLUMNS.STATUS + 1).setValue(STATUS.NEW);
       sheet.getRange(currentRow, COLUMNS.ATTEMPT_COUNT + 1).setValue(0);
       sheet.getRange(currentRow, COLUMNS.ERROR_DETAILS + 1).setValue("");
-      sheet.getRange(currentRow, COLUMNS.LAST_UPDATED + 1).setValue(new Date());
+      const now = new Date();
+      sheet.getRange(currentRow, COLUMNS.LAST_UPDATED + 1).setValue(now);
+      resetEntries.push([sheet.getRange(currentRow, COLUMNS.CONTENT_ID + 1).getValue(), STATUS.NEW, now, currentRow]);
       
       processedRows++;
       
       // Log for debugging
       Logger.log(`Reset row ${currentRow} to NEW status`);
     }
+    logStatusChanges(resetEntries);
     
     // Show confirmation based on how many rows were processed
     if (processedRows === 1) {
@@ -1,17 +1,21 @@
 import json
 import boto3
-import os
 import logging
 import datetime
+import time
 import uuid
 from penguindb.utils.content_processing_utils import ErrorTypes, create_error_response, validate_field_types
+from penguindb.utils.claim_check import offload_if_large
+from penguindb.utils import debounce
+from penguindb.utils.profiling import profile_handler
+from penguindb.utils.priority_lanes import choose_lane, queue_url_for_lane
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 sqs = boto3.client('sqs')
-SQS_QUEUE_URL = os.environ.get('SQS_QUEUE_URL')
 
+@profile_handler
 def lambda_handler(event, context):
     """
     Lambda handler for API Gateway requests.
@@ -90,32 +94,66 @@ def lambda_handler(event, context):
             logger.error(f"Validation error: {validation_error}")
             return create_error_response(ErrorTypes.VALIDATION_ERROR, validation_error)
         
+        # Debounce: the same row version submitted again within the window is not re-queued
+        version_hash = debounce.body_hash(body)
+        submission_id = debounce.register_submission(body['content_id'], version_hash)
+        if submission_id is None:
+            return {
+                'statusCode': 202,
+                'body': json.dumps({
+                    'message': 'Duplicate submission coalesced with a pending one',
+                    'content_id': body['content_id'],
+                    'coalesced': True
+                }),
+                'headers': {
+                    'Content-Type': 'application/json'
+                }
+            }
+        if submission_id:
+            body[debounce.DEBOUNCE_FIELD] = submission_id
+
         # Add timestamp
         body['timestamp'] = datetime.datetime.now().isoformat()
         
+        # Interactive edits and bulk submissions go to separate lane queues
+        priority = choose_lane(body, event.get('headers'))
+        body['priority'] = priority
+        queue_url = queue_url_for_lane(priority)
+        
         # Send message to SQS
         message_attributes = {}
         
         # For FIFO queues, make sure we have a MessageGroupId
-        if SQS_QUEUE_URL and SQS_QUEUE_URL.endswith('.fifo'):
+        is_fifo = bool(queue_url and queue_url.endswith('.fifo'))
+        if is_fifo:
             message_group_id = body.get('content_id', str(uuid.uuid4()))
         else:
             message_group_id = None
         
         try:
             message_body = json.dumps(body)
+            # Large bodies go to S3, only a claim-check pointer is queued
+            message_body = offload_if_large(message_body, body['content_id'])
             
             sqs_params = {
-                'QueueUrl': SQS_QUEUE_URL,
+                'QueueUrl': queue_url,
                 'MessageBody': message_body,
                 'MessageAttributes': message_attributes
             }
             
             if message_group_id:
                 sqs_params['MessageGroupId'] = message_group_id
+            if is_fifo:
+                # Same content_id and row version within one debounce window is delivered once
+                # (a deliberate resubmission after the window gets a new id)
+                window = int(time.time()) // max(1, debounce.DEBOUNCE_WINDOW_SECONDS)
+                sqs_params['MessageDeduplicationId'] = f"{body['content_id']}-{version_hash}-{window}"[:128]
+            elif submission_id and debounce.DEBOUNCE_WINDOW_SECONDS:
+                # Hold the message for the window, so a newer version supersedes it before processing
+                sqs_params['DelaySeconds'] = min(900, debounce.DEBOUNCE_WINDOW_SECONDS)
                 
             response = sqs.send_message(**sqs_params)
-            logger.info(f"Message sent to SQS: {response['MessageId']}")
+            logger.info(f"Message sent to SQS ({priority} priority): {response['MessageId']}")
             
             # Return a success response
             return {
@@ -123,7 +161,9 @@ def lambda_handler(event, context):
                 'body': json.dumps({
                     'message': 'Request accepted for processing',
                     'content_id': body['content_id'],
-                    'message_id': response['MessageId']
+                    'message_id': response['MessageId'],
+                    'priority': priority,
+                    'coalesced': False
                 }),
                 'headers': {
                     'Content-Type': 'application/json'
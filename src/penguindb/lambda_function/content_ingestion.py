@@ -7,7 +7,12 @@ from datetime import datetime
 import uuid
 import requests
 
-from penguindb.utils.content_processing_utils import validate_field_types
+from penguindb.utils.content_processing_utils import INGESTION_NORMALIZER
+from penguindb.utils import idempotency
+from penguindb.utils import debounce
+from penguindb.utils.claim_check import resolve_record_bodies
+from penguindb.utils.sheet_outbox import enqueue_sheet_update
+from penguindb.utils.profiling import profile_handler
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -59,6 +64,7 @@ def update_sheet_ingested_status(content_id):
         return False
 # --- End Sheet Update Logic ---
 
+@profile_handler
 def lambda_handler(event, context):
     """
     SQS handler: Processes batches of messages, validates, writes raw data to DynamoDB.
@@ -74,10 +80,14 @@ def lambda_handler(event, context):
     # *** MODIFIED: Initialize list for Batch Item Failures ***
     batch_item_failures = []
 
+    # Fetch offloaded (claim-check) bodies for the whole batch in parallel
+    resolve_record_bodies(event.get('Records', []))
+
     for record in event.get('Records', []):
         message_id = record.get('messageId', 'N/A')
         # receipt_handle = record.get('receiptHandle', 'N/A') # Not needed if using batch item failures
         content_id = 'UNKNOWN' # Default
+        idempotency_claim = None
         record_start_time = datetime.now()
 
         try:
@@ -89,6 +99,12 @@ def lambda_handler(event, context):
                 batch_item_failures.append({"itemIdentifier": message_id})
                 continue
 
+            if 'claim_check_error' in record:
+                logger.error(f"Could not fetch claim-check body for {message_id}: {record['claim_check_error']}")
+                # Transient S3 error, report failure so the message is retried
+                batch_item_failures.append({"itemIdentifier": message_id})
+                continue
+
             try:
                 body = json.loads(record['body'])
             except json.JSONDecodeError as e:
@@ -105,7 +121,8 @@ def lambda_handler(event, context):
                 body['content_id'] = content_id
                 logger.info(f"Generated new content_id: {content_id} for message {message_id}")
 
-            validation_error = validate_field_types(body)
+            # Validate, strip excluded/empty fields, split tags and convert types in one pass
+            initial_item_data, validation_error = INGESTION_NORMALIZER.normalize(body)
             if validation_error:
                 logger.error(f"Validation error for {content_id} (Msg: {message_id}): {validation_error}")
                 # *** MODIFIED: Report failure (bad data), continue batch ***
@@ -113,27 +130,23 @@ def lambda_handler(event, context):
                 continue
             # --- End Validation ---
 
-            # --- Prepare Raw Data for DynamoDB ---
-            initial_item_data = {}
-            # Add 'status' and 'timestamp' to excluded fields since they're unnecessary
-            excluded_fields = ['generated_title', 'generated_description', 'generated_tags', 'llm_retries', 'used_fallback', 'status', 'timestamp']
-            for key, value in body.items():
-                 # Skip excluded fields and None/empty strings
-                 if key not in excluded_fields and value is not None and value != '':
-                    if isinstance(value, list):
-                        # Filter list items that are None or just whitespace
-                        filtered_list = [str(v).strip() for v in value if v is not None and str(v).strip()]
-                        if filtered_list: 
-                            initial_item_data[key] = filtered_list
-                    elif isinstance(value, (str, int, float, bool)):
-                        initial_item_data[key] = value
-                    else:
-                        # Attempt conversion for other types, skip if fails
-                        try: 
-                            initial_item_data[key] = str(value)
-                        except Exception as conv_err: 
-                            logger.warning(f"Could not convert field '{key}' for {content_id} (type: {type(value)}), skipping. Error: {conv_err}")
+            # --- Debounce: skip versions replaced by a newer submission of the row ---
+            if debounce.is_superseded(content_id, body):
+                logger.info(f"{content_id} (Msg: {message_id}) was superseded by a newer submission, skipping")
+                continue
 
+            # --- Idempotency: absorb duplicate deliveries of the same body ---
+            idempotency_claim = idempotency.claim('content_ingestion', content_id, body)
+            if idempotency_claim['status'] == idempotency.STATUS_COMPLETED:
+                logger.info(f"Duplicate delivery of {content_id} (Msg: {message_id}) already ingested, skipping")
+                continue
+            if idempotency_claim['status'] == idempotency.STATUS_IN_PROGRESS:
+                logger.warning(f"{content_id} (Msg: {message_id}) is being ingested by another invocation, retrying later")
+                batch_item_failures.append({"itemIdentifier": message_id})
+                continue
+            # --- End Idempotency ---
+
+            # --- Prepare Raw Data for DynamoDB ---
             initial_item_data['ingested_at'] = record_start_time.isoformat()
             initial_item_data['ingestion_lambda_request_id'] = context.aws_request_id
             initial_item_data['sqs_message_id'] = message_id
@@ -156,7 +169,9 @@ def lambda_handler(event, context):
             # --- End DynamoDB Write ---
 
             # --- Optional: Update Google Sheet Status ---
-            if GOOGLE_SHEET_URL:
+            # Queued on the outbox when configured, so the Apps Script round trip is off this path
+            if GOOGLE_SHEET_URL and not enqueue_sheet_update(content_id, 'INGESTED',
+                                                             processed_at=initial_item_data['ingested_at']):
                 try:
                     update_sheet_ingested_status(content_id)
                 except Exception as sheet_error:
@@ -164,12 +179,17 @@ def lambda_handler(event, context):
                     logger.error(f"Non-fatal: Failed to update sheet status for {content_id} (Msg: {message_id}): {sheet_error}")
             # --- End Sheet Update ---
 
+            idempotency.complete(idempotency_claim, {'content_id': content_id, 'ingested_at': initial_item_data['ingested_at']})
+
             duration = (datetime.now() - record_start_time).total_seconds()
             logger.info(f"Processed message {message_id} for {content_id} in {duration:.2f} seconds.")
 
         except Exception as e:
             # Catch errors that were re-raised (like db_error)
             logger.error(f"Failed processing message {message_id} within loop: {str(e)}")
+            # Free the idempotency claim so the retry is not mistaken for a duplicate
+            if idempotency_claim:
+                idempotency.release(idempotency_claim)
             # Add message ID to failures
             batch_item_failures.append({"itemIdentifier": message_id})
             # If we re-raised the exception (like for db_error), the whole batch invocation will fail
@@ -0,0 +1,267 @@
+# src/penguindb/lambda_function/feed_projector.py
+"""
+Maintains a read-optimized, pre-sorted projection of content_data for the site feed.
+
+The projection lives in S3 as one compact JSON page per month of date_published
+(newest first) plus a manifest listing the pages, so the feed reads one small object
+instead of scanning and sorting the whole table on every request:
+
+    <FEED_PREFIX>manifest.json          -> {"buckets": [{"id": "2025-04", "count": 12, ...}, ...]}
+    <FEED_PREFIX>buckets/2025-04.json   -> {"id": "2025-04", "items": [...]}
+
+Incremental path: triggered by the content_data stream, applies each batch as
+upserts/removes to the affected pages with ETag-conditional writes.
+Rebuild path: {"action": "rebuild"} (or running this module) re-projects the whole table.
+"""
+import json
+import boto3
+import os
+import logging
+from datetime import datetime, timezone
+
+from penguindb.utils.parallel_scan import parallel_scan
+from penguindb.utils.s3_json import read_json, write_json, read_modify_write, json_default, get_s3_client
+from penguindb.utils.stream_utils import is_self_write, build_stream_batch_response, SHEET_BOOKKEEPING_FIELDS
+from penguindb.utils.profiling import profile_handler
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Environment Variables
+DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'content_data')
+FEED_BUCKET = os.environ.get('FEED_BUCKET')
+FEED_PREFIX = os.environ.get('FEED_PREFIX', 'feed/')
+FEED_WRITE_ATTEMPTS = int(os.environ.get('FEED_WRITE_ATTEMPTS', '5'))
+
+# AWS Clients
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+
+# Pipeline bookkeeping the site never reads; changes to only these skip the projection
+FEED_EXCLUDED_FIELDS = SHEET_BOOKKEEPING_FIELDS | frozenset({
+    'ingestion_lambda_request_id',
+    'sqs_message_id',
+    'llm_retries_used',
+    'used_fallback',
+    'llm_usage',
+})
+
+UNDATED_BUCKET = 'undated'
+MANIFEST_VERSION = 1
+
+
+def dynamodb_to_dict(dynamodb_item):
+    """Converts a DynamoDB item (low-level format) to a standard Python dict."""
+    from boto3.dynamodb.types import TypeDeserializer
+    deserializer = TypeDeserializer()
+    return {k: deserializer.deserialize(v) for k, v in dynamodb_item.items()}
+
+
+def parse_feed_date(value):
+    """Parses date_published/processed_at values (ISO timestamps or dates) to an aware datetime, or None."""
+    if not value or not isinstance(value, str):
+        return None
+    text = value.strip().replace('Z', '+00:00')
+    for parse in (datetime.fromisoformat, lambda v: datetime.strptime(v, '%m/%d/%Y')):
+        try:
+            parsed = parse(text)
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def get_sort_date(item):
+    """Date the site sorts by: date_published, falling back to processed_at."""
+    return parse_feed_date(item.get('date_published')) or parse_feed_date(item.get('processed_at'))
+
+
+def get_bucket_id(item):
+    """Returns the 'YYYY-MM' page an item belongs to, or 'undated'."""
+    sort_date = get_sort_date(item)
+    return sort_date.strftime('%Y-%m') if sort_date else UNDATED_BUCKET
+
+
+def get_entry_key(item):
+    """Identity of an item in the projection (the table's hash and range key)."""
+    return f"{item.get('content_id')}#{item.get('content_type', '')}"
+
+
+def to_feed_entry(item):
+    """Projects a table item to the stored feed entry (drops bookkeeping fields)."""
+    return {key: value for key, value in item.items() if key not in FEED_EXCLUDED_FIELDS}
+
+
+def _entry_sort_key(entry):
+    sort_date = get_sort_date(entry)
+    return (sort_date.timestamp() if sort_date else 0, get_entry_key(entry))
+
+
+def sort_entries(entries):
+    """Sorts feed entries newest first (undated last), like the site did after its scan."""
+    return sorted(entries, key=_entry_sort_key, reverse=True)
+
+
+def _bucket_object_key(bucket_id):
+    return f"{FEED_PREFIX}buckets/{bucket_id}.json"
+
+
+def _manifest_key():
+    return f"{FEED_PREFIX}manifest.json"
+
+
+def _bucket_summary(bucket):
+    items = bucket['items']
+    return {
+        'id': bucket['id'],
+        'count': len(items),
+        'newest': items[0].get('date_published') or items[0].get('processed_at') if items else None,
+        'oldest': items[-1].get('date_published') or items[-1].get('processed_at') if items else None,
+    }
+
+
+def _order_buckets(summaries):
+    """Manifest order: newest month first, 'undated' last."""
+    dated = sorted((s for s in summaries if s['id'] != UNDATED_BUCKET), key=lambda s: s['id'], reverse=True)
+    return dated + [s for s in summaries if s['id'] == UNDATED_BUCKET]
+
+
+def _build_manifest(summaries):
+    buckets = _order_buckets([s for s in summaries if s['count'] > 0])
+    return {
+        'version': MANIFEST_VERSION,
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+        'total': sum(s['count'] for s in buckets),
+        'buckets': buckets,
+    }
+
+
+def collect_stream_changes(records):
+    """
+    Turns stream records into per-page changes.
+
+    Returns:
+        Dictionary bucket_id -> {entry_key: entry, or None to remove}; later records win
+    """
+    changes = {}
+    for record in records:
+        event_name = record.get('eventName')
+        if event_name not in ('INSERT', 'MODIFY', 'REMOVE'):
+            continue
+        if is_self_write(record, FEED_EXCLUDED_FIELDS):
+            continue
+        stream_data = record.get('dynamodb', {})
+        old_item = dynamodb_to_dict(stream_data['OldImage']) if stream_data.get('OldImage') else None
+        new_item = dynamodb_to_dict(stream_data['NewImage']) if event_name != 'REMOVE' and stream_data.get('NewImage') else None
+
+        if old_item is not None:
+            changes.setdefault(get_bucket_id(old_item), {})[get_entry_key(old_item)] = None
+        if new_item is not None:
+            changes.setdefault(get_bucket_id(new_item), {})[get_entry_key(new_item)] = to_feed_entry(new_item)
+        if old_item is None and new_item is None:
+            logger.warning(f"Stream record {stream_data.get('SequenceNumber')} has no images, "
+                           f"check the stream view type (NEW_AND_OLD_IMAGES)")
+    return changes
+
+
+def apply_changes(changes):
+    """
+    Applies per-page changes to S3 and updates the manifest.
+
+    Args:
+        changes: Output of collect_stream_changes
+
+    Returns:
+        Number of pages written
+    """
+    summaries = []
+    for bucket_id, bucket_changes in changes.items():
+        def _modify(current, bucket_id=bucket_id, bucket_changes=bucket_changes):
+            entries = {get_entry_key(entry): entry for entry in (current or {}).get('items', [])}
+            for entry_key, entry in bucket_changes.items():
+                if entry is None:
+                    entries.pop(entry_key, None)
+                else:
+                    entries[entry_key] = entry
+            return {'id': bucket_id, 'items': sort_entries(entries.values())}
+
+        bucket = read_modify_write(FEED_BUCKET, _bucket_object_key(bucket_id), _modify, FEED_WRITE_ATTEMPTS)
+        summaries.append(_bucket_summary(bucket))
+
+    if summaries:
+        def _modify_manifest(current):
+            by_id = {s['id']: s for s in (current or {}).get('buckets', [])}
+            by_id.update({s['id']: s for s in summaries})
+            return _build_manifest(by_id.values())
+        read_modify_write(FEED_BUCKET, _manifest_key(), _modify_manifest, FEED_WRITE_ATTEMPTS)
+    return len(summaries)
+
+
+def rebuild_projection(items=None):
+    """
+    Rebuilds the whole projection from the table and removes pages that are now empty.
+
+    Stream updates applied while the scan runs may be overwritten with the scanned
+    version; the next change to those items corrects them.
+
+    Args:
+        items: Iterable of table items (defaults to a parallel full table scan)
+
+    Returns:
+        The written manifest
+    """
+    buckets = {}
+    for item in (parallel_scan(table) if items is None else items):
+        buckets.setdefault(get_bucket_id(item), []).append(to_feed_entry(item))
+
+    summaries = []
+    for bucket_id, entries in buckets.items():
+        bucket = {'id': bucket_id, 'items': sort_entries(entries)}
+        write_json(FEED_BUCKET, _bucket_object_key(bucket_id), bucket, conditional=False)
+        summaries.append(_bucket_summary(bucket))
+
+    previous, _ = read_json(FEED_BUCKET, _manifest_key())
+    manifest = _build_manifest(summaries)
+    write_json(FEED_BUCKET, _manifest_key(), manifest, conditional=False)
+
+    # Drop pages of months that no longer have items
+    for stale in (previous or {}).get('buckets', []):
+        if stale['id'] not in buckets:
+            get_s3_client().delete_object(Bucket=FEED_BUCKET, Key=_bucket_object_key(stale['id']))
+
+    logger.info(f"Rebuilt feed projection: {manifest['total']} items in {len(manifest['buckets'])} pages")
+    return manifest
+
+
+@profile_handler
+def lambda_handler(event, context):
+    """
+    Stream handler: keeps the feed projection in sync with content_data.
+    Invoke with {"action": "rebuild"} to rebuild it from scratch.
+    """
+    if not FEED_BUCKET:
+        logger.error("FEED_BUCKET not configured, feed projection is disabled.")
+        return {'statusCode': 500, 'body': json.dumps('FEED_BUCKET not configured')}
+
+    if event.get('action') == 'rebuild':
+        manifest = rebuild_projection()
+        return {'statusCode': 200, 'body': json.dumps({'total': manifest['total'], 'pages': len(manifest['buckets'])})}
+
+    records = event.get('Records', [])
+    logger.info(f"Feed projector received {len(records)} stream records.")
+    try:
+        pages_written = apply_changes(collect_stream_changes(records))
+        logger.info(f"Feed projection updated, {pages_written} pages written.")
+    except Exception as e:
+        logger.error(f"Failed to update feed projection: {str(e)}")
+        # Every change is an idempotent upsert/remove, so the whole batch can be replayed
+        first_sequence = records[0].get('dynamodb', {}).get('SequenceNumber') if records else None
+        if not first_sequence:
+            raise
+        return build_stream_batch_response(first_sequence)
+
+    return build_stream_batch_response(None)
+
+
+if __name__ == '__main__':
+    print(json.dumps(rebuild_projection(), indent=2, default=json_default))
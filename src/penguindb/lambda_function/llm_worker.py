@@ -9,10 +9,26 @@ import requests
 import time
 import threading
 import queue
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
 
 from penguindb.utils.content_processing_utils import (
     generate_content_with_llm,
+    generate_content_with_llm_async,
+    generate_content_batch_with_llm,
 )
+from penguindb.utils.tag_canonicalizer import canonicalize_tags
+from penguindb.utils.stream_utils import (
+    is_self_write,
+    build_stream_batch_response,
+    LLM_WORKER_OWNED_FIELDS,
+    SHEET_BOOKKEEPING_FIELDS,
+    SHEET_NOTIFIER_ENABLED,
+)
+from penguindb.utils.projected_reads import batch_get_views
+from penguindb.utils.sheet_outbox import enqueue_sheet_update
+from penguindb.utils.profiling import profile_handler
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -21,11 +37,30 @@ logger.setLevel(logging.INFO)
 DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'content_data') # Ensure this is set
 LLM_MODEL = os.environ.get('LLM_MODEL', 'us.anthropic.claude-3-5-haiku-20241022-v1:0')
 GOOGLE_SHEET_URL = os.environ.get('GOOGLE_SHEET_URL') # Needed for final status update
+LLM_PACKED_MODE = os.environ.get('LLM_PACKED_MODE', 'false').lower() == 'true' # Pack same-type items into one prompt
 
 # AWS Clients
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(DYNAMODB_TABLE_NAME)
 
+# Fields whose changes never need a new LLM run (our own writes plus status_checker bookkeeping)
+IGNORED_STREAM_FIELDS = LLM_WORKER_OWNED_FIELDS | SHEET_BOOKKEEPING_FIELDS
+
+
+@dataclass(frozen=True)
+class GeneratedFieldsView:
+    """Attributes read to decide whether an item already has its LLM output."""
+    content_id: str
+    content_type: str
+    generated_title: Optional[str] = None
+    generated_description: Optional[str] = None
+    generated_tags: Optional[list] = None
+
+    @property
+    def is_processed(self):
+        return bool(self.generated_title and self.generated_description and self.generated_tags)
+
+
 # Queue for async sheet updates
 sheet_update_queue = queue.Queue()
 
@@ -84,8 +119,21 @@ def update_sheet_final_status(content_id, status, llm_result=None, error_message
         logger.error(f"Error updating sheet to {status} for {content_id}: {str(e)}")
         return False
 
+def enqueue_final_status(content_id, status, llm_result=None, error_message=None):
+    """Queues the final sheet status on the outbox. Returns False if there is no outbox."""
+    llm_result = llm_result if status == 'PROCESSED' else None
+    return enqueue_sheet_update(
+        content_id, status,
+        processed_at=datetime.now().isoformat(),
+        generated_title=(llm_result or {}).get('title'),
+        generated_tags=(llm_result or {}).get('tags'),
+        error_details=error_message
+    )
+
 def update_sheet_with_retry(content_id, status, llm_result=None, error_message=None, max_retries=3):
     """Updates sheet status with retries and exponential backoff."""
+    if enqueue_final_status(content_id, status, llm_result, error_message):
+        return True
     for attempt in range(max_retries):
         try:
             success = update_sheet_final_status(content_id, status, llm_result, error_message)
@@ -102,6 +150,10 @@ def async_sheet_update(content_id, status, llm_result=None, error_message=None):
     """Queue a sheet status update to be performed asynchronously."""
     if not GOOGLE_SHEET_URL:
         return
+
+    # The durable outbox survives the container, the daemon thread below does not
+    if enqueue_final_status(content_id, status, llm_result, error_message):
+        return
     
     # Add update request to queue
     sheet_update_queue.put({
@@ -154,6 +206,182 @@ def dynamodb_to_dict(dynamodb_item):
     deserializer = TypeDeserializer()
     return {k: deserializer.deserialize(v) for k, v in dynamodb_item.items()}
 
+def fetch_already_processed(records):
+    """
+    Checks the table for items of the batch that already have their LLM output.
+
+    A stream image can be older than the item (a replayed batch, or a record queued behind
+    our own write), so the image alone would send it to the LLM again. One projected
+    BatchGetItem covers the whole batch and reads only the generated fields.
+
+    Returns:
+        Dictionary content_id -> GeneratedFieldsView for processed items (empty if the read fails)
+    """
+    keys = []
+    for record in records:
+        if is_self_write(record, IGNORED_STREAM_FIELDS) or record.get('eventName') not in ['INSERT', 'MODIFY']:
+            continue
+        new_image = record.get('dynamodb', {}).get('NewImage')
+        if not new_image:
+            continue
+        raw_item = dynamodb_to_dict(new_image)
+        if not raw_item.get('content_id') or not raw_item.get('content_type'):
+            continue
+        if raw_item.get('generated_title') and raw_item.get('generated_description') and raw_item.get('generated_tags'):
+            continue  # Decided from the image already
+        keys.append({'content_id': raw_item['content_id'], 'content_type': raw_item['content_type']})
+
+    if not keys:
+        return {}
+    try:
+        views = batch_get_views(table, GeneratedFieldsView, keys)
+    except Exception as e:
+        # Fail open: the items are generated as if the check found nothing
+        logger.warning(f"Could not check {len(keys)} items for existing LLM output: {str(e)}")
+        return {}
+    processed = {str(view.content_id): view for view in views.values() if view.is_processed}
+    logger.info(f"{len(processed)} of {len(keys)} stream items already have LLM output in the table")
+    return processed
+
+def prefetch_packed_results(records, already_processed=None):
+    """
+    Generates content for the stream records that need it using packed multi-item prompts.
+
+    Returns:
+        Dictionary content_id -> LLM result. Items missing here (errors or single items of
+        a content_type) are generated individually by the handler loop.
+    """
+    items_by_type = {}
+    for record in records:
+        if is_self_write(record, IGNORED_STREAM_FIELDS) or record.get('eventName') not in ['INSERT', 'MODIFY']:
+            continue
+        new_image = record.get('dynamodb', {}).get('NewImage')
+        if not new_image:
+            continue
+        raw_item = dynamodb_to_dict(new_image)
+        content_id = raw_item.get('content_id')
+        content_type = raw_item.get('content_type')
+        if not content_id or not content_type:
+            continue
+        if raw_item.get('generated_title') and raw_item.get('generated_description') and raw_item.get('generated_tags'):
+            continue
+        if str(content_id) in (already_processed or {}):
+            continue
+        items_by_type.setdefault(content_type, []).append({
+            'content_id': str(content_id),
+            'description': raw_item.get('description', ''),
+            'tags': raw_item.get('tags', [])
+        })
+
+    packed_results = {}
+    for content_type, items in items_by_type.items():
+        if len(items) < 2:
+            continue
+        try:
+            results, errors = generate_content_batch_with_llm(
+                content_type=content_type,
+                model=LLM_MODEL,
+                items=items,
+                logger=logger,
+                timeout=240,
+                max_retries=3 # The handler loop retries failed items individually
+            )
+            packed_results.update(results)
+            if errors:
+                logger.warning(f"Packed generation failed for {len(errors)} {content_type} items: {list(errors)}")
+        except Exception as e:
+            logger.error(f"Packed generation for {content_type} failed, falling back to single calls: {str(e)}")
+
+    logger.info(f"Prefetched packed LLM results for {len(packed_results)} items")
+    return packed_results
+
+def persist_prefetched_results(records, packed_results, failed_sequence):
+    """
+    Stores packed results prefetched for records after the checkpoint break.
+
+    The batch is replayed from failed_sequence, and the items written here are then
+    skipped by fetch_already_processed instead of being sent to the LLM again. Items
+    sharing the failed record's content_id are left for the replay.
+
+    Returns:
+        Number of items written
+    """
+    after_break = False
+    failed_content_id = None
+    written = 0
+    for record in records:
+        new_image = record.get('dynamodb', {}).get('NewImage') or {}
+        raw_item = dynamodb_to_dict(new_image) if new_image else {}
+        content_id = str(raw_item.get('content_id') or '')
+        if record.get('dynamodb', {}).get('SequenceNumber') == failed_sequence:
+            after_break = True
+            failed_content_id = content_id
+            continue
+        if not after_break or content_id == failed_content_id or content_id not in packed_results:
+            continue
+        if not raw_item.get('content_type'):
+            continue
+        update_expression, expression_attribute_names, expression_attribute_values = \
+            build_generated_fields_update(packed_results.pop(content_id))
+        if not update_expression:
+            continue
+        try:
+            table.update_item(
+                Key={'content_id': content_id, 'content_type': raw_item['content_type']},
+                UpdateExpression=update_expression,
+                ExpressionAttributeValues=expression_attribute_values,
+                ExpressionAttributeNames=expression_attribute_names
+            )
+            written += 1
+        except Exception as e:
+            # Not fatal: the replay generates the item again
+            logger.warning(f"Could not store prefetched result for {content_id}: {str(e)}")
+    if written:
+        logger.info(f"Stored {written} prefetched results after the checkpoint, the replay skips them")
+    return written
+
+def build_generated_fields_update(llm_result):
+    """
+    Builds the UpdateExpression that stores LLM output on an item.
+    Tags are canonicalized in place first, so the sheet update sends the stored tags.
+
+    Returns:
+        Tuple (update_expression, expression_attribute_names, expression_attribute_values);
+        update_expression is None if there is nothing to update
+    """
+    if llm_result.get('tags') is not None:
+        llm_result['tags'] = canonicalize_tags(llm_result['tags'])
+
+    update_expression_parts = []
+    expression_attribute_values = {}
+    expression_attribute_names = {} # Needed if using reserved words
+
+    fields_to_update = {
+        'generated_title': llm_result.get('title'),
+        'generated_description': llm_result.get('description'),
+        'generated_tags': llm_result.get('tags'),
+        'llm_processed_at': datetime.now().isoformat(),
+        'llm_retries_used': llm_result.get('retry_count', 0),
+        'used_fallback': llm_result.get('used_fallback'),
+        'llm_usage': llm_result.get('llm_usage')  # Tokens, latency and attempts (see llm_accounting)
+    }
+
+    for i, (key, value) in enumerate(fields_to_update.items()):
+         # Only skip truly None values, but allow empty strings and empty lists
+         if value is not None:
+             # Handle potential reserved words
+             name_placeholder = f"#k{i}"
+             value_placeholder = f":v{i}"
+             expression_attribute_names[name_placeholder] = key
+             update_expression_parts.append(f"{name_placeholder} = {value_placeholder}")
+             expression_attribute_values[value_placeholder] = value
+             logger.info(f"Adding field to update: {key} = {value}")
+
+    if not update_expression_parts:
+        return None, expression_attribute_names, expression_attribute_values
+    return "SET " + ", ".join(update_expression_parts), expression_attribute_names, expression_attribute_values
+
+@profile_handler
 def lambda_handler(event, context):
     """
     Processes DynamoDB Stream events (batches) to generate LLM content.
@@ -161,11 +389,26 @@ def lambda_handler(event, context):
     logger.info(f"LLM Worker received event with {len(event.get('Records', []))} records.")
     # logger.debug(f"Full event: {json.dumps(event)}") # Optional: Log full event for debug
 
-    failed_record_sequences = [] # For potential partial batch failure reporting
+    # Stream checkpointing: records are handled strictly in order and we stop at the
+    # first failure. Reporting its SequenceNumber lets Lambda checkpoint everything
+    # before it, so succeeded records are never re-sent to the LLM on retry.
+    first_failed_sequence = None
+    skipped_self_writes = 0
+
+    # Packed mode: generate content for all pending items of a content_type in shared prompts
+    # up front; the loop below still handles records (and checkpoints) one by one in order
+    already_processed = fetch_already_processed(event.get('Records', []))
+    packed_results = prefetch_packed_results(event.get('Records', []), already_processed) if LLM_PACKED_MODE else {}
 
     for record in event.get('Records', []):
         sequence_number = record.get('dynamodb', {}).get('SequenceNumber')
         try:
+            # --- Skip echoes of our own update_item (only generated_* / bookkeeping fields changed) ---
+            if is_self_write(record, IGNORED_STREAM_FIELDS):
+                skipped_self_writes += 1
+                logger.info(f"Skipping self-write MODIFY record {sequence_number}")
+                continue
+
             # --- Process Stream Record ---
             if record.get('eventName') in ['INSERT', 'MODIFY']: # Only process new or modified items
                 new_image = record.get('dynamodb', {}).get('NewImage')
@@ -201,27 +444,38 @@ def lambda_handler(event, context):
                     raw_item.get('generated_tags')):
                      logger.info(f"All LLM fields already exist for {content_id}, skipping LLM generation.")
                      # Optionally, ensure sheet status is correct
-                     if GOOGLE_SHEET_URL:
+                     if GOOGLE_SHEET_URL and not SHEET_NOTIFIER_ENABLED:
                          # Use async update with retry for existing item
                          async_sheet_update(content_id, 'PROCESSED', 
                                           {'title': raw_item.get('generated_title'), 'tags': raw_item.get('generated_tags')})
                      continue
 
+                processed_view = already_processed.get(content_id)
+                if processed_view:
+                    logger.info(f"LLM fields for {content_id} are already in the table, skipping LLM generation.")
+                    if GOOGLE_SHEET_URL and not SHEET_NOTIFIER_ENABLED:
+                        async_sheet_update(content_id, 'PROCESSED',
+                                           {'title': processed_view.generated_title, 'tags': processed_view.generated_tags})
+                    continue
+
 
                 # --- Call LLM with Persistent Retries ---
                 llm_result = None
                 llm_error_message = None
                 try:
-                    llm_result = generate_content_with_llm(
-                        content_type=raw_item.get('content_type', ''),
-                        model=LLM_MODEL,
-                        description=raw_item.get('description', ''),
-                        tags=raw_item.get('tags', []), # Pass tags if they exist
-                        logger=logger,
-                        timeout=240, # 4 minutes timeout per attempt
-                        max_retries=10, # Retry up to 10 times inside the function
-                        # original_title=raw_item.get('title')  # Temporarily commented until deployment
-                    )
+                    # Use the packed-prompt result if one was prefetched for this item
+                    llm_result = packed_results.pop(content_id, None)
+                    if llm_result is None:
+                        llm_result = generate_content_with_llm(
+                            content_type=raw_item.get('content_type', ''),
+                            model=LLM_MODEL,
+                            description=raw_item.get('description', ''),
+                            tags=raw_item.get('tags', []), # Pass tags if they exist
+                            logger=logger,
+                            timeout=240, # 4 minutes timeout per attempt
+                            max_retries=10, # Retry up to 10 times inside the function
+                            # original_title=raw_item.get('title')  # Temporarily commented until deployment
+                        )
                     logger.info(f"LLM generation successful for {content_id}")
                     # Debug: Log what the LLM actually returned
                     logger.info(f"LLM result fields: title='{llm_result.get('title')}', description='{llm_result.get('description')}', tags={llm_result.get('tags')}")
@@ -252,32 +506,10 @@ def lambda_handler(event, context):
                         except Exception as e:
                             logger.error(f"Failed to get table schema: {str(e)}")
                         
-                        update_expression_parts = []
-                        expression_attribute_values = {}
-                        expression_attribute_names = {} # Needed if using reserved words
-
-                        fields_to_update = {
-                            'generated_title': llm_result.get('title'),
-                            'generated_description': llm_result.get('description'),
-                            'generated_tags': llm_result.get('tags'),
-                            'llm_processed_at': datetime.now().isoformat(),
-                            'llm_retries_used': llm_result.get('retry_count', 0)
-                        }
-
-                        for i, (key, value) in enumerate(fields_to_update.items()):
-                             # Only skip truly None values, but allow empty strings and empty lists
-                             if value is not None:
-                                 # Handle potential reserved words
-                                 name_placeholder = f"#k{i}"
-                                 value_placeholder = f":v{i}"
-                                 expression_attribute_names[name_placeholder] = key
-                                 update_expression_parts.append(f"{name_placeholder} = {value_placeholder}")
-                                 expression_attribute_values[value_placeholder] = value
-                                 logger.info(f"Adding field to update: {key} = {value}")
-
-
-                        if update_expression_parts:
-                            update_expression = "SET " + ", ".join(update_expression_parts)
+                        update_expression, expression_attribute_names, expression_attribute_values = \
+                            build_generated_fields_update(llm_result)
+
+                        if update_expression:
                             logger.info(f"Updating DynamoDB for {content_id} with generated fields.")
                             # logger.debug(f"UpdateExpression: {update_expression}")
                             # logger.debug(f"ExpressionAttributeValues: {json.dumps(expression_attribute_values, default=str)}")
@@ -294,8 +526,8 @@ def lambda_handler(event, context):
                             )
                             logger.info(f"Successfully updated DynamoDB for {content_id}")
 
-                            # --- Update Google Sheet Status to PROCESSED ---
-                            if GOOGLE_SHEET_URL:
+                            # --- Update Google Sheet Status to PROCESSED (unless sheet_notifier does it) ---
+                            if GOOGLE_SHEET_URL and not SHEET_NOTIFIER_ENABLED:
                                  # Use async update with retry for successful processing
                                  async_sheet_update(content_id, 'PROCESSED', llm_result)
                             # --- End Sheet Update ---
@@ -326,9 +558,16 @@ def lambda_handler(event, context):
         except Exception as record_error:
              logger.error(f"Failed to process record sequence {sequence_number}: {str(record_error)}")
              logger.error(traceback.format_exc())
-             if sequence_number:
-                  failed_record_sequences.append(sequence_number)
-             # Continue processing other records in the batch if possible
+             if not sequence_number:
+                  # Without a sequence number we cannot checkpoint, fail the whole batch
+                  raise
+             first_failed_sequence = sequence_number
+             # Later records will be redelivered after the failed one, don't process them now
+             break
+
+    # Packed results of records after the break were already paid for, keep them
+    if first_failed_sequence and packed_results:
+        persist_prefetched_results(event.get('Records', []), packed_results, first_failed_sequence)
 
     # --- Process any remaining sheet updates ---
     try:
@@ -339,19 +578,170 @@ def lambda_handler(event, context):
     except Exception as e:
         logger.error(f"Error processing remaining sheet updates: {str(e)}")
 
-    # --- Handle Batch Failures (Optional but Recommended) ---
-    # If using Lambda event source mapping with 'ReportBatchItemFailures: True'
-    if failed_record_sequences:
-         logger.warning(f"Reporting {len(failed_record_sequences)} failed records.")
-         # Note: The actual sequence number might not be the right identifier
-         # The event source mapping needs 'itemIdentifier' which is usually the SQS messageId
-         # For DynamoDB streams, the identifier is the sequence number.
-         # Check AWS docs for exact format if enabling this feature.
-         # return {'batchItemFailures': [{'itemIdentifier': seq} for seq in failed_record_sequences]}
-         # For now, we'll just log and let the whole batch potentially retry if errors occurred
-
-    logger.info("LLM Worker batch processing complete.")
-    return {
-        'statusCode': 200,
-        'body': json.dumps({'message': 'Batch processed successfully (individual record errors logged)'})
-    }
+    if skipped_self_writes:
+        logger.info(f"Skipped {skipped_self_writes} self-write stream records.")
+
+    # --- Handle Batch Failures ---
+    # Requires 'ReportBatchItemFailures' on the event source mapping (see STREAM_EVENT_SOURCE_SETTINGS)
+    if first_failed_sequence:
+        logger.warning(f"Checkpointing stream batch before failed record {first_failed_sequence}.")
+    else:
+        logger.info("LLM Worker batch processing complete.")
+    return build_stream_batch_response(first_failed_sequence)
+
+
+# --- Async handler (aioboto3) ---
+# Drives Bedrock, DynamoDB and sheet notifications from one event loop. LLM calls still
+# run in stream order, but each record's DynamoDB write and sheet update are awaited in
+# the background while the next record's LLM call is in flight. lambda_handler above
+# remains the synchronous fallback; select this one with the handler setting
+# 'llm_worker.async_lambda_handler'.
+
+async def _write_generated_content_async(async_table, content_id, content_type, llm_result):
+    """Stores LLM output on the item and queues the PROCESSED sheet update."""
+    update_expression, expression_attribute_names, expression_attribute_values = \
+        build_generated_fields_update(llm_result)
+    if not update_expression:
+        logger.warning(f"No valid generated fields to update for {content_id}")
+        if GOOGLE_SHEET_URL:
+            await asyncio.to_thread(update_sheet_with_retry, content_id, 'LLM_ERROR',
+                                    error_message="LLM returned no valid fields")
+        return
+
+    try:
+        await async_table.update_item(
+            Key={'content_id': content_id, 'content_type': content_type},
+            UpdateExpression=update_expression,
+            ExpressionAttributeValues=expression_attribute_values,
+            ExpressionAttributeNames=expression_attribute_names
+        )
+        logger.info(f"Successfully updated DynamoDB for {content_id}")
+    except Exception as db_update_error:
+        logger.error(f"Error updating DynamoDB for {content_id}: {str(db_update_error)}")
+        if GOOGLE_SHEET_URL:
+            await asyncio.to_thread(update_sheet_with_retry, content_id, 'DB_UPDATE_ERROR',
+                                    error_message=str(db_update_error))
+        raise
+
+    if GOOGLE_SHEET_URL and not SHEET_NOTIFIER_ENABLED:
+        # requests is blocking, run it on the loop's executor so it overlaps with Bedrock
+        await asyncio.to_thread(update_sheet_with_retry, content_id, 'PROCESSED', llm_result)
+
+async def _process_stream_batch_async(event):
+    """Processes a stream batch on one event loop. Returns the first failed SequenceNumber or None."""
+    # Imported here so the synchronous handler keeps working without aioboto3
+    from penguindb.utils.llm_client import get_async_session, BEDROCK_PRIMARY_REGION
+
+    session = get_async_session()
+    # (sequence_number, write task) in stream order, awaited before checkpointing
+    write_tasks = []
+    first_failed_sequence = None
+    already_processed = await asyncio.to_thread(fetch_already_processed, event.get('Records', []))
+
+    async with session.client('bedrock-runtime', region_name=BEDROCK_PRIMARY_REGION) as bedrock_runtime, \
+            session.resource('dynamodb') as async_dynamodb:
+        async_table = await async_dynamodb.Table(DYNAMODB_TABLE_NAME)
+
+        for record in event.get('Records', []):
+            sequence_number = record.get('dynamodb', {}).get('SequenceNumber')
+            if is_self_write(record, IGNORED_STREAM_FIELDS):
+                logger.info(f"Skipping self-write MODIFY record {sequence_number}")
+                continue
+            if record.get('eventName') not in ['INSERT', 'MODIFY']:
+                logger.info(f"Skipping event {record.get('eventName')} for record.")
+                continue
+
+            try:
+                new_image = record.get('dynamodb', {}).get('NewImage')
+                if not new_image:
+                    logger.warning("No NewImage found in INSERT or MODIFY record, skipping.")
+                    continue
+                raw_item = dynamodb_to_dict(new_image)
+                content_id = raw_item.get('content_id')
+                if content_id is not None and not isinstance(content_id, str):
+                    content_id = str(content_id)
+                if not content_id:
+                    logger.error(f"Missing content_id in DynamoDB stream record: {json.dumps(raw_item, default=str)}")
+                    continue
+                if not raw_item.get('content_type'):
+                    logger.error(f"Missing content_type for {content_id} - cannot update record with composite key")
+                    if GOOGLE_SHEET_URL:
+                        async_sheet_update(content_id, 'DB_UPDATE_ERROR',
+                                           error_message="Missing content_type for composite key")
+                    continue
+                if (raw_item.get('generated_title') and
+                    raw_item.get('generated_description') and
+                    raw_item.get('generated_tags')):
+                    logger.info(f"All LLM fields already exist for {content_id}, skipping LLM generation.")
+                    if GOOGLE_SHEET_URL and not SHEET_NOTIFIER_ENABLED:
+                        async_sheet_update(content_id, 'PROCESSED',
+                                           {'title': raw_item.get('generated_title'), 'tags': raw_item.get('generated_tags')})
+                    continue
+                processed_view = already_processed.get(content_id)
+                if processed_view:
+                    logger.info(f"LLM fields for {content_id} are already in the table, skipping LLM generation.")
+                    if GOOGLE_SHEET_URL and not SHEET_NOTIFIER_ENABLED:
+                        async_sheet_update(content_id, 'PROCESSED',
+                                           {'title': processed_view.generated_title, 'tags': processed_view.generated_tags})
+                    continue
+
+                logger.info(f"Processing content_id: {content_id} from stream")
+                try:
+                    llm_result = await generate_content_with_llm_async(
+                        content_type=raw_item.get('content_type', ''),
+                        model=LLM_MODEL,
+                        description=raw_item.get('description', ''),
+                        tags=raw_item.get('tags', []),
+                        logger=logger,
+                        timeout=240,
+                        max_retries=10,
+                        bedrock_client=bedrock_runtime
+                    )
+                except Exception as llm_error:
+                    llm_error_message = f"LLM generation failed after retries: {str(llm_error)}"
+                    logger.error(f"LLM Worker - {llm_error_message} for {content_id}")
+                    if GOOGLE_SHEET_URL:
+                        async_sheet_update(content_id, 'LLM_ERROR', error_message=llm_error_message)
+                    raise
+
+                # Don't wait for the write, start the next record's LLM call right away
+                write_tasks.append((sequence_number, asyncio.create_task(
+                    _write_generated_content_async(async_table, content_id, raw_item['content_type'], llm_result)
+                )))
+
+            except Exception as record_error:
+                logger.error(f"Failed to process record sequence {sequence_number}: {str(record_error)}")
+                logger.error(traceback.format_exc())
+                if not sequence_number:
+                    raise
+                first_failed_sequence = sequence_number
+                break
+
+        # Let in-flight writes finish, then checkpoint at the earliest failure in stream order
+        results = await asyncio.gather(*(task for _, task in write_tasks), return_exceptions=True)
+        for (sequence_number, _), result in zip(write_tasks, results):
+            if isinstance(result, Exception):
+                logger.error(f"DynamoDB write failed for record sequence {sequence_number}: {str(result)}")
+                first_failed_sequence = sequence_number
+                break
+
+    return first_failed_sequence
+
+@profile_handler
+def async_lambda_handler(event, context):
+    """
+    Processes DynamoDB Stream events with the async (aioboto3) I/O path.
+    Same checkpointing contract as lambda_handler.
+    """
+    logger.info(f"LLM Worker (async) received event with {len(event.get('Records', []))} records.")
+    first_failed_sequence = asyncio.run(_process_stream_batch_async(event))
+
+    # Flush any error notifications queued on the background thread
+    if sheet_update_queue.qsize() > 0:
+        process_sheet_updates()
+
+    if first_failed_sequence:
+        logger.warning(f"Checkpointing stream batch before failed record {first_failed_sequence}.")
+    else:
+        logger.info("LLM Worker (async) batch processing complete.")
+    return build_stream_batch_response(first_failed_sequence)
@@ -0,0 +1,210 @@
+# src/penguindb/lambda_function/search_indexer.py
+"""
+Keeps the compact search index (see penguindb.utils.search_index) up to date from the
+content_data stream that llm_worker consumes.
+
+Each stream batch only rewrites the small delta artifact. Once the delta holds more than
+SEARCH_DELTA_MAX_DOCS documents it is folded into a new base artifact.
+Invoke with {"action": "rebuild"} (or run this module with 'rebuild') to rebuild from the table.
+"""
+import sys
+import json
+import boto3
+import os
+import logging
+from datetime import datetime, timezone
+
+from penguindb.utils.parallel_scan import parallel_scan
+from penguindb.utils.s3_json import read_json, write_json, read_modify_write, is_write_conflict
+from penguindb.utils.search_index import SearchIndex, INDEXED_FIELDS, build_delta_entry, get_doc_key
+from penguindb.utils.stream_utils import get_changed_fields, build_stream_batch_response
+from penguindb.utils.profiling import profile_handler
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Environment Variables
+DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'content_data')
+SEARCH_INDEX_BUCKET = os.environ.get('SEARCH_INDEX_BUCKET')
+SEARCH_INDEX_PREFIX = os.environ.get('SEARCH_INDEX_PREFIX', 'search/')
+SEARCH_DELTA_MAX_DOCS = int(os.environ.get('SEARCH_DELTA_MAX_DOCS', '200'))
+
+# Only the attributes the index is built from are read during a rebuild
+INDEX_SCAN_PROJECTION = ['content_id', 'content_type'] + sorted(INDEXED_FIELDS)
+
+# AWS Clients
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+
+
+def _base_key():
+    return f"{SEARCH_INDEX_PREFIX}index.json.gz"
+
+
+def _delta_key():
+    return f"{SEARCH_INDEX_PREFIX}delta.json.gz"
+
+
+def dynamodb_to_dict(dynamodb_item):
+    """Converts a DynamoDB item (low-level format) to a standard Python dict."""
+    from boto3.dynamodb.types import TypeDeserializer
+    deserializer = TypeDeserializer()
+    return {k: deserializer.deserialize(v) for k, v in dynamodb_item.items()}
+
+
+def collect_index_changes(records):
+    """
+    Turns stream records into delta entries.
+
+    Only records that touch an indexed field (or add/remove an item) produce a change.
+
+    Returns:
+        Dictionary doc_key -> delta entry, or None to remove; later records win
+    """
+    changes = {}
+    for record in records:
+        event_name = record.get('eventName')
+        stream_data = record.get('dynamodb', {})
+        if event_name == 'REMOVE':
+            if stream_data.get('OldImage'):
+                changes[get_doc_key(dynamodb_to_dict(stream_data['OldImage']))] = None
+            continue
+        if event_name not in ('INSERT', 'MODIFY') or not stream_data.get('NewImage'):
+            continue
+        changed = get_changed_fields(record)
+        if changed is not None and not changed & INDEXED_FIELDS:
+            continue
+        item = dynamodb_to_dict(stream_data['NewImage'])
+        # None (no generated content) also clears an entry whose generated fields were removed
+        changes[get_doc_key(item)] = build_delta_entry(item)
+    return changes
+
+
+def load_index():
+    """Loads the current index (base plus delta) from S3."""
+    base, _ = read_json(SEARCH_INDEX_BUCKET, _base_key())
+    delta, _ = read_json(SEARCH_INDEX_BUCKET, _delta_key())
+    return SearchIndex.from_artifact(base, delta)
+
+
+def compact_index():
+    """
+    Folds the delta into a new base artifact and resets the delta.
+
+    The base write is conditional on the base that was read, so a slow compaction cannot
+    overwrite a newer one; on conflict the base and the delta are read again and folded anew.
+    The delta reset is conditional on the delta that was folded in. If another batch
+    wrote to it meanwhile, the reset is skipped and the next compaction folds it again
+    (delta entries are idempotent upserts/removals).
+
+    Returns:
+        The compacted SearchIndex, or None if concurrent compactions kept winning
+    """
+    folded = {}
+
+    def _fold(base):
+        # The delta is read after the base, so a delta reset by a newer compaction shows up as a base conflict
+        delta, delta_etag = read_json(SEARCH_INDEX_BUCKET, _delta_key())
+        folded.update(index=SearchIndex.from_artifact(base, delta), delta_etag=delta_etag)
+        return folded['index'].to_artifact(datetime.now(timezone.utc).isoformat())
+
+    try:
+        read_modify_write(SEARCH_INDEX_BUCKET, _base_key(), _fold, compress=True)
+    except Exception as e:
+        if not is_write_conflict(e):
+            raise
+        logger.warning(f"Search index base kept changing, skipping this compaction: {str(e)}")
+        return None
+    index, delta_etag = folded['index'], folded['delta_etag']
+    try:
+        write_json(SEARCH_INDEX_BUCKET, _delta_key(), {'docs': {}}, delta_etag, compress=True)
+    except Exception as e:
+        logger.warning(f"Search delta changed during compaction, keeping it for the next one: {str(e)}")
+    logger.info(f"Compacted search index: {len(index)} documents")
+    return index
+
+
+def apply_index_changes(changes):
+    """
+    Merges changes into the delta artifact and compacts it when it grows too large.
+
+    Returns:
+        Number of documents in the delta after the update
+    """
+    if not changes:
+        return 0
+
+    def _modify(current):
+        docs = dict((current or {}).get('docs') or {})
+        docs.update(changes)
+        return {'docs': docs}
+
+    delta = read_modify_write(SEARCH_INDEX_BUCKET, _delta_key(), _modify, compress=True)
+    delta_size = len(delta['docs'])
+    if delta_size > SEARCH_DELTA_MAX_DOCS:
+        compact_index()
+    return delta_size
+
+
+def rebuild_index(items=None):
+    """
+    Builds a new base artifact from the table and clears the delta.
+
+    Args:
+        items: Iterable of table items (defaults to a parallel full table scan)
+
+    Returns:
+        The rebuilt SearchIndex
+    """
+    index = SearchIndex()
+    for item in (parallel_scan(table, projection=INDEX_SCAN_PROJECTION) if items is None else items):
+        entry = build_delta_entry(item)
+        if entry:
+            index.add(entry['content_id'], entry['content_type'], entry['terms'])
+
+    artifact = index.to_artifact(datetime.now(timezone.utc).isoformat())
+    write_json(SEARCH_INDEX_BUCKET, _base_key(), artifact, conditional=False, compress=True)
+    write_json(SEARCH_INDEX_BUCKET, _delta_key(), {'docs': {}}, conditional=False, compress=True)
+    logger.info(f"Rebuilt search index: {len(index)} documents, {len(artifact['terms'])} terms")
+    return index
+
+
+@profile_handler
+def lambda_handler(event, context):
+    """
+    Stream handler: applies content changes to the search index delta.
+    Invoke with {"action": "rebuild"} to rebuild the index from scratch.
+    """
+    if not SEARCH_INDEX_BUCKET:
+        logger.error("SEARCH_INDEX_BUCKET not configured, search indexing is disabled.")
+        return {'statusCode': 500, 'body': json.dumps('SEARCH_INDEX_BUCKET not configured')}
+
+    if event.get('action') == 'rebuild':
+        index = rebuild_index()
+        return {'statusCode': 200, 'body': json.dumps({'documents': len(index)})}
+
+    records = event.get('Records', [])
+    try:
+        changes = collect_index_changes(records)
+        delta_size = apply_index_changes(changes)
+        logger.info(f"Search indexer applied {len(changes)} changes from {len(records)} records (delta size {delta_size})")
+    except Exception as e:
+        logger.error(f"Failed to update search index: {str(e)}")
+        # Delta entries are idempotent, so the whole batch can be replayed
+        first_sequence = records[0].get('dynamodb', {}).get('SequenceNumber') if records else None
+        if not first_sequence:
+            raise
+        return build_stream_batch_response(first_sequence)
+
+    return build_stream_batch_response(None)
+
+
+if __name__ == '__main__':
+    # python -m penguindb.lambda_function.search_indexer rebuild | search "<query>"
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild':
+        print(f"Indexed {len(rebuild_index())} documents")
+    elif len(sys.argv) > 2 and sys.argv[1] == 'search':
+        for content_id, content_type, score in load_index().search(' '.join(sys.argv[2:])):
+            print(f"{score:>3}  {content_type:<10} {content_id}")
+    else:
+        print("Usage: search_indexer.py rebuild | search <query>")
@@ -0,0 +1,101 @@
+# src/penguindb/lambda_function/sheet_notifier.py
+"""
+Stream-driven sheet notifier: marks rows 'processed' in the Google Sheet as soon as
+their item's generated_title appears in content_data.
+
+The content_data stream trigger micro-batches records (SHEET_NOTIFIER_EVENT_SOURCE_SETTINGS,
+a 2 s batching window) and the handler pushes the whole batch in batched 'updateStatuses'
+requests, so generation-to-sheet latency is seconds instead of the poll interval.
+
+With SHEET_NOTIFIER_ENABLED=true on llm_worker and sqs_worker this is the only source of
+'processed' updates: llm_worker stops posting them and sqs_worker stops invoking
+status_checker. The scheduled status_checker poll can then be disabled;
+sheet_reconciler repairs any drift after an outage.
+"""
+import json
+import os
+import logging
+from datetime import datetime
+
+from penguindb.utils.sheet_dispatcher import send_sheet_batch, dispatch_sheet_batches, build_processed_update
+from penguindb.utils.stream_utils import marker_appeared, build_stream_batch_response
+from penguindb.utils.profiling import profile_handler
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Environment Variables
+GOOGLE_SHEET_URL = os.environ.get('GOOGLE_SHEET_URL')
+
+
+def dynamodb_to_dict(dynamodb_item):
+    """Converts a DynamoDB item (low-level format) to a standard Python dict."""
+    from boto3.dynamodb.types import TypeDeserializer
+    deserializer = TypeDeserializer()
+    return {k: deserializer.deserialize(v) for k, v in dynamodb_item.items()}
+
+
+def collect_notifications(records):
+    """
+    Picks the records in which generated_title just appeared.
+
+    Returns:
+        Tuple (updates, first_sequences): content_id -> sheet update (last record wins) and
+        content_id -> SequenceNumber of its first record in the batch
+    """
+    updates = {}
+    first_sequences = {}
+    for record in records:
+        if not marker_appeared(record):
+            continue
+        item = dynamodb_to_dict(record['dynamodb']['NewImage'])
+        if not item.get('content_id'):
+            continue
+        item.setdefault('processed_at', item.get('llm_processed_at') or datetime.now().isoformat())
+        update = build_processed_update(item)
+        updates[update['content_id']] = update
+        first_sequences.setdefault(update['content_id'], record['dynamodb'].get('SequenceNumber'))
+    return updates, first_sequences
+
+
+@profile_handler
+def lambda_handler(event, context):
+    """
+    Stream handler: sends one batched sheet update for the items generated in this batch.
+    Unsent updates are reported from their first record on, so the stream retries them.
+    """
+    records = event.get('Records', [])
+    if not GOOGLE_SHEET_URL:
+        logger.error("GOOGLE_SHEET_URL not configured, sheet notifications are disabled.")
+        return build_stream_batch_response(None)
+
+    updates, first_sequences = collect_notifications(records)
+    logger.info(f"Sheet notifier: {len(updates)} newly processed items in {len(records)} records")
+    if not updates:
+        return build_stream_batch_response(None)
+
+    result = dispatch_sheet_batches(list(updates.values()),
+                                    lambda batch: send_sheet_batch(GOOGLE_SHEET_URL, batch),
+                                    context=context)
+    if result['not_found']:
+        # Rows deleted from the sheet (or never added) cannot be updated, retrying won't help
+        logger.warning(f"No sheet row for {len(result['not_found'])} items: {result['not_found'][:20]}")
+
+    unsent = set(result['failed']) | set(result['deferred'])
+    logger.info(f"Sheet notifier: {len(result['updated'])} rows updated in {result['requests']} requests, "
+                f"{len(unsent)} unsent")
+    if not unsent:
+        return build_stream_batch_response(None)
+
+    # Updates are idempotent, so replaying from the earliest unsent record is safe
+    sequence_order = [record.get('dynamodb', {}).get('SequenceNumber') for record in records]
+    first_failed = min((first_sequences[content_id] for content_id in unsent),
+                       key=sequence_order.index)
+    return build_stream_batch_response(first_failed)
+
+
+if __name__ == '__main__':
+    # Print the stream trigger filter for this function
+    from penguindb.utils.stream_utils import build_marker_filter_criteria, SHEET_NOTIFIER_EVENT_SOURCE_SETTINGS
+    print(json.dumps({'FilterCriteria': build_marker_filter_criteria(),
+                      **SHEET_NOTIFIER_EVENT_SOURCE_SETTINGS}, indent=2))
@@ -0,0 +1,66 @@
+# src/penguindb/lambda_function/sheet_outbox_drainer.py
+"""
+Drains the sheet notification outbox (see penguindb.utils.sheet_outbox).
+
+Triggered by the outbox SQS queue (ReportBatchItemFailures and a batching window on the
+trigger). Each batch is deduplicated to the latest notification per row and sent in
+batched 'updateStatuses' requests under the sheet rate limit. Messages whose update was
+not sent are returned as batchItemFailures; SQS retries them and moves them to the
+DLQ after maxReceiveCount.
+"""
+import json
+import os
+import logging
+
+from penguindb.utils.sheet_dispatcher import send_sheet_batch, dispatch_sheet_batches
+from penguindb.utils.sheet_outbox import latest_notifications
+from penguindb.utils.profiling import profile_handler
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Environment Variables
+GOOGLE_SHEET_URL = os.environ.get('GOOGLE_SHEET_URL')
+# Receive count after which a retried notification is logged as stuck
+OUTBOX_WARN_RECEIVE_COUNT = int(os.environ.get('OUTBOX_WARN_RECEIVE_COUNT', '3'))
+
+# Fields the Apps Script batch update understands
+SHEET_UPDATE_FIELDS = ('content_id', 'status', 'processed_at', 'generated_title', 'generated_tags', 'error_details')
+
+
+@profile_handler
+def lambda_handler(event, context):
+    """Sends the latest outbox notification of every row in the batch to the sheet."""
+    records = event.get('Records', [])
+    if not GOOGLE_SHEET_URL:
+        logger.error("GOOGLE_SHEET_URL not configured, leaving notifications in the outbox.")
+        return {'batchItemFailures': [{'itemIdentifier': record.get('messageId')} for record in records]}
+
+    for record in records:
+        receive_count = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+        if receive_count >= OUTBOX_WARN_RECEIVE_COUNT:
+            logger.warning(f"Outbox message {record.get('messageId')} received {receive_count} times")
+
+    latest, message_ids, unparseable = latest_notifications(records)
+    if unparseable:
+        # Dropped: a malformed notification can never be sent
+        logger.error(f"Dropping {len(unparseable)} unparseable outbox messages: {unparseable}")
+    if not latest:
+        return {'batchItemFailures': []}
+
+    updates = [{key: value for key, value in notification.items() if key in SHEET_UPDATE_FIELDS}
+               for notification in latest.values()]
+    result = dispatch_sheet_batches(updates, lambda batch: send_sheet_batch(GOOGLE_SHEET_URL, batch),
+                                    context=context)
+    if result['not_found']:
+        logger.warning(f"No sheet row for {len(result['not_found'])} notifications: {result['not_found'][:20]}")
+
+    unsent = set(result['failed']) | set(result['deferred'])
+    failures = [{'itemIdentifier': message_id}
+                for content_id in unsent for message_id in message_ids.get(content_id, [])]
+    logger.info(f"Outbox drained: {len(records)} messages, {len(latest)} rows, {len(result['updated'])} updated "
+                f"in {result['requests']} requests, {len(failures)} messages returned for retry")
+    return {
+        'batchItemFailures': failures,
+        'body': json.dumps({'rows': len(latest), 'updated': len(result['updated']), 'unsent': len(unsent)})
+    }
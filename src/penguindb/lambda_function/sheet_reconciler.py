@@ -0,0 +1,174 @@
+# src/penguindb/lambda_function/sheet_reconciler.py
+"""
+One-pass reconciliation of the Google Sheet statuses against content_data.
+
+Replaces the item-by-item recovery of status_checker after an outage: the whole sheet
+state is fetched in one call (Apps Script action 'getAllItems'), the table is streamed
+with a projected parallel scan and hash-joined against the sheet rows on content_id,
+and only the rows whose status is stale are corrected, in batched 'updateStatuses'
+requests under the sheet rate limit.
+
+Drift categories reported:
+    stale_status               sheet row not 'processed', table item has generated content (corrected)
+    processed_without_content  sheet row 'processed', table item has no generated content
+    missing_in_table           sheet row 'pending'/'processed', no table item
+    table_only                 table item without a sheet row
+
+Invoke with {"dry_run": true} (or run this module with --dry-run) to only report the drift.
+"""
+import sys
+import json
+import time
+import boto3
+import os
+import logging
+import requests
+
+from penguindb.utils.parallel_scan import parallel_scan
+from penguindb.utils.sheet_dispatcher import send_sheet_batch, dispatch_sheet_batches, build_processed_update
+from penguindb.utils.profiling import profile_handler
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Environment Variables
+DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'content_data')
+GOOGLE_SHEET_URL = os.environ.get('GOOGLE_SHEET_URL')
+
+# Only the attributes a status correction needs are read from the table
+RECONCILE_SCAN_PROJECTION = ['content_id', 'generated_title', 'generated_tags', 'processed_at']
+DRIFT_CATEGORIES = ('stale_status', 'processed_without_content', 'missing_in_table', 'table_only')
+
+# AWS Clients
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+
+
+def fetch_sheet_state(sheet_url=None):
+    """
+    Fetches content_id and status of every sheet row in one request.
+
+    Returns:
+        List of dicts with content_id, status (lowercase) and row
+
+    Raises:
+        RuntimeError: If the web app does not answer with the row list
+    """
+    sheet_url = sheet_url or GOOGLE_SHEET_URL
+    if not sheet_url:
+        raise RuntimeError("GOOGLE_SHEET_URL not configured")
+    response = requests.get(sheet_url, params={'action': 'getAllItems'}, timeout=60)
+    if response.status_code != 200:
+        raise RuntimeError(f"Failed to fetch sheet state: HTTP {response.status_code}")
+    data = response.json()
+    # Older web app deployments answer with the default doGet message
+    if not isinstance(data, dict) or not isinstance(data.get('data'), list):
+        raise RuntimeError("Google Sheet web app does not support getAllItems")
+    return [row for row in data['data'] if isinstance(row, dict)]
+
+
+def plan_corrections(sheet_rows, table_items):
+    """
+    Hash-joins the sheet rows with the table items on content_id.
+
+    The sheet side is the build side (it always fits in memory); table items are streamed
+    through and only those with a sheet row are kept.
+
+    Args:
+        sheet_rows: Rows from fetch_sheet_state
+        table_items: Iterable of projected table items
+
+    Returns:
+        Tuple (corrections, drift) where corrections is the list of sheet updates and drift
+        holds the count per category plus 'sheet_rows', 'table_items' and 'in_sync'
+    """
+    sheet_status = {}
+    for row in sheet_rows:
+        if row.get('content_id'):
+            sheet_status[str(row['content_id'])] = str(row.get('status') or '').lower()
+
+    drift = dict.fromkeys(DRIFT_CATEGORIES, 0)
+    drift.update(sheet_rows=len(sheet_status), table_items=0, in_sync=0)
+    matched = {}
+    for item in table_items:
+        drift['table_items'] += 1
+        content_id = str(item.get('content_id'))
+        if content_id not in sheet_status:
+            drift['table_only'] += 1
+            continue
+        # An id can have several content_types; the one with generated content decides
+        if content_id not in matched or (item.get('generated_title') and not matched[content_id].get('generated_title')):
+            matched[content_id] = item
+
+    corrections = []
+    for content_id, status in sheet_status.items():
+        item = matched.get(content_id)
+        if item is None:
+            if status in ('pending', 'processed'):
+                drift['missing_in_table'] += 1
+            else:
+                drift['in_sync'] += 1
+        elif item.get('generated_title'):
+            if status == 'processed':
+                drift['in_sync'] += 1
+            else:
+                drift['stale_status'] += 1
+                corrections.append(build_processed_update(item))
+        elif status == 'processed':
+            drift['processed_without_content'] += 1
+        else:
+            # Not generated yet (new, in flight or failed), nothing to correct
+            drift['in_sync'] += 1
+    return corrections, drift
+
+
+def reconcile(content_table=None, fetch_sheet=None, send_batch=None, dry_run=False, context=None):
+    """
+    Runs one reconciliation pass.
+
+    Args:
+        content_table: boto3 Table resource (defaults to DYNAMODB_TABLE_NAME)
+        fetch_sheet: Callable returning the sheet rows (defaults to fetch_sheet_state)
+        send_batch: Callable sending one list of updates (defaults to send_sheet_batch to GOOGLE_SHEET_URL)
+        dry_run: Only compute and report the drift
+        context: Lambda context (sheet dispatch stops before the deadline)
+
+    Returns:
+        Report dictionary with drift counts, correction results and runtime_seconds
+    """
+    started = time.monotonic()
+    sheet_rows = (fetch_sheet or fetch_sheet_state)()
+    fetched_at = time.monotonic()
+    corrections, drift = plan_corrections(
+        sheet_rows, parallel_scan(content_table or table, projection=RECONCILE_SCAN_PROJECTION))
+    joined_at = time.monotonic()
+
+    report = {'drift': drift, 'corrections': len(corrections), 'dry_run': dry_run}
+    if corrections and not dry_run:
+        result = dispatch_sheet_batches(
+            corrections, send_batch or (lambda batch: send_sheet_batch(GOOGLE_SHEET_URL, batch)), context=context)
+        report.update(applied=len(result['updated']), not_found=len(result['not_found']),
+                      failed=len(result['failed']), deferred=len(result['deferred']), requests=result['requests'])
+    report['runtime_seconds'] = {
+        'sheet_fetch': round(fetched_at - started, 3),
+        'scan_and_join': round(joined_at - fetched_at, 3),
+        'total': round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Sheet reconciliation: {json.dumps(report)}")
+    return report
+
+
+@profile_handler
+def lambda_handler(event, context):
+    """Runs a reconciliation pass. Pass {"dry_run": true} to only report the drift."""
+    try:
+        report = reconcile(dry_run=bool((event or {}).get('dry_run')), context=context)
+        return {'statusCode': 200, 'body': json.dumps(report)}
+    except Exception as e:
+        logger.error(f"Sheet reconciliation failed: {str(e)}")
+        return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+
+
+if __name__ == '__main__':
+    # python -m penguindb.lambda_function.sheet_reconciler [--dry-run]
+    print(json.dumps(reconcile(dry_run='--dry-run' in sys.argv), indent=2))
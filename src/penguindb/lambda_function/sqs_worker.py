@@ -11,6 +11,14 @@ from penguindb.utils.content_processing_utils import (
     prepare_data_for_dynamodb,
     generate_content_with_llm,
 )
+from penguindb.utils.batch_scheduler import run_deadline_scheduled
+from penguindb.utils import idempotency
+from penguindb.utils import debounce
+from penguindb.utils.claim_check import resolve_record_bodies
+from penguindb.utils.tag_canonicalizer import canonicalize_tags
+from penguindb.utils.stream_utils import SHEET_NOTIFIER_ENABLED
+from penguindb.utils.profiling import profile_handler
+from penguindb.utils.priority_lanes import drain_lanes
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -21,6 +29,14 @@ LLM_MODEL = os.environ.get('LLM_MODEL', 'us.anthropic.claude-3-5-haiku-20241022-
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(DYNAMODB_TABLE_NAME)
 
+_sqs_client = None
+
+def get_sqs_client():
+    global _sqs_client
+    if _sqs_client is None:
+        _sqs_client = boto3.client('sqs')
+    return _sqs_client
+
 def debug_imports():
     logger.info(f"Python version: {sys.version}")
     logger.info(f"Python path: {sys.path}")
@@ -40,271 +56,312 @@ def debug_imports():
         logger.error(f"Failed to import from penguindb.utils: {str(e)}")
         logger.error(traceback.format_exc())
 
-def lambda_handler(event, context):
+def parse_work_item(record):
     """
-    Process messages from SQS queue.
+    Parse an SQS record into a work item for the batch scheduler.
+
+    Returns:
+        Dictionary with message_id, receipt_handle, receive_count and the parsed body (None if unusable)
     """
-    # Debug logging on every invocation
-    logger.info(f"SQS Worker received event: {json.dumps(event)}")
-    
-    # Calculate available execution time (leave 15 seconds buffer)
-    remaining_time_ms = context.get_remaining_time_in_millis() - 15000 if hasattr(context, 'get_remaining_time_in_millis') else 180000
-    logger.info(f"Remaining execution time: {remaining_time_ms/1000} seconds")
-    
-    # If we have very little time left, defer processing to a new invocation
-    if remaining_time_ms < 30000:  # Less than 30 seconds
-        logger.warning("Insufficient time remaining, deferring processing")
-        # Let SQS retry this batch
-        raise Exception("Insufficient execution time remaining")
+    message_id = record.get('messageId', 'N/A')
+    body = None
+
+    # Extract and parse the message body
+    message_body = record.get('body')
+    if 'claim_check_error' in record:
+        logger.error(f"Could not fetch claim-check body for {message_id}: {record['claim_check_error']}")
+    elif not message_body:
+        logger.error(f"Missing message body in SQS record {message_id}")
+    else:
+        try:
+            body = json.loads(message_body)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse message body as JSON for {message_id}: {str(e)}")
+
+    return {
+        'message_id': message_id,
+        'receipt_handle': record.get('receiptHandle', 'N/A'),
+        'receive_count': int(record.get('attributes', {}).get('ApproximateReceiveCount', '1')),
+        'body': body,
+        'claim_check_error': record.get('claim_check_error')
+    }
+
+def process_record(work_item, context):
+    """
+    Generate LLM content for one SQS message and write the item to DynamoDB.
+
+    Returns:
+        The content_id written, or None if the message was unusable and dropped
+
+    Raises:
+        Exception: On validation, LLM or database errors (the message is retried)
+    """
+    message_id = work_item['message_id']
+    body = work_item['body']
+
+    # A failed S3 fetch is transient, retry the message
+    if work_item.get('claim_check_error'):
+        raise RuntimeError(f"Claim-check body unavailable: {work_item['claim_check_error']}")
+
+    # Unparseable messages can never succeed, drop them instead of retrying
+    if body is None:
+        return None
+
+    # Log parsed body
+    logger.info(f"Parsed body for {message_id}: {json.dumps(body)}")
     
-    # Run import diagnostics on cold start
-    debug_imports()
+    # Validate the required fields are present
+    content_id = body.get('content_id')
+    if not content_id:
+        logger.error("Missing content_id in message body")
+        return None
     
+    # Validate field types
+    validation_errors = validate_field_types(body)
+    if validation_errors:
+        logger.error(f"SQS Worker - Validation error for {content_id}: {validation_errors}")
+        raise ValueError(f"Validation failed: {validation_errors}")  # Will trigger retry/DLQ
+
+    # A newer version of the row was submitted meanwhile, only that one is processed
+    if debounce.is_superseded(content_id, body):
+        logger.info(f"SQS Worker - {content_id} was superseded by a newer submission, skipping {message_id}")
+        return None
+
+    # Short-circuit duplicate deliveries before the expensive LLM call
+    idempotency_claim = idempotency.claim('sqs_worker', content_id, body)
+    if idempotency_claim['status'] == idempotency.STATUS_COMPLETED:
+        logger.info(f"SQS Worker - {content_id} already processed for this body, skipping duplicate {message_id}")
+        return content_id
+    if idempotency_claim['status'] == idempotency.STATUS_IN_PROGRESS:
+        # Another invocation is working on the same message, retry it later
+        raise RuntimeError(f"{content_id} is already being processed by another invocation")
+
+    try:
+        process_claimed_record(work_item, body, content_id, context)
+    except Exception:
+        idempotency.release(idempotency_claim)
+        raise
+
+    idempotency.complete(idempotency_claim, {'content_id': content_id})
+    return content_id
+
+def process_claimed_record(work_item, body, content_id, context):
+    """Generate content and write the item once the message has been claimed."""
+    message_id = work_item['message_id']
+
+    # Add processing metadata
+    body['sqs_message_id'] = message_id
+    body['sqs_receipt_handle'] = work_item['receipt_handle']
+    body['worker_request_id'] = context.aws_request_id
+    # body['processed_by'] = context.function_name
+    body['processed_at'] = datetime.now().isoformat()
+
     try:
-        # Process SQS messages
-        if 'Records' not in event:
-            logger.error("Event does not contain Records. Not an SQS event?")
-            return {
-                'statusCode': 400,
-                'body': json.dumps({
-                    'error': 'Not a valid SQS event',
-                    'event_keys': list(event.keys())
-                })
-            }
+        # Use persistent retries in the LLM function
+        llm_result = generate_content_with_llm(
+            content_type=body.get('content_type', ''),
+            model=LLM_MODEL,
+            description=body.get('description', ''),
+            tags=body.get('tags', ''),
+            logger=logger,
+            timeout=240,        # Increase timeout to 4 minutes per attempt
+            max_retries=15      # Up to 15 retries (could take a while but will persist)
+        )
+        
+        # Will only reach here if LLM succeeded
+        body['generated_title'] = llm_result.get('title', '')
+        body['generated_description'] = llm_result.get('description', '')
+        body['generated_tags'] = canonicalize_tags(llm_result.get('tags', []))
+        body['used_fallback'] = llm_result.get('used_fallback', False)  # Hedge leg answered first
+        body['llm_usage'] = llm_result.get('llm_usage')  # Tokens, latency and attempts (see llm_accounting)
+        # body['llm_retries'] = llm_result.get('retry_count', 0)  # Track retries
         
-        # Track failures for batch item failure reporting (if enabled)
-        failed_message_ids = []
+        logger.info(f"SQS Worker - Successfully generated content for {content_id}")
         
-        # Collect content_ids for batch status checking
-        successful_content_ids = []
+    except Exception as llm_error:
+        # Log the error and re-raise to trigger SQS retry
+        logger.error(f"SQS Worker - All LLM retries failed for {content_id}: {str(llm_error)}")
+        logger.error(traceback.format_exc())
+        
+        # Don't proceed to DynamoDB - throw error to trigger SQS retry of this message
+        raise ValueError(f"Failed to generate content with LLM after multiple attempts: {str(llm_error)}")
 
-        # Track processing stats
-        record_count = len(event.get('Records', []))
-        success_count = 0
-        db_error_count = 0
+    # Prepare and store data in DynamoDB
+    try:
+        # First make a regular item with content_id as plain string
+        item_for_dynamodb = {
+            'content_id': content_id,  # Keep this as a plain string
+        }
+        
+        # Prepare the attribute data with proper DynamoDB types
+        dynamodb_attributes = prepare_data_for_dynamodb(body)
+        
+        # Remove content_id from the attributes (it's already in the main item)
+        if 'content_id' in dynamodb_attributes:
+            del dynamodb_attributes['content_id']
+        
+        # Add all the properly formatted attributes
+        for key, value in dynamodb_attributes.items():
+            item_for_dynamodb[key] = value
+        
+        # Log the item being written for debugging
+        logger.info(f"Writing to DynamoDB: {json.dumps(item_for_dynamodb, default=str)}")
+        
+        # Simplified existing record check that avoids errors
+        is_update = False
+        try:
+            # Just check if we can scan for this content_id
+            response = table.scan(
+                FilterExpression=boto3.dynamodb.conditions.Key('content_id').eq(content_id),
+                Limit=1
+            )
+            is_update = len(response.get('Items', [])) > 0
+            logger.info(f"Found existing record for {content_id}: {is_update}")
+        except Exception as check_error:
+            logger.warning(f"SQS Worker - Error checking for existing item {content_id}: {str(check_error)}")
+            logger.warning(traceback.format_exc())
+        
+        # Write to DynamoDB
+        table.put_item(Item=item_for_dynamodb)
         
-        # Calculate time limit per record to prevent timeout
-        # Leave 10 seconds for final processing
-        time_per_record_ms = (remaining_time_ms - 10000) / record_count if record_count > 0 else 60000
-        logger.info(f"Allocating {time_per_record_ms/1000} seconds per record")
+        status = "updated" if is_update else "created"
+        logger.info(f"SQS Worker - Successfully {status} item {content_id} in DynamoDB")
         
-        # Import time for timeout tracking
-        import time
-        start_time = time.time()
-
-        for record_index, record in enumerate(event.get('Records', [])):
-            message_id = record.get('messageId', 'N/A')
-            receipt_handle = record.get('receiptHandle', 'N/A')
-            content_id = 'UNKNOWN_ID'  # Default
-            
-            # Calculate if we have sufficient time to process this record
-            elapsed_ms = (time.time() - start_time) * 1000
-            if elapsed_ms > (remaining_time_ms - 20000):  # 20 second safety margin
-                logger.warning(f"Approaching Lambda timeout, processed {record_index}/{record_count} records")
-                # Don't raise exception, just return what we've done so far
-                break
-
-            try:
-                # Log the raw record first
-                logger.info(f"Processing SQS record {record_index+1}/{record_count}: {json.dumps(record)}")
-                
-                # Extract and parse the message body
-                message_body = record.get('body')
-                if not message_body:
-                    logger.error("Missing message body in SQS record")
-                    continue
-                    
-                logger.info(f"Message body: {message_body}")
-                
-                # Parse JSON body
-                try:
-                    body = json.loads(message_body)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse message body as JSON: {str(e)}")
-                    continue
-                
-                # Log parsed body
-                logger.info(f"Parsed body: {json.dumps(body)}")
-                
-                # Validate the required fields are present
-                content_id = body.get('content_id')
-                if not content_id:
-                    logger.error("Missing content_id in message body")
-                    continue
-                
-                # Validate field types
-                validation_errors = validate_field_types(body)
-                if validation_errors:
-                    logger.error(f"SQS Worker - Validation error for {content_id}: {validation_errors}")
-                    raise ValueError(f"Validation failed: {validation_errors}")  # Will trigger retry/DLQ
-
-                # Add processing metadata
-                body['sqs_message_id'] = message_id
-                body['sqs_receipt_handle'] = receipt_handle
-                body['worker_request_id'] = context.aws_request_id
-                # body['processed_by'] = context.function_name
-                body['processed_at'] = datetime.now().isoformat()
-
-                try:
-                    # Use persistent retries in the LLM function
-                    llm_result = generate_content_with_llm(
-                        content_type=body.get('content_type', ''),
-                        model=LLM_MODEL,
-                        description=body.get('description', ''),
-                        tags=body.get('tags', ''),
-                        logger=logger,
-                        timeout=240,        # Increase timeout to 4 minutes per attempt
-                        max_retries=15      # Up to 15 retries (could take a while but will persist)
-                    )
-                    
-                    # Will only reach here if LLM succeeded
-                    body['generated_title'] = llm_result.get('title', '')
-                    body['generated_description'] = llm_result.get('description', '')
-                    body['generated_tags'] = llm_result.get('tags', [])
-                    # body['llm_retries'] = llm_result.get('retry_count', 0)  # Track retries
-                    
-                    logger.info(f"SQS Worker - Successfully generated content for {content_id}")
-                    success_count += 1
-                    
-                except Exception as llm_error:
-                    # Log the error and re-raise to trigger SQS retry
-                    logger.error(f"SQS Worker - All LLM retries failed for {content_id}: {str(llm_error)}")
-                    logger.error(traceback.format_exc())
-                    
-                    # Don't proceed to DynamoDB - throw error to trigger SQS retry of entire message
-                    raise ValueError(f"Failed to generate content with LLM after multiple attempts: {str(llm_error)}")
-
-                # Prepare and store data in DynamoDB
-                try:
-                    # First make a regular item with content_id as plain string
-                    item_for_dynamodb = {
-                        'content_id': content_id,  # Keep this as a plain string
-                    }
-                    
-                    # Prepare the attribute data with proper DynamoDB types
-                    dynamodb_attributes = prepare_data_for_dynamodb(body)
-                    
-                    # Remove content_id from the attributes (it's already in the main item)
-                    if 'content_id' in dynamodb_attributes:
-                        del dynamodb_attributes['content_id']
-                    
-                    # Add all the properly formatted attributes
-                    for key, value in dynamodb_attributes.items():
-                        item_for_dynamodb[key] = value
-                    
-                    # Log the item being written for debugging
-                    logger.info(f"Writing to DynamoDB: {json.dumps(item_for_dynamodb, default=str)}")
-                    
-                    # Simplified existing record check that avoids errors
-                    is_update = False
-                    try:
-                        # Just check if we can scan for this content_id
-                        response = table.scan(
-                            FilterExpression=boto3.dynamodb.conditions.Key('content_id').eq(content_id),
-                            Limit=1
-                        )
-                        is_update = len(response.get('Items', [])) > 0
-                        logger.info(f"Found existing record for {content_id}: {is_update}")
-                    except Exception as check_error:
-                        logger.warning(f"SQS Worker - Error checking for existing item {content_id}: {str(check_error)}")
-                        logger.warning(traceback.format_exc())
-                    
-                    # Write to DynamoDB
-                    table.put_item(Item=item_for_dynamodb)
-                    
-                    status = "updated" if is_update else "created"
-                    logger.info(f"SQS Worker - Successfully {status} item {content_id} in DynamoDB")
-                    
-                    # Add to the list of successful content_ids for batch status checking
-                    successful_content_ids.append(content_id)
-                    
-                except Exception as db_error:
-                    logger.error(f"SQS Worker - Database error for {content_id}: {str(db_error)}")
-                    logger.error(traceback.format_exc())
-                    
-                    # Track DynamoDB errors
-                    db_error_count += 1
-                    
-                    # Since this is a critical operation, we re-raise to trigger SQS retry/DLQ
-                    raise db_error
-
-            except Exception as e:
-                # Log the error
-                trace = traceback.format_exc()
-                logger.error(f"SQS Worker - Failed to process record {message_id} for {content_id}: {str(e)}\n{trace}")
-                
-                # Track the failure
-                failed_message_ids.append(message_id)
-                
-                # Re-raise for standard Lambda-SQS retry behavior
-                raise e
-
-        # Process all successful content_ids in a single batch if there are any
-        if successful_content_ids:
-            try:
-                # Wait a few seconds to allow DynamoDB to reach consistency
-                import time
-                time.sleep(2)  # 2 second delay
-                
-                # Initialize Lambda client
-                lambda_client = boto3.client('lambda')
-                
-                # Get the status checker Lambda name or ARN from environment variable
-                status_checker_function = os.environ.get('STATUS_CHECKER_FUNCTION', 'status_checker')
-                
-                # Prepare batch payload with all content_ids
-                checker_payload = {
-                    'content_ids': successful_content_ids
-                }
-                
-                # Log the batch invocation
-                logger.info(f"Invoking status checker for {len(successful_content_ids)} items: {successful_content_ids}")
-                
-                try:
-                    # Invoke status checker Lambda asynchronously
-                    response = lambda_client.invoke(
-                        FunctionName=status_checker_function,
-                        InvocationType='Event',  # Asynchronous
-                        Payload=json.dumps(checker_payload)
-                    )
-                    
-                    # Check if the invocation was successful
-                    status_code = response.get('StatusCode')
-                    if status_code == 202:  # 202 Accepted indicates successful async invocation
-                        logger.info(f"Successfully triggered status_checker Lambda for batch of {len(successful_content_ids)} items")
-                    else:
-                        logger.error(f"Unexpected status code from Lambda invoke: {status_code}")
-                        logger.error(f"Response: {response}")
-                except Exception as invoke_error:
-                    logger.error(f"Error invoking status checker: {str(invoke_error)}")
-                    logger.error(traceback.format_exc())
-                    logger.warning("Unable to trigger status checker to update Google Sheet - status update will be delayed until next poll")
-            except Exception as trigger_error:
-                logger.error(f"Failed to trigger status_checker batch: {str(trigger_error)}")
-                logger.error(traceback.format_exc())
+    except Exception as db_error:
+        logger.error(f"SQS Worker - Database error for {content_id}: {str(db_error)}")
+        logger.error(traceback.format_exc())
+        # Since this is a critical operation, we re-raise to trigger SQS retry/DLQ
+        raise db_error
+
+def trigger_status_checker(content_ids):
+    """Invoke the status checker Lambda asynchronously for a batch of content_ids."""
+    try:
+        # Initialize Lambda client
+        lambda_client = boto3.client('lambda')
+        
+        # Get the status checker Lambda name or ARN from environment variable
+        status_checker_function = os.environ.get('STATUS_CHECKER_FUNCTION', 'status_checker')
+        
+        # Prepare batch payload with all content_ids
+        checker_payload = {
+            'content_ids': content_ids
+        }
+        
+        # Log the batch invocation
+        logger.info(f"Invoking status checker for {len(content_ids)} items: {content_ids}")
+        
+        # Invoke status checker Lambda asynchronously. put_item has already returned, and the
+        # checker reads with a regular scan afterwards, so no consistency sleep is needed here.
+        response = lambda_client.invoke(
+            FunctionName=status_checker_function,
+            InvocationType='Event',  # Asynchronous
+            Payload=json.dumps(checker_payload)
+        )
+        
+        # Check if the invocation was successful
+        status_code = response.get('StatusCode')
+        if status_code == 202:  # 202 Accepted indicates successful async invocation
+            logger.info(f"Successfully triggered status_checker Lambda for batch of {len(content_ids)} items")
         else:
-            logger.info("No successful items to update status for")
+            logger.error(f"Unexpected status code from Lambda invoke: {status_code}")
+            logger.error(f"Response: {response}")
+    except Exception as invoke_error:
+        logger.error(f"Error invoking status checker: {str(invoke_error)}")
+        logger.error(traceback.format_exc())
+        logger.warning("Unable to trigger status checker to update Google Sheet - status update will be delayed until next poll")
 
-        # If using batch item failures reporting
-        if failed_message_ids:
-            logger.warning(f"SQS Worker - Failed to process {len(failed_message_ids)} messages")
-            # Uncomment if you configure your Lambda trigger to use batch item failure reporting
-            # return {'batchItemFailures': [{'itemIdentifier': msg_id} for msg_id in failed_message_ids]} 
+@profile_handler
+def lambda_handler(event, context):
+    """
+    Process messages from SQS queue.
 
-        # Return success
+    Records are scheduled cheapest-first against the Lambda deadline. Failed and
+    unstarted records are returned as batchItemFailures (requires
+    'ReportBatchItemFailures' on the SQS trigger), so a retry only redoes those.
+    """
+    # Debug logging on every invocation
+    logger.info(f"SQS Worker received event: {json.dumps(event)}")
+    
+    # Run import diagnostics on cold start
+    debug_imports()
+    
+    # Process SQS messages
+    if 'Records' not in event:
+        logger.error("Event does not contain Records. Not an SQS event?")
         return {
-            'statusCode': 200,
+            'statusCode': 400,
             'body': json.dumps({
-                'message': f'Processed {len(event.get("Records", []))} messages, updated {len(successful_content_ids)} items'
+                'error': 'Not a valid SQS event',
+                'event_keys': list(event.keys())
             })
         }
-            
-    except Exception as e:
-        logger.error(f"Unexpected error in lambda_handler: {str(e)}")
-        logger.error(traceback.format_exc())
-        return {
-            'statusCode': 500,
-            'body': json.dumps({
-                'error': f'Unexpected error: {str(e)}'
-            })
-        } 
\ No newline at end of file
+
+    # Fetch offloaded (claim-check) bodies for the whole batch in parallel
+    resolve_record_bodies(event['Records'])
+    work_items = [parse_work_item(record) for record in event['Records']]
+    
+    # Collect content_ids for batch status checking
+    successful_content_ids = []
+
+    def _process(work_item):
+        content_id = process_record(work_item, context)
+        if content_id:
+            successful_content_ids.append(content_id)
+
+    report = run_deadline_scheduled(work_items, _process, context=context)
+
+    # Process all successful content_ids in a single batch if there are any
+    # (sheet_notifier picks the writes up from the stream when it is enabled)
+    if successful_content_ids and SHEET_NOTIFIER_ENABLED:
+        logger.info(f"Sheet notifier enabled, not invoking status checker for {len(successful_content_ids)} items")
+    elif successful_content_ids:
+        trigger_status_checker(successful_content_ids)
+    else:
+        logger.info("No successful items to update status for")
+
+    if report['batchItemFailures']:
+        logger.warning(f"SQS Worker - Returning {len(report['failed'])} failed and "
+                       f"{len(report['deferred'])} deferred messages for retry")
+
+    return {
+        'batchItemFailures': report['batchItemFailures'],
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': f'Processed {len(work_items)} messages, updated {len(successful_content_ids)} items',
+            'completed': len(report['completed']),
+            'failed': len(report['failed']),
+            'deferred': len(report['deferred'])
+        })
+    }
+
+@profile_handler
+def lane_drain_handler(event, context):
+    """
+    Scheduled alternative to the SQS triggers: pulls from the interactive and bulk lane
+    queues under one shared worker budget (see priority_lanes.py), interactive first.
+
+    Failed messages are not deleted and come back after the visibility timeout.
+    """
+    successful_content_ids = []
+
+    def _process(message):
+        # Same record shape as an SQS trigger delivers
+        record = {'messageId': message.get('MessageId'), 'receiptHandle': message.get('ReceiptHandle'),
+                  'body': message.get('Body')}
+        resolve_record_bodies([record])
+        content_id = process_record(parse_work_item(record), context)
+        if content_id:
+            successful_content_ids.append(content_id)
+
+    report = drain_lanes(get_sqs_client(), _process, context=context)
+
+    if successful_content_ids and not SHEET_NOTIFIER_ENABLED:
+        trigger_status_checker(successful_content_ids)
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': f'Drained lanes, updated {len(successful_content_ids)} items',
+            'lanes': report
+        })
+    }
@@ -5,8 +5,18 @@ import logging
 import traceback
 from datetime import datetime
 import requests
-import time
-import random
+from dataclasses import dataclass
+from typing import Optional
+
+from penguindb.utils.pipeline_state import load_state, save_state
+from penguindb.utils.parallel_scan import parallel_scan
+from penguindb.utils.projected_reads import query_views, view_as_item
+from penguindb.utils.sheet_dispatcher import (
+    SheetRateLimited,
+    dispatch_sheet_updates,
+    is_quota_message,
+)
+from penguindb.utils.profiling import profile_handler
 
 
 logger = logging.getLogger()
@@ -15,9 +25,27 @@ logger.setLevel(logging.INFO)
 DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'content_data_test')
 GOOGLE_SHEET_URL = os.environ.get('GOOGLE_SHEET_URL')
 
+# Incremental sheet polling (requires the getChangedItems action in Code.js)
+INCREMENTAL_SHEET_FETCH = os.environ.get('INCREMENTAL_SHEET_FETCH', 'true').lower() == 'true'
+SHEET_PAGE_SIZE = int(os.environ.get('SHEET_PAGE_SIZE', '200'))
+SHEET_MAX_PAGES = int(os.environ.get('SHEET_MAX_PAGES', '20'))
+SHEET_CURSOR_STATE_KEY = 'status_checker#sheet_cursor'
+# Upper bound on pending items one sweep hands to the sheet dispatcher
+PENDING_SCAN_MAX_ITEMS = int(os.environ.get('PENDING_SCAN_MAX_ITEMS', '1000'))
+
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(DYNAMODB_TABLE_NAME)
 
+
+@dataclass(frozen=True)
+class SheetStatusView:
+    """The only attributes a sheet status update needs (no descriptions or raw tags)."""
+    content_id: str
+    generated_title: Optional[str] = None
+    generated_tags: Optional[list] = None
+    processed_at: Optional[str] = None
+
+
 def debug_imports():
     """Debug function to check if all imports are working"""
     logger.info("All imports successful")
@@ -98,27 +126,131 @@ def get_pending_items():
         logger.error(traceback.format_exc())
         return []
 
+def fetch_changed_items(sheet_url, cursor):
+    """
+    Fetch rows changed since the cursor from the Apps Script web app, page by page.
+
+    Args:
+        sheet_url: URL of the Apps Script web app
+        cursor: Cursor returned by the previous poll ('' for a full initial sync)
+
+    Returns:
+        Tuple (changed_items, next_cursor), or None if the web app does not support
+        incremental fetches or the request failed
+    """
+    changed_items = []
+    next_cursor = cursor
+
+    for page in range(SHEET_MAX_PAGES):
+        response = requests.get(
+            sheet_url,
+            params={'action': 'getChangedItems', 'since': next_cursor, 'limit': SHEET_PAGE_SIZE},
+            timeout=15
+        )
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch changed items from Google Sheet: {response.status_code}")
+            return None
+
+        data = response.json()
+        # Older web app deployments answer with the default doGet message
+        if not isinstance(data, dict) or 'next_cursor' not in data:
+            logger.warning("Google Sheet web app does not support getChangedItems")
+            return None
+
+        page_items = [item for item in data.get('data', []) if isinstance(item, dict)]
+        changed_items.extend(page_items)
+        next_cursor = data.get('next_cursor') or next_cursor
+        logger.info(f"Fetched page {page+1} with {len(page_items)} changed rows")
+
+        if not data.get('has_more'):
+            break
+    else:
+        logger.warning(f"Stopped after {SHEET_MAX_PAGES} pages, remaining rows will be fetched on the next poll")
+
+    return changed_items, next_cursor
+
+def get_pending_items_incremental():
+    """
+    Get pending items from the Google Sheet using the persisted cursor.
+
+    Only rows changed since the last poll are transferred. Items that were pending
+    but could not be resolved last time are carried over in the cursor state.
+
+    Returns:
+        Tuple (pending_items, next_cursor), or None to fall back to a full fetch
+    """
+    sheet_url = os.environ.get('GOOGLE_SHEET_URL')
+    if not sheet_url:
+        logger.error("GOOGLE_SHEET_URL environment variable not set")
+        return None
+
+    try:
+        state = load_state(SHEET_CURSOR_STATE_KEY, default={})
+        cursor = state.get('cursor', '')
+        pending_ids = dict.fromkeys(state.get('pending_ids', []))
+        logger.info(f"Fetching sheet changes since cursor '{cursor}' ({len(pending_ids)} carried over)")
+
+        result = fetch_changed_items(sheet_url, cursor)
+        if result is None:
+            return None
+        changed_items, next_cursor = result
+
+        # Apply changes in order; a later non-pending status resolves the item
+        for item in changed_items:
+            content_id = item.get('content_id')
+            if not content_id:
+                continue
+            if str(item.get('status', '')).lower() == 'pending':
+                pending_ids[content_id] = None
+            else:
+                pending_ids.pop(content_id, None)
+
+        logger.info(f"Found {len(pending_ids)} pending items from {len(changed_items)} changed rows")
+        return [{'content_id': content_id} for content_id in pending_ids], next_cursor
+
+    except Exception as e:
+        logger.error(f"Error fetching incremental pending items: {str(e)}")
+        logger.error(traceback.format_exc())
+        return None
+
+def save_sheet_cursor(cursor, unresolved_ids):
+    """Persist the sheet cursor and the pending items that still need a status update."""
+    saved = save_state(SHEET_CURSOR_STATE_KEY, {
+        'cursor': cursor,
+        'pending_ids': sorted(unresolved_ids)
+    })
+    if saved:
+        logger.info(f"Saved sheet cursor '{cursor}' with {len(unresolved_ids)} unresolved items")
+    return saved
+
 def get_item_from_dynamodb(content_id):
-    """Get item from DynamoDB using content_id"""
+    """Get the status attributes of an item from DynamoDB using content_id"""
     try:
-        response = table.scan(
-            FilterExpression='content_id = :content_id',
-            ExpressionAttributeValues={
-                ':content_id': content_id
-            }
-        )
-        
-        items = response.get('Items', [])
-        if not items:
+        view = query_views(table, SheetStatusView, [content_id]).get(content_id)
+        if not view:
             logger.warning(f"No items found for content_id: {content_id}")
             return None
-            
-        return items[0]  # Return first matching item
-        
+
+        return view_as_item(view)
+
     except Exception as e:
         logger.error(f"Error getting item from DynamoDB: {str(e)}")
         return None
 
+def prefetch_status_items(items):
+    """
+    Reads the status attributes of all pending items up front in parallel projected queries.
+
+    Returns:
+        Dictionary content_id -> item dict (empty if the read fails, items are then looked up one by one)
+    """
+    try:
+        views = query_views(table, SheetStatusView, [get_content_id(item) for item in items])
+        return {content_id: view_as_item(view) for content_id, view in views.items()}
+    except Exception as e:
+        logger.error(f"Error prefetching status attributes: {str(e)}")
+        return {}
+
 def update_google_sheet(content_id, dynamo_item):
     """Update Google Sheet with DynamoDB item status"""
     try:
@@ -155,6 +287,55 @@ def update_google_sheet(content_id, dynamo_item):
         logger.error(f"Error updating Google Sheet: {str(e)}")
         return False
 
+def get_content_id(item):
+    """Extract content_id from an item (a dict with content_id, a full DynamoDB item, or the id itself)"""
+    return item.get('content_id') if isinstance(item, dict) else item
+
+def check_and_update_item(item, status_items=None):
+    """
+    Look up one item in DynamoDB and push its status to the Google Sheet.
+
+    Args:
+        item: Pending item (dict with content_id, or the id itself)
+        status_items: Optional prefetched content_id -> status attributes
+
+    Returns:
+        True if the sheet was updated, False otherwise
+
+    Raises:
+        SheetRateLimited: If Apps Script throttled the request (retried by the dispatcher)
+    """
+    content_id = get_content_id(item)
+    try:
+        logger.info(f"Processing item with content_id: {content_id}")
+        
+        # Get item from DynamoDB (prefetched in the batch when available)
+        dynamo_item = (status_items or {}).get(content_id) or get_item_from_dynamodb(content_id)
+        if not dynamo_item:
+            logger.warning(f"Item not found in DynamoDB: {content_id}")
+            return False
+        
+        # We won't update DynamoDB with status, just use the data to update Google Sheet
+        # Determine the status based on whether content was generated
+        sheet_status = 'PROCESSED' if dynamo_item.get('generated_title') else 'ERROR'
+        logger.info(f"Using status '{sheet_status}' for Google Sheet update for {content_id}")
+        
+        # Update Google Sheet using POST request with action=updateStatus
+        result = send_status_update(content_id, sheet_status, dynamo_item)
+        if result:
+            logger.info(f"Successfully updated status for {content_id}")
+        else:
+            logger.warning(f"Failed to update Google Sheet for {content_id}")
+        return result
+        
+    except SheetRateLimited:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing item {content_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        return False
+
+@profile_handler
 def lambda_handler(event, context):
     try:
         logger.info("Starting status checker Lambda")
@@ -164,19 +345,24 @@ def lambda_handler(event, context):
         # Initialize variables
         total_items = 0
         processed_items = 0
-        remaining_items = 0
-        batch_size = 0
         
         # Get items to process - either from event's content_ids or by fetching pending items
         pending_items = get_pending_items_from_event(event)
         
         # If no items found in event, try fetching from Google Sheets
+        sheet_cursor = None
         if not pending_items:
             logger.info("No items found in event, checking Google Sheet for pending items")
-            pending_items = get_pending_items()
+            incremental = get_pending_items_incremental() if INCREMENTAL_SHEET_FETCH else None
+            if incremental is not None:
+                pending_items, sheet_cursor = incremental
+            else:
+                pending_items = get_pending_items()
             
         if not pending_items:
             logger.info("No pending items found")
+            if sheet_cursor is not None:
+                save_sheet_cursor(sheet_cursor, [])
             return {
                 'statusCode': 200,
                 'body': json.dumps({
@@ -188,58 +374,31 @@ def lambda_handler(event, context):
         total_items = len(pending_items)
         logger.info(f"Found {total_items} items to process")
         
-        # Process items in batches
-        batch_size = 10  # Process 10 items at a time
-        for i in range(0, total_items, batch_size):
-            batch = pending_items[i:i + batch_size]
-            remaining_items = total_items - (i + len(batch))
-            
-            logger.info(f"Processing batch of {len(batch)} items (remaining: {remaining_items})")
-            
-            # Process each item in the batch
-            for item in batch:
-                try:
-                    # Extract content_id from item (which might be a dict with just content_id or a full DynamoDB item)
-                    content_id = item.get('content_id') if isinstance(item, dict) else item
-                    logger.info(f"Processing item with content_id: {content_id}")
-                    
-                    # Get item from DynamoDB
-                    dynamo_item = get_item_from_dynamodb(content_id)
-                    if not dynamo_item:
-                        logger.warning(f"Item not found in DynamoDB: {content_id}")
-                        continue
-                    
-                    # We won't update DynamoDB with status, just use the data to update Google Sheet
-                    # Determine the status based on whether content was generated
-                    sheet_status = 'PROCESSED' if dynamo_item.get('generated_title') else 'ERROR'
-                    logger.info(f"Using status '{sheet_status}' for Google Sheet update for {content_id}")
-                    
-                    # Update Google Sheet using POST request with action=updateStatus
-                    result = send_status_update(content_id, sheet_status, dynamo_item)
-                    if result:
-                        processed_items += 1
-                        logger.info(f"Successfully updated status for {content_id}")
-                    else:
-                        logger.warning(f"Failed to update Google Sheet for {content_id}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing item {content_id}: {str(e)}")
-                    logger.error(traceback.format_exc())
-                    continue
-                    
-            # Check if we're running out of time
-            if hasattr(context, 'get_remaining_time_in_millis') and context.get_remaining_time_in_millis() < 10000:  # Less than 10 seconds remaining
-                logger.warning(f"Lambda timeout approaching. Processed {processed_items}/{total_items} items")
-                break
+        # Dispatch sheet updates concurrently under the Apps Script rate limit
+        status_items = prefetch_status_items(pending_items)
+        report = dispatch_sheet_updates(pending_items, lambda item: check_and_update_item(item, status_items),
+                                        context=context)
+        processed_items = report['completed']
+        resolved_ids = {get_content_id(item) for item in report['completed_items']}
+        if report['deferred']:
+            logger.warning(f"Lambda timeout approaching. Processed {processed_items}/{total_items} items")
                 
         logger.info(f"Completed processing. Total items: {total_items}, Processed: {processed_items}")
+
+        # Carry unresolved items over so they are re-checked even if their row doesn't change again
+        if sheet_cursor is not None:
+            unresolved_ids = {item['content_id'] for item in pending_items} - resolved_ids
+            save_sheet_cursor(sheet_cursor, unresolved_ids)
         
         return {
             'statusCode': 200,
             'body': json.dumps({
                 'message': 'Status check completed',
                 'total_items': total_items,
-                'processed_items': processed_items
+                'processed_items': processed_items,
+                'failed_items': report['failed'],
+                'deferred_items': report['deferred'],
+                'throttled_responses': report['throttled']
             })
         }
         
@@ -253,163 +412,13 @@ def lambda_handler(event, context):
             })
         }
 
-def update_sheet_status(content_id, status, processed_at, generated_title):
-    """
-    Update the status of an item in the Google Sheet via the Web App.
-    
-    Args:
-        content_id: The unique ID of the content
-        status: The new status (PROCESSED or ERROR)
-        processed_at: Timestamp when the item was processed
-        generated_title: The generated title if available
-        
-    Returns:
-        Dictionary with success flag and any error message
+def get_pending_items_from_event(event):
     """
-    if not GOOGLE_SHEET_URL:
-        logger.error("GOOGLE_SHEET_URL not configured")
-        return {'success': False, 'error': 'Google Sheet URL not configured'}
-    
-    # More aggressive retry settings
-    max_retries = 5
-    retry_count = 0
-    initial_backoff = 1  # Start with 1 second
-    max_backoff = 16     # Maximum backoff of 16 seconds
-    backoff_time = initial_backoff
-    
-    while retry_count < max_retries:
-        try:
-            if retry_count > 0:
-                logger.info(f"Retry attempt {retry_count}/{max_retries} for {content_id} after {backoff_time}s delay")
-                time.sleep(backoff_time)
-                # Exponential backoff with jitter to avoid thundering herd
-                backoff_time = min(max_backoff, backoff_time * 2) * (0.9 + 0.2 * random.random())
-            
-            logger.info(f"Sending update to Google Sheet for {content_id}, status={status} (Attempt {retry_count+1})")
-            
-            # Prepare payload for the Google Sheet Web App with retry information
-            payload = {
-                'action': 'updateStatus',
-                'content_id': content_id,
-                'status': status,
-                'processed_at': processed_at,
-                'retry_count': retry_count
-            }
-            
-            if generated_title:
-                payload['generated_title'] = generated_title
-                
-            # Convert payload to JSON and encode for HTTP request
-            json.dumps(payload).encode('utf-8')
-            
-            # Set up the request
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            
-            # Log the payload being sent
-            logger.info(f"Sending payload to Google Sheet: {json.dumps(payload)}")
-            
-            # Use requests library which has better error handling
-            try:
-                # Extend timeout for Google Apps Script
-                timeout = 20  # seconds
-                
-                # Send the request
-                response = requests.post(
-                    GOOGLE_SHEET_URL,
-                    json=payload,
-                    headers=headers,
-                    timeout=timeout
-                )
-                
-                # Check if request was successful
-                if response.status_code == 200:
-                    try:
-                        response_data = response.json()
-                        logger.info(f"Response from Google Sheet: {response.text}")
-                        
-                        if response_data.get('status') == 'success':
-                            logger.info(f"Status update successful for {content_id}")
-                            return {'success': True, 'data': response_data.get('data', {})}
-                        else:
-                            error_msg = response_data.get('message', 'Unknown error from Google Sheet')
-                            logger.warning(f"Google Sheet returned error: {error_msg}")
-                            
-                            # If this looks like a quota error or timeout, retry
-                            if 'quota' in error_msg.lower() or 'timeout' in error_msg.lower() or 'limit' in error_msg.lower():
-                                retry_count += 1
-                                if retry_count < max_retries:
-                                    continue
-                            
-                            # For other errors, don't retry as it's likely a data issue
-                            return {'success': False, 'error': error_msg}
-                    except json.JSONDecodeError:
-                        logger.error(f"Failed to parse response: {response.text}")
-                        # Increment retry count and try again
-                        retry_count += 1
-                        if retry_count < max_retries:
-                            continue
-                        return {'success': False, 'error': 'Failed to parse response from Google Sheet'}
-                elif response.status_code >= 500:
-                    # For 5xx server errors, always retry
-                    logger.error(f"Server error {response.status_code}: {response.text}")
-                    retry_count += 1
-                    if retry_count < max_retries:
-                        continue
-                    return {'success': False, 'error': f"Server error {response.status_code}"}
-                elif response.status_code >= 400:
-                    # For 4xx client errors, check if we should retry based on error type
-                    logger.error(f"Client error {response.status_code}: {response.text}")
-                    
-                    # Retry on 429 (Too Many Requests) and specific 4xx errors that might be temporary
-                    if response.status_code == 429 or response.status_code in [408, 425, 449]:
-                        retry_count += 1
-                        if retry_count < max_retries:
-                            # Use longer backoff for rate limiting errors
-                            backoff_time = min(max_backoff * 2, backoff_time * 3)
-                            continue
-                    
-                    return {'success': False, 'error': f"Client error {response.status_code}"}
-                else:
-                    logger.error(f"Unexpected HTTP status {response.status_code}: {response.text}")
-                    retry_count += 1
-                    if retry_count < max_retries:
-                        continue
-                    return {'success': False, 'error': f"Unexpected HTTP status {response.status_code}"}
-                    
-            except requests.Timeout:
-                logger.error(f"Request timed out after {timeout}s")
-                retry_count += 1
-                if retry_count < max_retries:
-                    # Increase timeout for next retry
-                    timeout += 5
-                    continue
-                return {'success': False, 'error': "Request timed out after multiple attempts"}
-                
-            except requests.RequestException as req_error:
-                logger.error(f"Request error: {str(req_error)}")
-                # Network errors should be retried
-                retry_count += 1
-                if retry_count < max_retries:
-                    continue
-                return {'success': False, 'error': f"Request error: {str(req_error)}"}
-                
-        except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}")
-            logger.error(traceback.format_exc())
-            # For unexpected errors, we'll also retry
-            retry_count += 1
-            if retry_count < max_retries:
-                continue
-            return {'success': False, 'error': f"Unexpected error: {str(e)}"}
-            
-    # If we get here, all retries failed
-    logger.error(f"All {max_retries} attempts failed for content_id {content_id}")
-    return {'success': False, 'error': 'All retry attempts failed'}
+    Extract pending items from the event.
 
-def get_pending_items_from_event(event):
-    """Extract pending items from the event or query DynamoDB for recent items."""
+    A whole-table sweep for pending items only runs when the event asks for it with
+    {"sweep": true}; scheduled polls rely on the incremental sheet cursor instead.
+    """
     # Check if we have explicit content_ids passed in the event
     if 'content_ids' in event:
         content_ids = event.get('content_ids', [])
@@ -430,26 +439,31 @@ def get_pending_items_from_event(event):
             logger.warning(f"Error parsing content_ids from event: {str(e)}")
             pass
     
-    # If no content_ids provided, scan DynamoDB for pending items
+    # A full-table read per poll would defeat the incremental cursor, so the sweep is opt-in
+    if not event.get('sweep'):
+        return []
+
     try:
-        logger.info("No specific content_ids provided, scanning for PENDING items")
-        response = table.scan(
-            FilterExpression="attribute_exists(#status) AND #status = :status_val",
-            ExpressionAttributeNames={
-                "#status": "status"
-            },
-            ExpressionAttributeValues={
-                ":status_val": "pending"
-            },
-            Limit=50  # Limit to avoid too many items at once
-        )
-        
-        if 'Items' in response and response['Items']:
-            logger.info(f"Found {len(response['Items'])} pending items in DynamoDB")
-            return response['Items']
+        logger.info("Sweep requested, scanning for PENDING items")
+        # Whole-table parallel sweep; only content_id is read back, the sheet update looks the item up
+        pending_items = []
+        for item in parallel_scan(
+            table,
+            projection=['content_id'],
+            filter_expression="attribute_exists(#status) AND #status = :status_val",
+            expression_attribute_names={"#status": "status"},
+            expression_attribute_values={":status_val": "pending"}
+        ):
+            pending_items.append(item)
+            if len(pending_items) >= PENDING_SCAN_MAX_ITEMS:
+                logger.info(f"Reached PENDING_SCAN_MAX_ITEMS ({PENDING_SCAN_MAX_ITEMS}), the rest is picked up next run")
+                break
+
+        if pending_items:
+            logger.info(f"Found {len(pending_items)} pending items in DynamoDB")
         else:
             logger.info("No pending items found in DynamoDB")
-            return []
+        return pending_items
             
     except Exception as e:
         logger.error(f"Error scanning for pending items: {str(e)}")
@@ -466,6 +480,9 @@ def send_status_update(content_id, status, db_item=None):
         
     Returns:
         Boolean indicating success or failure
+
+    Raises:
+        SheetRateLimited: On HTTP 429 or an Apps Script quota/rate limit error
     """
     if not GOOGLE_SHEET_URL:
         logger.warning("No Google Sheet URL configured")
@@ -538,14 +555,21 @@ def send_status_update(content_id, status, db_item=None):
                     return True
                 else:
                     logger.error(f"Google Apps Script returned error: {response_data}")
+                    if is_quota_message(response_data.get('message')):
+                        raise SheetRateLimited(response_data.get('message'))
                     return False
             except json.JSONDecodeError:
                 logger.error(f"Failed to parse response from Google Apps Script: {response.text}")
                 return False
+        elif response.status_code == 429:
+            logger.warning(f"Google Sheet rate limited the update for {content_id}")
+            raise SheetRateLimited(f"HTTP 429 for {content_id}")
         else:
             logger.error(f"HTTP error {response.status_code} when updating Google Sheet: {response.text}")
             return False
             
+    except SheetRateLimited:
+        raise
     except requests.RequestException as e:
         logger.error(f"Request exception when sending status update for {content_id}: {str(e)}")
         return False
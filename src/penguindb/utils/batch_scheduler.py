@@ -0,0 +1,138 @@
+"""
+Deadline-aware scheduling of SQS batch records for the content processing Lambdas.
+Orders records by predicted cost, skips work that cannot finish before the Lambda
+deadline and builds the SQS partial batch response for everything left unfinished.
+"""
+import time
+import logging
+import threading
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Prior per-record cost in seconds by content_type (LLM call plus DynamoDB write)
+DEFAULT_COST_SECONDS = {
+    'post': 8.0,
+    'article': 10.0,
+    'youtube': 7.0,
+}
+FALLBACK_COST_SECONDS = 12.0
+# Extra seconds per 1,000 characters of description (longer prompts, longer answers)
+COST_PER_1K_CHARS = 1.5
+
+
+class RecordCostModel:
+    """
+    Predicts the processing time of a record from its content_type and description length.
+
+    Observed durations are folded into a per content_type moving average, so the model
+    improves across warm invocations of the same container.
+    """
+
+    def __init__(self, priors=None, alpha=0.3):
+        self.estimates = dict(priors or DEFAULT_COST_SECONDS)
+        self.alpha = alpha
+        self.lock = threading.Lock()
+
+    def predict(self, body):
+        """Returns the predicted seconds to process a parsed message body."""
+        if not isinstance(body, dict):
+            return 0.0
+        content_type = str(body.get('content_type', '')).lower()
+        base = self.estimates.get(content_type, FALLBACK_COST_SECONDS)
+        description = body.get('description') or ''
+        return base + len(str(description)) / 1000 * COST_PER_1K_CHARS
+
+    def observe(self, body, seconds):
+        """Updates the moving average for the record's content_type with an observed duration."""
+        if not isinstance(body, dict):
+            return
+        content_type = str(body.get('content_type', '')).lower()
+        description = body.get('description') or ''
+        base_seconds = max(0.0, seconds - len(str(description)) / 1000 * COST_PER_1K_CHARS)
+        with self.lock:
+            previous = self.estimates.get(content_type, FALLBACK_COST_SECONDS)
+            self.estimates[content_type] = (1 - self.alpha) * previous + self.alpha * base_seconds
+
+
+# Module level so estimates survive across warm invocations
+cost_model = RecordCostModel()
+
+
+def run_deadline_scheduled(work_items, process_fn, context=None, model=None, safety_ms=15000,
+                           default_budget_ms=180000):
+    """
+    Processes work items cheapest-first and stops starting new ones when they cannot
+    finish before the Lambda deadline. Records SQS has delivered before go ahead of
+    fresh ones (most deliveries first) and the first record is always attempted, even
+    if its prediction exceeds the time left, so an expensive record cannot be deferred
+    on every delivery until it lands in the DLQ.
+
+    Each work item is a dict with 'message_id', 'body' (parsed body or None) and
+    optionally 'receive_count' (ApproximateReceiveCount, 1 when missing).
+    process_fn(work_item) raises on failure. The scheduler keeps no state of its own:
+    if the invocation dies before returning, SQS redelivers the whole batch, so
+    process_fn must be idempotent (sqs_worker records every outcome in the
+    idempotency store, and redelivered completed records short-circuit there).
+
+    Args:
+        work_items: List of work item dicts
+        process_fn: Callable processing one work item
+        context: Lambda context (for get_remaining_time_in_millis), optional
+        model: RecordCostModel to use (defaults to the shared module model)
+        safety_ms: Time kept in reserve before the deadline
+        default_budget_ms: Budget assumed when no context is available
+
+    Returns:
+        Dictionary with 'completed', 'failed' and 'deferred' message id lists and
+        'batchItemFailures' for the SQS partial batch response
+    """
+    model = model or cost_model
+    start = time.monotonic()
+
+    def _remaining_ms():
+        if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+            return context.get_remaining_time_in_millis()
+        return default_budget_ms - (time.monotonic() - start) * 1000
+
+    # Shortest predicted job first maximises the records finished before the deadline;
+    # redelivered records come first so deferral does not push them into the DLQ
+    scheduled = sorted(work_items, key=lambda w: (-int(w.get('receive_count') or 1),
+                                                  model.predict(w.get('body'))))
+
+    completed = []
+    failed = []
+    deferred = []
+
+    for index, work_item in enumerate(scheduled):
+        message_id = work_item['message_id']
+        predicted_ms = model.predict(work_item.get('body')) * 1000
+        remaining_ms = _remaining_ms() - safety_ms
+        if predicted_ms > remaining_ms and index > 0:
+            deferred.extend(w['message_id'] for w in scheduled[index:])
+            logger.warning(f"Deferring {len(scheduled) - index} records: predicted {predicted_ms/1000:.1f}s, "
+                           f"{max(0, remaining_ms)/1000:.1f}s left before the deadline")
+            break
+        if predicted_ms > remaining_ms:
+            logger.warning(f"Attempting {message_id} although predicted {predicted_ms/1000:.1f}s exceeds the "
+                           f"{max(0, remaining_ms)/1000:.1f}s left, it is the first record of the batch "
+                           f"(received {work_item.get('receive_count') or 1} times)")
+
+        record_start = time.monotonic()
+        try:
+            process_fn(work_item)
+        except Exception as e:
+            logger.error(f"Record {message_id} failed: {str(e)}")
+            failed.append(message_id)
+            continue
+
+        model.observe(work_item.get('body'), time.monotonic() - record_start)
+        completed.append(message_id)
+        logger.info(f"Progress: {len(completed)}/{len(scheduled)} records completed (last: {message_id})")
+
+    return {
+        'completed': completed,
+        'failed': failed,
+        'deferred': deferred,
+        'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failed + deferred],
+    }
@@ -0,0 +1,149 @@
+"""
+Claim-check support for SQS messages.
+Large message bodies are stored in S3 (optionally gzip-compressed) and only a small
+pointer goes on the queue. Consumers resolve the pointers for a whole batch in parallel.
+
+Objects are not deleted by consumers, since a retried message needs its body again.
+Expire them with an S3 lifecycle rule on CLAIM_CHECK_PREFIX instead.
+"""
+import os
+import gzip
+import json
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+CLAIM_CHECK_BUCKET = os.environ.get('CLAIM_CHECK_BUCKET')
+CLAIM_CHECK_PREFIX = os.environ.get('CLAIM_CHECK_PREFIX', 'sqs-claim-check/')
+CLAIM_CHECK_THRESHOLD_BYTES = int(os.environ.get('CLAIM_CHECK_THRESHOLD_BYTES', '65536'))
+CLAIM_CHECK_COMPRESS = os.environ.get('CLAIM_CHECK_COMPRESS', 'true').lower() == 'true'
+CLAIM_CHECK_FETCH_WORKERS = int(os.environ.get('CLAIM_CHECK_FETCH_WORKERS', '8'))
+
+# Hard SQS limit, bodies above it can only be sent as a claim check
+SQS_MAX_MESSAGE_BYTES = 262144
+
+_s3_client = None
+
+
+def get_s3_client():
+    """Returns the (lazily created) S3 client."""
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client('s3')
+    return _s3_client
+
+
+def offload_if_large(message_body, content_id, bucket=None, threshold=None, compress=None):
+    """
+    Replaces a large SQS message body with a claim-check pointer to S3.
+
+    Args:
+        message_body: Serialized (JSON string) message body
+        content_id: Content ID, kept on the pointer for logging and routing
+        bucket: S3 bucket (defaults to CLAIM_CHECK_BUCKET)
+        threshold: Size in bytes above which the body is offloaded
+        compress: Whether to gzip the stored body
+
+    Returns:
+        The original body if it is small enough (or no bucket is configured),
+        otherwise the serialized pointer
+    """
+    bucket = bucket or CLAIM_CHECK_BUCKET
+    threshold = CLAIM_CHECK_THRESHOLD_BYTES if threshold is None else threshold
+    compress = CLAIM_CHECK_COMPRESS if compress is None else compress
+
+    raw = message_body.encode('utf-8')
+    if len(raw) <= threshold:
+        return message_body
+    if not bucket:
+        if len(raw) > SQS_MAX_MESSAGE_BYTES:
+            logger.error(f"Message for {content_id} is {len(raw)} bytes but CLAIM_CHECK_BUCKET is not set")
+        return message_body
+
+    key = f"{CLAIM_CHECK_PREFIX}{content_id}/{uuid.uuid4()}.json"
+    payload = gzip.compress(raw) if compress else raw
+    put_params = {
+        'Bucket': bucket,
+        'Key': key,
+        'Body': payload,
+        'ContentType': 'application/json',
+    }
+    if compress:
+        put_params['ContentEncoding'] = 'gzip'
+    get_s3_client().put_object(**put_params)
+
+    logger.info(f"Offloaded {len(raw)} byte body for {content_id} to s3://{bucket}/{key} ({len(payload)} bytes stored)")
+    return json.dumps({
+        'content_id': content_id,
+        'claim_check': {
+            'bucket': bucket,
+            'key': key,
+            'encoding': 'gzip' if compress else 'identity',
+            'size': len(raw),
+        }
+    })
+
+
+def get_claim_check(message_body):
+    """Returns the claim-check pointer dict if the serialized body is one, else None."""
+    # Cheap pre-check so regular bodies are not parsed twice
+    if not message_body or '"claim_check"' not in message_body:
+        return None
+    try:
+        parsed = json.loads(message_body)
+    except json.JSONDecodeError:
+        return None
+    pointer = parsed.get('claim_check') if isinstance(parsed, dict) else None
+    if isinstance(pointer, dict) and 'bucket' in pointer and 'key' in pointer:
+        return pointer
+    return None
+
+
+def fetch_body(pointer):
+    """Downloads (and decompresses) the body referenced by a claim-check pointer."""
+    response = get_s3_client().get_object(Bucket=pointer['bucket'], Key=pointer['key'])
+    payload = response['Body'].read()
+    if pointer.get('encoding') == 'gzip':
+        payload = gzip.decompress(payload)
+    return payload.decode('utf-8')
+
+
+def resolve_record_bodies(records, max_workers=None):
+    """
+    Replaces claim-check pointers in SQS records with the stored bodies, fetching in parallel.
+
+    Records are updated in place. A record whose body could not be fetched keeps its
+    pointer and gets a 'claim_check_error' key, so the consumer can report it as failed.
+
+    Args:
+        records: List of SQS records (dicts with 'body')
+        max_workers: Maximum parallel S3 downloads
+
+    Returns:
+        Number of records whose body was fetched from S3
+    """
+    pending = [(record, pointer) for record in records
+               for pointer in [get_claim_check(record.get('body'))] if pointer]
+    if not pending:
+        return 0
+
+    def _fetch(entry):
+        record, pointer = entry
+        try:
+            record['body'] = fetch_body(pointer)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to fetch claim-check body s3://{pointer['bucket']}/{pointer['key']}: {str(e)}")
+            record['claim_check_error'] = str(e)
+            return False
+
+    with ThreadPoolExecutor(max_workers=min(len(pending), max_workers or CLAIM_CHECK_FETCH_WORKERS)) as executor:
+        fetched = sum(executor.map(_fetch, pending))
+
+    logger.info(f"Resolved {fetched}/{len(pending)} claim-check bodies from S3")
+    return fetched
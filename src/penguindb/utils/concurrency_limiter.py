@@ -0,0 +1,281 @@
+"""
+Cluster-wide adaptive (AIMD) concurrency limiter for Bedrock calls.
+
+All sqs_worker / llm_worker containers share one limit stored on the pipeline state
+table. A call takes one of 'limit' lease slots with a conditional write before it
+invokes Bedrock and deletes it afterwards. Leases expire on their own, so a crashed
+container cannot leak capacity. Throttling halves the limit (once per cooldown,
+cluster-wide); every 'limit' successful calls in a container raise it by one.
+
+State items:
+    'bedrock#limiter'       -> limit, last_decrease_at
+    'bedrock#slot#<n>'      -> lease_expires_at, holder
+"""
+import os
+import time
+import uuid
+import random
+import asyncio
+import logging
+import threading
+
+from botocore.exceptions import ClientError
+
+from penguindb.utils.pipeline_state import get_state_table
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+BEDROCK_CONCURRENCY_LIMITER = os.environ.get('BEDROCK_CONCURRENCY_LIMITER', 'false').lower() == 'true'
+LIMITER_INITIAL = int(os.environ.get('BEDROCK_LIMIT_INITIAL', '4'))
+LIMITER_MIN = int(os.environ.get('BEDROCK_LIMIT_MIN', '1'))
+LIMITER_MAX = int(os.environ.get('BEDROCK_LIMIT_MAX', '32'))
+LIMITER_LEASE_SECONDS = int(os.environ.get('BEDROCK_LEASE_SECONDS', '300'))
+LIMITER_MAX_WAIT_SECONDS = float(os.environ.get('BEDROCK_LIMIT_MAX_WAIT_SECONDS', '60'))
+# Only one multiplicative decrease per cooldown, however many containers see the throttle
+LIMITER_DECREASE_COOLDOWN_SECONDS = int(os.environ.get('BEDROCK_LIMIT_DECREASE_COOLDOWN', '10'))
+# How long a container trusts its cached copy of the limit
+LIMITER_CACHE_SECONDS = 2.0
+
+CONTROLLER_KEY = 'bedrock#limiter'
+SLOT_KEY_PREFIX = 'bedrock#slot#'
+
+THROTTLE_MARKERS = ('throttlingexception', 'too many requests', 'rate exceeded', 'toomanyrequests')
+
+
+# Returned by a probe round when the limiter store itself failed
+UNAVAILABLE = object()
+
+
+class LimiterTimeout(Exception):
+    """Raised when no concurrency slot became free within the maximum wait."""
+
+
+def is_throttling_error(error):
+    """Returns True if an exception or error message looks like Bedrock throttling."""
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code', '')
+        if code in ('ThrottlingException', 'TooManyRequestsException', 'ServiceQuotaExceededException'):
+            return True
+    message = str(error or '').lower()
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+
+def _backoff_delays():
+    """Yields jittered exponential wait times between acquisition rounds."""
+    backoff = 0.05
+    while True:
+        yield backoff * (0.5 + random.random())
+        backoff = min(2.0, backoff * 2)
+
+
+class AIMDConcurrencyLimiter:
+    """Shared AIMD limit on in-flight Bedrock calls, backed by DynamoDB lease slots."""
+
+    def __init__(self, table=None, initial=LIMITER_INITIAL, minimum=LIMITER_MIN, maximum=LIMITER_MAX,
+                 lease_seconds=LIMITER_LEASE_SECONDS, max_wait=LIMITER_MAX_WAIT_SECONDS,
+                 cooldown=LIMITER_DECREASE_COOLDOWN_SECONDS):
+        self.table = table
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.lease_seconds = lease_seconds
+        self.max_wait = max_wait
+        self.cooldown = cooldown
+        self.holder = str(uuid.uuid4())
+        self.cached_limit = None
+        self.cached_at = 0.0
+        self.successes = 0
+        self.lock = threading.Lock()
+
+    def _table(self):
+        if self.table is None:
+            self.table = get_state_table()
+        return self.table
+
+    def get_limit(self):
+        """Returns the current cluster-wide limit (cached briefly per container)."""
+        now = time.monotonic()
+        if self.cached_limit is not None and now - self.cached_at < LIMITER_CACHE_SECONDS:
+            return self.cached_limit
+        try:
+            item = self._table().get_item(Key={'state_key': CONTROLLER_KEY}).get('Item')
+            limit = int(item['limit']) if item and 'limit' in item else self.initial
+        except Exception as e:
+            logger.warning(f"Could not read Bedrock concurrency limit, using {self.initial}: {str(e)}")
+            limit = self.initial
+        self.cached_limit = max(self.minimum, min(self.maximum, limit))
+        self.cached_at = now
+        return self.cached_limit
+
+    def _try_slot(self, slot):
+        now = int(time.time())
+        try:
+            self._table().put_item(
+                Item={
+                    'state_key': f"{SLOT_KEY_PREFIX}{slot}",
+                    'holder': self.holder,
+                    'lease_expires_at': now + self.lease_seconds,
+                    'expires_at': now + self.lease_seconds
+                },
+                ConditionExpression='attribute_not_exists(state_key) OR lease_expires_at < :now',
+                ExpressionAttributeValues={':now': now}
+            )
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def _probe(self):
+        """
+        One acquisition round: tries a few random slots below the current limit.
+
+        Returns:
+            Slot number, UNAVAILABLE if the limiter store failed, or None if all probed slots are taken
+        """
+        slots = list(range(self.get_limit()))
+        random.shuffle(slots)
+        try:
+            # Probe a few random slots per round to spread contention
+            for slot in slots[:3]:
+                if self._try_slot(slot):
+                    return slot
+        except Exception as e:
+            logger.warning(f"Bedrock concurrency limiter unavailable, proceeding without it: {str(e)}")
+            return UNAVAILABLE
+        return None
+
+    def acquire(self):
+        """
+        Blocks until a concurrency slot is leased.
+
+        Returns:
+            Slot number to pass to release(), or None if the limiter store is unavailable
+            (the call then proceeds unthrottled rather than failing)
+
+        Raises:
+            LimiterTimeout: If no slot frees up within max_wait seconds
+        """
+        deadline = time.monotonic() + self.max_wait
+        for delay in _backoff_delays():
+            slot = self._probe()
+            if slot is not None:
+                return None if slot is UNAVAILABLE else slot
+            if time.monotonic() >= deadline:
+                raise LimiterTimeout(f"No Bedrock concurrency slot free within {self.max_wait}s (limit {self.cached_limit})")
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Async acquire(): waits on the event loop so waiting calls do not hold executor threads."""
+        deadline = time.monotonic() + self.max_wait
+        for delay in _backoff_delays():
+            slot = await asyncio.to_thread(self._probe)
+            if slot is not None:
+                return None if slot is UNAVAILABLE else slot
+            if time.monotonic() >= deadline:
+                raise LimiterTimeout(f"No Bedrock concurrency slot free within {self.max_wait}s (limit {self.cached_limit})")
+            await asyncio.sleep(delay)
+
+    def release(self, slot):
+        """Frees a leased slot (only if this container still holds it)."""
+        if slot is None:
+            return
+        try:
+            self._table().delete_item(
+                Key={'state_key': f"{SLOT_KEY_PREFIX}{slot}"},
+                ConditionExpression='holder = :holder',
+                ExpressionAttributeValues={':holder': self.holder}
+            )
+        except Exception as e:
+            # Lease expiry frees the slot anyway
+            logger.debug(f"Could not release Bedrock slot {slot}: {str(e)}")
+
+    def on_success(self):
+        """Additive increase: +1 after 'limit' successful calls in this container."""
+        with self.lock:
+            self.successes += 1
+            limit = self.cached_limit or self.initial
+            if self.successes < limit:
+                return
+            self.successes = 0
+        try:
+            response = self._table().update_item(
+                Key={'state_key': CONTROLLER_KEY},
+                UpdateExpression='SET #l = if_not_exists(#l, :initial) + :one',
+                ConditionExpression='attribute_not_exists(#l) OR #l < :max',
+                ExpressionAttributeNames={'#l': 'limit'},
+                ExpressionAttributeValues={':initial': self.initial, ':one': 1, ':max': self.maximum},
+                ReturnValues='UPDATED_NEW'
+            )
+            self.cached_limit = int(response['Attributes']['limit'])
+            self.cached_at = time.monotonic()
+        except Exception as e:
+            logger.debug(f"Bedrock limit increase skipped: {str(e)}")
+
+    def on_throttle(self):
+        """Multiplicative decrease: halve the limit, at most once per cooldown cluster-wide."""
+        with self.lock:
+            self.successes = 0
+        limit = self.get_limit()
+        new_limit = max(self.minimum, limit // 2)
+        now = int(time.time())
+        try:
+            self._table().update_item(
+                Key={'state_key': CONTROLLER_KEY},
+                UpdateExpression='SET #l = :new, last_decrease_at = :now',
+                ConditionExpression='attribute_not_exists(last_decrease_at) OR last_decrease_at < :cutoff',
+                ExpressionAttributeNames={'#l': 'limit'},
+                ExpressionAttributeValues={':new': new_limit, ':now': now, ':cutoff': now - self.cooldown}
+            )
+            logger.warning(f"Bedrock throttled, cluster concurrency limit {limit} -> {new_limit}")
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                logger.warning(f"Bedrock limit decrease failed: {str(e)}")
+        except Exception as e:
+            logger.warning(f"Bedrock limit decrease failed: {str(e)}")
+        # Force a fresh read so this container sees the new limit right away
+        self.cached_limit = None
+
+    async def run_async(self, make_call, is_throttled):
+        """
+        Runs an async Bedrock call under the limiter.
+
+        Only a result without an 'error' counts towards the additive increase; other
+        errors (validation, timeouts) release the slot and leave the limit unchanged.
+
+        Args:
+            make_call: Zero-argument callable returning the awaitable call
+            is_throttled: Callable(result) -> True if the result signals throttling
+
+        Returns:
+            The call result
+        """
+        slot = await self.acquire_async()
+        try:
+            result = await make_call()
+        except Exception as e:
+            if is_throttling_error(e):
+                await asyncio.to_thread(self.on_throttle)
+            raise
+        finally:
+            await asyncio.to_thread(self.release, slot)
+
+        if is_throttled(result):
+            await asyncio.to_thread(self.on_throttle)
+        elif not (isinstance(result, dict) and result.get('error')):
+            await asyncio.to_thread(self.on_success)
+        return result
+
+
+_limiter = None
+
+
+def get_bedrock_limiter():
+    """Returns the container-wide limiter, or None when BEDROCK_CONCURRENCY_LIMITER is off."""
+    global _limiter
+    if not BEDROCK_CONCURRENCY_LIMITER:
+        return None
+    if _limiter is None:
+        _limiter = AIMDConcurrencyLimiter()
+    return _limiter
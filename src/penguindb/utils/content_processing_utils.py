@@ -2,27 +2,45 @@
 Shared utility functions for content processing Lambdas.
 Contains validation, data preparation, error handling, and LLM functions.
 """
+import os
 import json
 from datetime import datetime
 import logging
 import threading
 import enum
 import time
+import asyncio
 
 # Import LLM client with fallback
 try:
-    from penguindb.utils.llm_client import call_claude
+    from penguindb.utils.llm_client import call_claude_hedged, call_claude_hedged_async
 except ImportError:
     logging.warning("Could not import call_claude from penguindb.utils.llm_client. LLM features will be disabled.")
     # Define a dummy function if import fails
-    def call_claude(*args, **kwargs):
-        logging.error("call_claude is not available.")
-        return {"error": "LLM client not imported"}
+    def call_claude_hedged(*args, **kwargs):
+        logging.error("call_claude_hedged is not available.")
+        return {"error": "LLM client not imported"}, {'leg': 'primary'}
+
+    async def call_claude_hedged_async(*args, **kwargs):
+        logging.error("call_claude_hedged_async is not available.")
+        return {"error": "LLM client not imported"}, {'leg': 'primary'}
+
+from penguindb.utils.llm_json import parse_llm_json
+from penguindb.utils.llm_accounting import (
+    LlmCallAccounting, OUTCOME_OK, OUTCOME_ERROR, OUTCOME_TIMEOUT, OUTCOME_INCOMPLETE, prepend_attempts
+)
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Maximum drafts packed into one Bedrock prompt
+PACKED_PROMPT_MAX_ITEMS = int(os.environ.get('PACKED_PROMPT_MAX_ITEMS', '8'))
+
+# Fields generated per item; a partial answer is completed by a follow-up asking only for the rest
+GENERATED_FIELDS = ('title', 'description', 'tags')
+FOLLOW_UP_MAX_TOKENS = int(os.environ.get('LLM_FOLLOW_UP_MAX_TOKENS', '300'))
+
 # Define error types
 class ErrorTypes(enum.Enum):
     VALIDATION_ERROR = "ValidationError"
@@ -64,6 +82,164 @@ def create_error_response(error_type, message, log_message=None):
         }
     }
 
+# --- Record normalization ---
+# Field type rules, compiled once at import time instead of on every call
+FIELD_TYPE_VALIDATIONS = {
+    'content_id': (str,),
+    'media_link': (str,),
+    'embed_link': (str,),
+    'tags': (str, list),
+    'generated_tags': (str, list)
+}
+
+# Fields stored as lists of tags (comma-separated strings are split)
+TAG_FIELDS = frozenset({'tags', 'generated_tags'})
+
+# Fields to exclude from DynamoDB (often from spreadsheet metadata)
+DYNAMODB_EXCLUDED_FIELDS = frozenset({
+    'Column 1',                   # Spreadsheet metadata
+    'Column 2',                   # Spreadsheet metadata
+    'Column 3',                   # Spreadsheet metadata
+    'Row',                        # Spreadsheet metadata
+    'Row Number',                 # Spreadsheet metadata
+    'INDEX',                      # Spreadsheet metadata
+    'ID',                         # Use content_id instead
+    'sheet_id',                   # Spreadsheet metadata
+    'headers',                    # Spreadsheet metadata
+    'error_details',              # Handle separately
+    'attempt_count',              # Handle separately
+    'status',                     # Only track status in Google Sheet, not in DynamoDB
+    'debounce_submission',        # Queue metadata (see debounce.py)
+    'priority'                    # Queue metadata (see priority_lanes.py)
+})
+
+# Fields the ingestion Lambda never stores: LLM output is written later by llm_worker,
+# 'status' and 'timestamp' are unnecessary, 'debounce_submission' and 'priority' are queue metadata
+INGESTION_EXCLUDED_FIELDS = frozenset({
+    'generated_title', 'generated_description', 'generated_tags',
+    'llm_retries', 'llm_usage', 'used_fallback', 'status', 'timestamp', 'debounce_submission', 'priority'
+})
+
+# Marker returned by field handlers when a value should not be stored
+_SKIP = object()
+
+
+def _type_error_message(field, expected_types):
+    if len(expected_types) > 1:
+        return f"Field '{field}' must be one of types: {', '.join(t.__name__ for t in expected_types)}"
+    return f"Field '{field}' must be of type {expected_types[0].__name__}"
+
+
+def _split_tags(value):
+    """Comma-separated string or list -> list of stripped, non-empty tag strings (or _SKIP)."""
+    if isinstance(value, str):
+        tag_list = [tag.strip() for tag in value.split(',') if tag.strip()]
+    elif isinstance(value, list):
+        tag_list = [str(tag).strip() for tag in value if tag is not None and str(tag).strip()]
+    else:
+        return value
+    return tag_list if tag_list else _SKIP
+
+
+def _passthrough(value):
+    return value
+
+
+def _clean_value(value):
+    """Ingestion cleanup: drop empty strings, strip list items, stringify unknown types."""
+    if isinstance(value, str):
+        return value if value else _SKIP
+    if isinstance(value, list):
+        filtered_list = [str(v).strip() for v in value if v is not None and str(v).strip()]
+        return filtered_list if filtered_list else _SKIP
+    if isinstance(value, (int, float, bool)):
+        return value
+    # Attempt conversion for other types, skip if fails
+    try:
+        return str(value)
+    except Exception:
+        return _SKIP
+
+
+class RecordNormalizer:
+    """
+    Schema-compiled, single-pass record normalizer.
+
+    Validates field types, drops excluded fields and None values, splits tags and
+    converts values in one walk over the record. Excluded fields are looked up in a
+    frozenset and every field's handler is resolved once when the normalizer is built.
+    """
+
+    def __init__(self, excluded_fields=frozenset(), default_handler=_passthrough,
+                 field_types=None, tag_fields=TAG_FIELDS):
+        self.excluded_fields = frozenset(excluded_fields)
+        self.default_handler = default_handler
+        field_types = FIELD_TYPE_VALIDATIONS if field_types is None else field_types
+        # field -> (accepted types, precomputed error message)
+        self.validators = {field: (types, _type_error_message(field, types))
+                           for field, types in field_types.items()}
+        # content_id is the key and is always stored untouched
+        handlers = {field: _split_tags for field in tag_fields}
+        handlers['content_id'] = _passthrough
+
+        # field -> (accepted types or None, error message, handler or None if excluded),
+        # so the hot loop does a single dict lookup per field
+        self.plan = {}
+        for field in self.validators.keys() | self.excluded_fields | handlers.keys():
+            types, message = self.validators.get(field, (None, None))
+            handler = None if field in self.excluded_fields else handlers.get(field, default_handler)
+            self.plan[field] = (types, message, handler)
+        # Plan without type checks, for records that were validated earlier
+        self.unchecked_plan = {field: (None, None, handler) for field, (_, _, handler) in self.plan.items()}
+
+    def validate(self, data):
+        """Returns an error message for the first invalid field type, or None."""
+        validators = self.validators
+        for field, value in data.items():
+            rule = validators.get(field)
+            if rule is not None and value is not None and not isinstance(value, rule[0]):
+                return rule[1]
+        return None
+
+    def normalize(self, data, validate=True):
+        """
+        Validates and normalizes a record in a single pass.
+
+        Args:
+            data: Dictionary containing the record
+            validate: Whether to check field types (skip for already validated records)
+
+        Returns:
+            Tuple (normalized_item, error). On a validation error the item is None.
+        """
+        plan = self.plan if validate else self.unchecked_plan
+        default_handler = self.default_handler
+        normalized = {}
+
+        for field, value in data.items():
+            if value is None:
+                continue
+            entry = plan.get(field)
+            if entry is None:
+                value = default_handler(value)
+            else:
+                types, message, handler = entry
+                if types is not None and not isinstance(value, types):
+                    return None, message
+                if handler is None:
+                    continue
+                value = handler(value)
+            if value is not _SKIP:
+                normalized[field] = value
+
+        return normalized, None
+
+
+# Shared normalizers for the Lambdas
+DYNAMODB_NORMALIZER = RecordNormalizer(DYNAMODB_EXCLUDED_FIELDS)
+INGESTION_NORMALIZER = RecordNormalizer(INGESTION_EXCLUDED_FIELDS, default_handler=_clean_value)
+
+
 def validate_field_types(data):
     """
     Validates the types of fields in the request body.
@@ -75,29 +251,12 @@ def validate_field_types(data):
     Returns:
         None if validation passes, error message string if validation fails
     """
-    type_validations = {
-        'content_id': str,
-        'media_link': str,
-        'embed_link': str,
-        'tags': (str, list),
-        'generated_tags': (str, list)
-    }
-    
-    for field, expected_type in type_validations.items():
-        if field in data and data[field] is not None:
-            if isinstance(expected_type, tuple):
-                if not any(isinstance(data[field], t) for t in expected_type):
-                    type_names = [t.__name__ for t in expected_type]
-                    return f"Field '{field}' must be one of types: {', '.join(type_names)}"
-            elif not isinstance(data[field], expected_type):
-                return f"Field '{field}' must be of type {expected_type.__name__}"
-    
-    return None
+    return DYNAMODB_NORMALIZER.validate(data)
 
 def prepare_data_for_dynamodb(item):
     """
     Prepares data for writing to DynamoDB.
-    Converts string lists (comma-separated) to sets and handles other type conversions.
+    Converts string lists (comma-separated) to lists and handles other type conversions.
     Safely handles missing fields like media_link or embed_link.
     
     Args:
@@ -106,75 +265,47 @@ def prepare_data_for_dynamodb(item):
     Returns:
         Dictionary with data formatted for DynamoDB
     """
-    dynamodb_item = {}
-    
-    # Fields to exclude from DynamoDB (often from spreadsheet metadata)
-    excluded_fields = [
-        'Column 1',                   # Spreadsheet metadata
-        'Column 2',                   # Spreadsheet metadata
-        'Column 3',                   # Spreadsheet metadata
-        'Row',                        # Spreadsheet metadata
-        'Row Number',                 # Spreadsheet metadata
-        'INDEX',                      # Spreadsheet metadata
-        'ID',                         # Use content_id instead
-        'sheet_id',                   # Spreadsheet metadata
-        'headers',                    # Spreadsheet metadata
-        'error_details',              # Handle separately
-        'attempt_count',              # Handle separately
-        'status'                      # Only track status in Google Sheet, not in DynamoDB
-    ]
-    
-    # Process each field
-    for key, value in item.items():
-        # Skip excluded fields
-        if key in excluded_fields:
-            continue
-            
-        # Skip null values
-        if value is None:
-            continue
-        
-        # Special handling for content_id (should be a plain string in the main item)
-        if key == 'content_id':
-            dynamodb_item[key] = value
-            continue
-            
-        # Handle comma-separated tags as StringSet
-        if key in ['tags', 'generated_tags'] and isinstance(value, str):
-            if value.strip():  # Only process non-empty strings
-                tag_list = [tag.strip() for tag in value.split(',') if tag.strip()]
-                if tag_list:
-                    dynamodb_item[key] = tag_list  # Use plain list for boto3 client
-                    
-        # Handle actual list as StringSet
-        elif key in ['tags', 'generated_tags'] and isinstance(value, list):
-            if value:  # Only process non-empty lists
-                tag_list = [str(tag).strip() for tag in value if str(tag).strip()]
-                if tag_list:
-                    dynamodb_item[key] = tag_list  # Use plain list for boto3 client
-                    
-        # Handle standard types - let boto3 handle the conversion
-        else:
-            dynamodb_item[key] = value
-    
+    # Types were validated on receipt, so only strip and convert here
+    dynamodb_item, _ = DYNAMODB_NORMALIZER.normalize(item, validate=False)
     return dynamodb_item
 
-def generate_content_with_llm(content_type, model, description, tags, logger, timeout=180, max_retries=10, original_title=None):
+# Shared style preamble, sent once per prompt (single or packed)
+STYLE_GUIDELINES = """    Style guidelines:
+    - For content tagged with "humor" or where humor is explicitly requested: Use my conversational style with witty elements and occasional wordplay.
+    - For all other content (especially technical/educational): Maintain a professional tone with clarity and technical precision. My professional content should convey expertise in data engineering while remaining accessible.
+
+    I work specifically in data engineering with expertise in data infrastructure, ML, cloud services, analytics, generative AI, and agentic AI. My content should reflect this specialization rather than general tech topics.
+
+    My writing style is straightforward with clear technical explanations. I prefer active voice and concrete examples over abstract concepts. I sometimes use short sentences for emphasis.
+"""
+
+def get_word_counts(content_type):
+    """Returns (description word count, title word count) ranges for a content type."""
+    # Adjust word count based on content type
+    if content_type.lower() == "post":
+        desc_word_count = "10-15"
+    elif content_type.lower() == "article":
+        desc_word_count = "15-20"
+    elif content_type.lower() == "youtube":
+        desc_word_count = "7-10"
+    else:
+        desc_word_count = "25-30"
+
+    title_word_count = "3-4" if content_type.lower() == "youtube" else "3-6"
+    return desc_word_count, title_word_count
+
+def build_content_prompt(content_type, description, tags, original_title=None):
     """
-    Generate content using Claude LLM with aggressive timeout handling and persistent retries.
-    Will retry until successful or until max_retries is reached.
+    Builds the content generation prompt for one item.
     
     Args:
         content_type: Type of content ('post', 'article', etc.)
         description: Original content description
         tags: Original tags (string or list)
-        logger: Logger instance
-        timeout: Timeout in seconds for each attempt
-        max_retries: Maximum number of retry attempts for failure
         original_title: Original title from the source content (optional)
     
     Returns:
-        Dictionary with generated title, description, and tags
+        Prompt string
     """
     # Convert tags to string for prompt if needed
     if isinstance(tags, (list, set)):
@@ -182,17 +313,7 @@ def generate_content_with_llm(content_type, model, description, tags, logger, ti
     else:
         tags_str = tags or ""
 
-    # Adjust word count based on content type
-    if content_type.lower() == "post":
-        desc_word_count = "10-15"
-    elif content_type.lower() == "article":
-        desc_word_count = "15-20"
-    elif content_type.lower() == "youtube":
-        desc_word_count = "7-10"
-    else:
-        desc_word_count = "25-30"
-
-    title_word_count = "3-4" if content_type.lower() == "youtube" else "3-6"
+    desc_word_count, title_word_count = get_word_counts(content_type)
     
     # Include original title in prompt if available
     title_context = ""
@@ -212,16 +333,96 @@ def generate_content_with_llm(content_type, model, description, tags, logger, ti
 
     3. Generate up to 10 relevant tags that comprehensively cover all key technical concepts, tools, and topics mentioned in my description. Extract specific technologies, methodologies, platforms, and concepts that would make excellent search terms. Prioritize specific technical terms (like "Apache Airflow", "AWS Glue", "data lake") over generic categories ("tool", "cloud", "storage"). Ensure each tag directly relates to content in the description.
 
-    Style guidelines:
-    - For content tagged with "humor" or where humor is explicitly requested: Use my conversational style with witty elements and occasional wordplay.
-    - For all other content (especially technical/educational): Maintain a professional tone with clarity and technical precision. My professional content should convey expertise in data engineering while remaining accessible.
+{STYLE_GUIDELINES}
+    Return as JSON with keys: title, description, tags (array of up to 10 strings)
+    """
+    return prompt
 
-    I work specifically in data engineering with expertise in data infrastructure, ML, cloud services, analytics, generative AI, and agentic AI. My content should reflect this specialization rather than general tech topics.
+def missing_generated_fields(response):
+    """
+    Returns the generated fields a partial LLM answer lacks.
 
-    My writing style is straightforward with clear technical explanations. I prefer active voice and concrete examples over abstract concepts. I sometimes use short sentences for emphasis.
+    Only answers with at least one generated field count as partial; an answer without
+    any (or an error) returns [] and takes the normal retry path.
+    """
+    if "error" in response or not any(response.get(field) for field in GENERATED_FIELDS):
+        return []
+    return [field for field in GENERATED_FIELDS if not response.get(field)]
 
-    Return as JSON with keys: title, description, tags (array of up to 10 strings)
+def build_missing_fields_prompt(content_type, description, tags, partial, missing, original_title=None):
+    """
+    Builds a short follow-up prompt asking only for the fields missing from a partial answer.
+    The fields already generated are included so the completion stays consistent with them.
+    
+    Args:
+        content_type: Type of content ('post', 'article', etc.)
+        description: Original content description
+        tags: Original tags (string or list)
+        partial: The partial LLM answer
+        missing: Names of the missing fields (see GENERATED_FIELDS)
+        original_title: Original title from the source content (optional)
+    
+    Returns:
+        Prompt string
+    """
+    if isinstance(tags, (list, set)):
+        tags_str = ", ".join(str(tag) for tag in tags)
+    else:
+        tags_str = tags or ""
+    desc_word_count, title_word_count = get_word_counts(content_type)
+    instructions = {
+        'title': f"title: an attention-grabbing title ({title_word_count} words), intriguing but not clickbaity",
+        'description': f"description: a punchy, conversational description (around {desc_word_count} words)",
+        'tags': "tags: an array of up to 10 specific technical tags covering the key concepts, tools and topics",
+    }
+    known = {field: partial[field] for field in GENERATED_FIELDS if partial.get(field)}
+    title_context = f"Original Title: {original_title}\n    " if original_title else ""
+    requested = "\n".join(f"    - {instructions[field]}" for field in missing)
+
+    prompt = f"""
+    Content Type: {content_type}
+    {title_context}My Draft: {description}
+    Current Tags: {tags_str}
+
+    You already wrote this for my draft: {json.dumps(known)}
+
+    Only these fields are still missing:
+{requested}
+
+    Return as JSON with only these keys: {", ".join(missing)}
     """
+    return prompt
+
+def merge_missing_fields(response, completion, missing):
+    """Copies the missing fields a follow-up answer supplied into the partial response (in place)."""
+    if not isinstance(completion, dict) or "error" in completion:
+        logger.warning(f"LLM follow-up for {', '.join(missing)} failed: {(completion or {}).get('error')}")
+        return response
+    for field in missing:
+        if completion.get(field):
+            response[field] = completion[field]
+    return response
+
+def generate_content_with_llm(content_type, model, description, tags, logger, timeout=180, max_retries=10, original_title=None):
+    """
+    Generate content using Claude LLM with aggressive timeout handling and persistent retries.
+    Will retry until successful or until max_retries is reached.
+    
+    Args:
+        content_type: Type of content ('post', 'article', etc.)
+        description: Original content description
+        tags: Original tags (string or list)
+        logger: Logger instance
+        timeout: Timeout in seconds for each attempt
+        max_retries: Maximum number of retry attempts for failure
+        original_title: Original title from the source content (optional)
+    
+    Returns:
+        Dictionary with generated title, description, tags, used_fallback (hedge leg won),
+        retry_count and llm_usage (see llm_accounting)
+    """
+    prompt = build_content_prompt(content_type, description, tags, original_title)
+    accounting = LlmCallAccounting(model)
     
     # Initialize empty result
     llm_result = {"title": "", "description": "", "tags": []}
@@ -239,11 +440,14 @@ def generate_content_with_llm(content_type, model, description, tags, logger, ti
         # Thread variables
         llm_error = None
         thread_completed = False
+        attempt_started = time.monotonic()
+        attempt_calls = []  # (started, outcome, leg, follow_up) per Bedrock call of this attempt
         
-        def _generate_llm_content_thread():
+        def _generate_llm_content_thread(calls):
             nonlocal llm_result, llm_error, thread_completed
+            started, follow_up = time.monotonic(), False
             try:
-                response = call_claude(
+                response, leg = call_claude_hedged(
                     prompt=prompt,
                     model_id=model,
                     extract_json=True,
@@ -254,24 +458,44 @@ def generate_content_with_llm(content_type, model, description, tags, logger, ti
                     error_msg = response.get('error', '')
                     logger.warning(f"LLM response contained an error: {error_msg}")
                     llm_error = error_msg
+                    calls.append((started, OUTCOME_ERROR, leg, follow_up))
                     return
+
+                # A partial answer is completed with a short follow-up instead of a full retry
+                missing = missing_generated_fields(response)
+                if missing:
+                    logger.info(f"LLM response is missing {', '.join(missing)}, asking for them only")
+                    calls.append((started, OUTCOME_INCOMPLETE, leg, follow_up))
+                    started, follow_up = time.monotonic(), True
+                    completion, leg = call_claude_hedged(
+                        prompt=build_missing_fields_prompt(content_type, description, tags, response, missing,
+                                                           original_title),
+                        model_id=model,
+                        extract_json=True,
+                        max_tokens=FOLLOW_UP_MAX_TOKENS
+                    )
+                    merge_missing_fields(response, completion, missing)
                     
                 # Check for valid content in response
                 if not response.get('title') or not response.get('tags'):
                     logger.warning(f"LLM returned incomplete data: {json.dumps(response)}")
                     llm_error = "Incomplete LLM response"
+                    calls.append((started, OUTCOME_INCOMPLETE, leg, follow_up))
                     return
                 
                 # Success path
                 llm_result.update(response)
+                llm_result['used_fallback'] = leg['leg'] == 'hedge'
+                calls.append((started, OUTCOME_OK, leg, follow_up))
                 thread_completed = True
                 
             except Exception as e:
                 llm_error = str(e)
+                calls.append((started, OUTCOME_ERROR, None, follow_up))
                 logger.error(f"Error in LLM thread: {llm_error}")
 
         # Run in thread with timeout
-        llm_thread = threading.Thread(target=_generate_llm_content_thread)
+        llm_thread = threading.Thread(target=_generate_llm_content_thread, args=(attempt_calls,))
         llm_thread.daemon = True  # Allow thread to be killed when lambda exits
         llm_thread.start()
         llm_thread.join(timeout=timeout)
@@ -279,8 +503,11 @@ def generate_content_with_llm(content_type, model, description, tags, logger, ti
         # Check for timeout
         if llm_thread.is_alive():
             logger.warning(f"LLM generation timed out after {timeout} seconds on attempt {retry_attempt+1}")
+            accounting.record(attempt_started, OUTCOME_TIMEOUT)
             # Continue to next retry
             continue
+        for started, outcome, leg, follow_up in attempt_calls:
+            accounting.record(started, outcome, leg, follow_up=follow_up)
             
         # Check for success
         if thread_completed and llm_result.get('title') and llm_result.get('tags'):
@@ -296,7 +523,15 @@ def generate_content_with_llm(content_type, model, description, tags, logger, ti
         logger.error(f"LLM generation failed after {max_retries} attempts")
         raise ValueError(f"Failed to generate content with LLM after {max_retries} attempts")
     
-    # Ensure tags is a list
+    ensure_tags_list(llm_result, logger)
+    llm_result['retry_count'] = accounting.retry_count
+    llm_result['llm_usage'] = accounting.summary()
+
+    logger.info(f"LLM Response: {json.dumps(llm_result)}")
+    return llm_result
+
+def ensure_tags_list(llm_result, logger):
+    """Converts the 'tags' of an LLM result to a list in place (LLMs sometimes return a string)."""
     if 'tags' in llm_result and not isinstance(llm_result['tags'], list):
         try:
             # Try converting comma-separated string if LLM returned wrong format
@@ -305,6 +540,301 @@ def generate_content_with_llm(content_type, model, description, tags, logger, ti
         except Exception as e:
             logger.warning(f"Could not parse 'tags' from LLM into a list: {llm_result['tags']}. Error: {str(e)}")
             llm_result['tags'] = []
+    return llm_result
+
+async def generate_content_with_llm_async(content_type, model, description, tags, logger, timeout=180, max_retries=10,
+                                          original_title=None, bedrock_client=None):
+    """
+    Async variant of generate_content_with_llm for callers running on an event loop.
+    Uses asyncio timeouts and sleeps instead of threads, so other coroutines
+    (e.g. the previous record's DynamoDB write) keep running during backoff.
+    
+    Args:
+        content_type: Type of content ('post', 'article', etc.)
+        model: Bedrock model ID
+        description: Original content description
+        tags: Original tags (string or list)
+        logger: Logger instance
+        timeout: Timeout in seconds for each attempt
+        max_retries: Maximum number of retry attempts for failure
+        original_title: Original title from the source content (optional)
+        bedrock_client: Shared aioboto3 bedrock-runtime client (optional)
+    
+    Returns:
+        Dictionary with generated title, description, tags, used_fallback (hedge leg won),
+        retry_count and llm_usage (see llm_accounting)
+    """
+    prompt = build_content_prompt(content_type, description, tags, original_title)
+    accounting = LlmCallAccounting(model)
+    llm_result = {"title": "", "description": "", "tags": []}
+
+    for retry_attempt in range(max_retries):
+        backoff_time = min(300, 2 ** retry_attempt + (retry_attempt * 5))  # Max 5 minute backoff
+        if retry_attempt > 0:
+            logger.info(f"LLM RETRY ATTEMPT {retry_attempt}/{max_retries} after {backoff_time}s backoff")
+            await asyncio.sleep(backoff_time)
+
+        attempt_started = time.monotonic()
+        try:
+            response, leg = await asyncio.wait_for(
+                call_claude_hedged_async(
+                    prompt=prompt,
+                    model_id=model,
+                    extract_json=True,
+                    max_tokens=500,
+                    bedrock_client=bedrock_client
+                ),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"LLM generation timed out after {timeout} seconds on attempt {retry_attempt+1}")
+            accounting.record(attempt_started, OUTCOME_TIMEOUT)
+            continue
+        except Exception as e:
+            logger.warning(f"LLM attempt {retry_attempt+1} failed: {str(e)}")
+            accounting.record(attempt_started, OUTCOME_ERROR)
+            continue
+
+        if "error" in response:
+            logger.warning(f"LLM attempt {retry_attempt+1} failed: {response.get('error', '')}")
+            accounting.record(attempt_started, OUTCOME_ERROR, leg)
+            continue
+
+        # A partial answer is completed with a short follow-up instead of a full retry
+        follow_up = False
+        missing = missing_generated_fields(response)
+        if missing:
+            logger.info(f"LLM response is missing {', '.join(missing)}, asking for them only")
+            accounting.record(attempt_started, OUTCOME_INCOMPLETE, leg)
+            attempt_started, follow_up = time.monotonic(), True
+            try:
+                completion, leg = await asyncio.wait_for(
+                    call_claude_hedged_async(
+                        prompt=build_missing_fields_prompt(content_type, description, tags, response, missing,
+                                                           original_title),
+                        model_id=model,
+                        extract_json=True,
+                        max_tokens=FOLLOW_UP_MAX_TOKENS,
+                        bedrock_client=bedrock_client
+                    ),
+                    timeout=timeout
+                )
+                merge_missing_fields(response, completion, missing)
+            except asyncio.TimeoutError:
+                logger.warning(f"LLM follow-up timed out after {timeout} seconds on attempt {retry_attempt+1}")
+                accounting.record(attempt_started, OUTCOME_TIMEOUT, follow_up=True)
+                continue
+            except Exception as e:
+                logger.warning(f"LLM follow-up failed on attempt {retry_attempt+1}: {str(e)}")
+                accounting.record(attempt_started, OUTCOME_ERROR, follow_up=True)
+                continue
+
+        if not response.get('title') or not response.get('tags'):
+            logger.warning(f"LLM returned incomplete data: {json.dumps(response)}")
+            accounting.record(attempt_started, OUTCOME_INCOMPLETE, leg, follow_up=follow_up)
+            continue
 
+        accounting.record(attempt_started, OUTCOME_OK, leg, follow_up=follow_up)
+        llm_result.update(response)
+        llm_result['used_fallback'] = leg['leg'] == 'hedge'
+        logger.info(f"LLM generation successful on attempt {retry_attempt+1}")
+        break
+
+    if not llm_result.get('title') or not llm_result.get('tags'):
+        logger.error(f"LLM generation failed after {max_retries} attempts")
+        raise ValueError(f"Failed to generate content with LLM after {max_retries} attempts")
+
+    ensure_tags_list(llm_result, logger)
+    llm_result['retry_count'] = accounting.retry_count
+    llm_result['llm_usage'] = accounting.summary()
     logger.info(f"LLM Response: {json.dumps(llm_result)}")
-    return llm_result 
\ No newline at end of file
+    return llm_result 
+
+def build_packed_content_prompt(content_type, items):
+    """
+    Builds one prompt asking for generated content for several items of the same content_type.
+    The style guidelines are sent once instead of once per item.
+    
+    Args:
+        content_type: Shared content type of all items
+        items: List of dicts with content_id, description, tags and optional original_title
+    
+    Returns:
+        Prompt string
+    """
+    desc_word_count, title_word_count = get_word_counts(content_type)
+
+    drafts = []
+    for item in items:
+        tags = item.get('tags')
+        tags_str = ", ".join(str(tag) for tag in tags) if isinstance(tags, (list, set)) else (tags or "")
+        title_line = f"\n      Original Title: {item['original_title']}" if item.get('original_title') else ""
+        drafts.append(
+            f"""    - content_id: {item['content_id']}{title_line}
+      My Draft: {item.get('description', '')}
+      Current Tags: {tags_str}"""
+        )
+    drafts_text = "\n".join(drafts)
+
+    prompt = f"""
+    Content Type: {content_type}
+
+    Hey, help me refine these {len(items)} {content_type} drafts I'm working on. Treat each draft independently. For each one I need:
+
+    1. An attention-grabbing title ({title_word_count} words) - something that would make YOU want to click. Be intriguing but not clickbaity and not dramatic. Use the original title as reference if provided.
+
+    2. A punchy description (around {desc_word_count} words) that sounds like a real person wrote it - conversational, occasionally using "I" statements, and avoiding perfectionist language or overly formal structure.
+
+    3. Generate up to 10 relevant tags that comprehensively cover all key technical concepts, tools, and topics mentioned in that draft. Prioritize specific technical terms (like "Apache Airflow", "AWS Glue", "data lake") over generic categories ("tool", "cloud", "storage"). Ensure each tag directly relates to content in the draft.
+
+{STYLE_GUIDELINES}
+    Drafts:
+{drafts_text}
+
+    Return a JSON array with exactly one object per draft, with keys: content_id (copied exactly), title, description, tags (array of up to 10 strings)
+    """
+    return prompt
+
+def parse_packed_response(raw_response, expected_ids, logger, repairs=None):
+    """
+    Extracts per-item results from a packed LLM response.
+    A truncated or slightly malformed array is repaired, so the complete entries are kept.
+    
+    Args:
+        raw_response: Raw text returned by the LLM
+        expected_ids: content_ids that were sent in the prompt
+        logger: Logger instance
+        repairs: Optional list extended with the JSON repairs applied (see llm_json)
+    
+    Returns:
+        Dictionary content_id -> result for every valid entry (title and tags present)
+    """
+    results = {}
+    try:
+        entries, applied = parse_llm_json(raw_response, '[')
+    except ValueError as e:
+        logger.warning(f"Invalid JSON array in packed LLM response: {str(e)}")
+        return results
+    if applied:
+        logger.info(f"Repaired packed LLM response: {', '.join(applied)}")
+        if repairs is not None:
+            repairs.extend(applied)
+
+    expected = set(expected_ids)
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        content_id = str(entry.get('content_id', ''))
+        if content_id not in expected or content_id in results:
+            continue
+        if not entry.get('title') or not entry.get('tags'):
+            logger.warning(f"Packed LLM entry for {content_id} is incomplete: {json.dumps(entry)}")
+            continue
+        result = {
+            'title': entry['title'],
+            'description': entry.get('description', ''),
+            'tags': entry['tags']
+        }
+        results[content_id] = ensure_tags_list(result, logger)
+    return results
+
+def _call_with_timeout(func, timeout):
+    """Runs func on a daemon thread. Returns (result, error), error is 'timeout' if it did not finish."""
+    outcome = {}
+
+    def _target():
+        try:
+            outcome['result'] = func()
+        except Exception as e:
+            outcome['error'] = str(e)
+
+    worker = threading.Thread(target=_target)
+    worker.daemon = True  # Allow thread to be killed when lambda exits
+    worker.start()
+    worker.join(timeout=timeout)
+    if worker.is_alive():
+        return None, 'timeout'
+    return outcome.get('result'), outcome.get('error')
+
+def generate_content_batch_with_llm(content_type, model, items, logger, timeout=240, max_retries=10,
+                                    max_items_per_prompt=None):
+    """
+    Generate content for several items of the same content_type with packed prompts.
+
+    Items are sent in chunks of up to max_items_per_prompt per Bedrock call. Entries
+    that come back missing or invalid are re-submitted individually through
+    generate_content_with_llm (with its usual retries).
+    
+    Args:
+        content_type: Shared content type of all items
+        model: Bedrock model ID
+        items: List of dicts with content_id, description, tags and optional original_title
+        logger: Logger instance
+        timeout: Timeout in seconds for each call
+        max_retries: Retries for the individual fallback calls
+        max_items_per_prompt: Chunk size (defaults to PACKED_PROMPT_MAX_ITEMS)
+    
+    Returns:
+        Tuple (results, errors): content_id -> generated content, content_id -> error message
+    """
+    chunk_size = max(1, max_items_per_prompt or PACKED_PROMPT_MAX_ITEMS)
+    results = {}
+    errors = {}
+
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        chunk_ids = [str(item['content_id']) for item in chunk]
+
+        packed = {}
+        accounting = None
+        if len(chunk) > 1:
+            prompt = build_packed_content_prompt(content_type, chunk)
+            accounting = LlmCallAccounting(model, packed=len(chunk))
+            attempt_started = time.monotonic()
+            hedged, error = _call_with_timeout(
+                lambda: call_claude_hedged(prompt=prompt, model_id=model, extract_json=False,
+                                           max_tokens=min(4096, 300 * len(chunk))),
+                timeout
+            )
+            response, leg = hedged or (None, None)
+            if error or not response or 'error' in response:
+                logger.warning(f"Packed LLM call for {len(chunk)} {content_type} items failed: "
+                               f"{error or (response or {}).get('error')}")
+                accounting.record(attempt_started, OUTCOME_TIMEOUT if error == 'timeout' else OUTCOME_ERROR, leg)
+            else:
+                repairs = []
+                packed = parse_packed_response(response.get('raw_response', ''), chunk_ids, logger, repairs)
+                accounting.record(attempt_started, OUTCOME_OK if packed else OUTCOME_INCOMPLETE, leg,
+                                  json_repairs=repairs)
+                usage = accounting.summary()
+                for result in packed.values():
+                    result['used_fallback'] = leg['leg'] == 'hedge'
+                    result['retry_count'] = 0
+                    result['llm_usage'] = usage
+            logger.info(f"Packed LLM call returned {len(packed)}/{len(chunk)} valid {content_type} items")
+
+        for item, content_id in zip(chunk, chunk_ids):
+            if content_id in packed:
+                results[content_id] = packed[content_id]
+                continue
+            # Missing or invalid in the packed answer, fall back to a single-item call
+            try:
+                result = generate_content_with_llm(
+                    content_type=content_type,
+                    model=model,
+                    description=item.get('description', ''),
+                    tags=item.get('tags', []),
+                    logger=logger,
+                    timeout=timeout,
+                    max_retries=max_retries,
+                    original_title=item.get('original_title')
+                )
+            except Exception as e:
+                errors[content_id] = str(e)
+                continue
+            if accounting:
+                # The packed call counts as this item's first attempt
+                result['llm_usage'] = prepend_attempts(result['llm_usage'], accounting)
+            results[content_id] = result
+
+    return results, errors
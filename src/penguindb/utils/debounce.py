@@ -0,0 +1,129 @@
+"""
+Debounce of rapid re-submissions of the same sheet row.
+
+The Apps Script onEdit/processRow path can submit a row several times within seconds
+while someone is editing it. Submissions are keyed by content_id and a hash of the
+normalized body (volatile sheet columns such as status, attempt_count and timestamps
+are ignored):
+
+    - the same body again within DEBOUNCE_WINDOW_SECONDS is coalesced (not enqueued)
+    - a changed body is enqueued and becomes the latest submission; on standard queues
+      messages are delayed by the window, and consumers skip a message whose submission
+      was superseded meanwhile, so only the latest version of a burst is processed
+
+The latest submission per content_id is a marker item on the pipeline state table
+('debounce#<content_id>'), its id travels in the message body. FIFO queues additionally
+get a MessageDeduplicationId derived from the hash, which also absorbs exact duplicates
+racing past the marker.
+Every check fails open: without the state table, submissions are enqueued as before.
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+
+from botocore.exceptions import ClientError
+
+from penguindb.utils.pipeline_state import get_state_table
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DEBOUNCE_ENABLED = os.environ.get('DEBOUNCE_ENABLED', 'true').lower() == 'true'
+DEBOUNCE_WINDOW_SECONDS = int(os.environ.get('DEBOUNCE_WINDOW_SECONDS', '5'))
+# Markers must outlive the queued messages they arbitrate between
+DEBOUNCE_MARKER_TTL_SECONDS = int(os.environ.get('DEBOUNCE_MARKER_TTL_SECONDS', '86400'))
+
+# Message body field carrying the submission id to the consumers
+DEBOUNCE_FIELD = 'debounce_submission'
+
+# Sheet columns and request metadata that change on every submission of an unchanged row
+VOLATILE_FIELDS = frozenset({
+    'timestamp', 'status', 'error_details', 'last_updated', 'attempt_count', 'priority', DEBOUNCE_FIELD,
+})
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def body_hash(body):
+    """Returns a short hash of the normalized body, ignoring VOLATILE_FIELDS and whitespace."""
+    normalized = {key: _normalize(value) for key, value in body.items()
+                  if key not in VOLATILE_FIELDS and value not in (None, '')}
+    canonical = json.dumps(normalized, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+
+
+def _marker_key(content_id):
+    return f"debounce#{content_id}"
+
+
+def register_submission(content_id, version_hash):
+    """
+    Records a submission as the latest one of its content_id.
+
+    One conditional write: it fails only if the same version was submitted within the
+    window, in which case the submission is coalesced.
+
+    Returns:
+        Submission id to send along with the message ('' if debouncing is disabled or
+        unavailable), or None if the submission was coalesced
+    """
+    if not DEBOUNCE_ENABLED:
+        return ''
+    now = int(time.time())
+    submission_id = uuid.uuid4().hex
+    try:
+        get_state_table().put_item(
+            Item={
+                'state_key': _marker_key(content_id),
+                'latest_hash': version_hash,
+                'latest_submission': submission_id,
+                'submitted_at': now,
+                'expires_at': now + DEBOUNCE_MARKER_TTL_SECONDS,
+            },
+            ConditionExpression='attribute_not_exists(state_key) OR latest_hash <> :hash OR submitted_at < :window_start',
+            ExpressionAttributeValues={':hash': version_hash, ':window_start': now - DEBOUNCE_WINDOW_SECONDS},
+        )
+        return submission_id
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            logger.info(f"Coalesced repeated submission of {content_id} within {DEBOUNCE_WINDOW_SECONDS}s")
+            return None
+        logger.warning(f"Debounce store unavailable for {content_id}, enqueueing: {str(e)}")
+        return ''
+    except Exception as e:
+        logger.warning(f"Debounce store unavailable for {content_id}, enqueueing: {str(e)}")
+        return ''
+
+
+def is_superseded(content_id, body):
+    """
+    Checks whether a queued submission was replaced by a newer one of the same row.
+
+    Args:
+        content_id: Content ID of the message
+        body: Parsed message body (messages without a submission id are never superseded)
+
+    Returns:
+        True if a changed version was submitted after this one
+    """
+    submission_id = body.get(DEBOUNCE_FIELD)
+    if not DEBOUNCE_ENABLED or not submission_id:
+        return False
+    try:
+        marker = get_state_table().get_item(Key={'state_key': _marker_key(content_id)},
+                                            ConsistentRead=True).get('Item')
+    except Exception as e:
+        logger.warning(f"Debounce store unavailable for {content_id}, processing: {str(e)}")
+        return False
+    return bool(marker) and marker.get('latest_submission') != submission_id
@@ -0,0 +1,133 @@
+"""
+Idempotency store for SQS consumers.
+Absorbs duplicate deliveries (SQS is at-least-once) and Lambda retries before any
+expensive work, using DynamoDB conditional writes on the pipeline state table.
+
+Each record key is '<scope>#<content_id>#<body fingerprint>' and moves through
+IN_PROGRESS -> COMPLETED. Records expire through the table's 'expires_at' TTL.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+
+from botocore.exceptions import ClientError
+
+from penguindb.utils.pipeline_state import get_state_table
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400'))
+# An IN_PROGRESS claim older than this is treated as abandoned (crashed or timed-out invocation)
+IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', '900'))
+
+STATUS_IN_PROGRESS = 'IN_PROGRESS'
+STATUS_COMPLETED = 'COMPLETED'
+
+
+def fingerprint_body(body):
+    """Returns a stable SHA-256 fingerprint of a message body (key order independent)."""
+    canonical = json.dumps(body, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def build_idempotency_key(scope, content_id, fingerprint):
+    """Builds the state table key for one unit of work."""
+    return f"idem#{scope}#{content_id}#{fingerprint}"
+
+
+def claim(scope, content_id, body):
+    """
+    Tries to claim a unit of work with a single conditional write.
+
+    The write succeeds if no record exists or the existing IN_PROGRESS lease expired.
+    Otherwise the existing record is returned from the failed condition check itself,
+    so a duplicate costs one request and no extra read.
+
+    Args:
+        scope: Name of the consumer (e.g. 'sqs_worker')
+        content_id: Content ID of the message
+        body: Parsed message body, before any local mutation
+
+    Returns:
+        Dictionary with 'key', 'status' ('CLAIMED', 'IN_PROGRESS' or 'COMPLETED') and
+        'outcome' (stored outcome for COMPLETED records). If the store is unavailable,
+        the status is 'CLAIMED' with key None and processing continues without idempotency.
+    """
+    key = build_idempotency_key(scope, content_id, fingerprint_body(body))
+    now = int(time.time())
+
+    try:
+        get_state_table().put_item(
+            Item={
+                'state_key': key,
+                'status': STATUS_IN_PROGRESS,
+                'content_id': content_id,
+                'lease_expires_at': now + IDEMPOTENCY_LEASE_SECONDS,
+                'expires_at': now + IDEMPOTENCY_TTL_SECONDS,
+            },
+            ConditionExpression='attribute_not_exists(state_key) OR (#s = :in_progress AND lease_expires_at < :now)',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={':in_progress': STATUS_IN_PROGRESS, ':now': now},
+            ReturnValuesOnConditionCheckFailure='ALL_OLD',
+        )
+        return {'key': key, 'status': 'CLAIMED', 'outcome': None}
+
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            logger.error(f"Idempotency store unavailable for {content_id}, continuing without it: {str(e)}")
+            return {'key': None, 'status': 'CLAIMED', 'outcome': None}
+
+        existing = e.response.get('Item') or {}
+        status = existing.get('status', {}).get('S', STATUS_IN_PROGRESS)
+        outcome = existing.get('outcome', {}).get('S')
+        logger.info(f"Duplicate delivery for {content_id} ({scope}): existing record is {status}")
+        return {'key': key, 'status': status, 'outcome': json.loads(outcome) if outcome else None}
+
+    except Exception as e:
+        logger.error(f"Idempotency store unavailable for {content_id}, continuing without it: {str(e)}")
+        return {'key': None, 'status': 'CLAIMED', 'outcome': None}
+
+
+def complete(claim_result, outcome=None):
+    """
+    Marks a claimed unit of work as COMPLETED and stores its outcome.
+
+    Args:
+        claim_result: Dictionary returned by claim()
+        outcome: JSON-serializable outcome returned to later duplicates
+    """
+    if not claim_result.get('key'):
+        return
+    try:
+        get_state_table().update_item(
+            Key={'state_key': claim_result['key']},
+            UpdateExpression='SET #s = :completed, outcome = :outcome, expires_at = :expires REMOVE lease_expires_at',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={
+                ':completed': STATUS_COMPLETED,
+                ':outcome': json.dumps(outcome, default=str),
+                ':expires': int(time.time()) + IDEMPOTENCY_TTL_SECONDS,
+            },
+        )
+    except Exception as e:
+        # The work itself succeeded, a later duplicate will just redo it
+        logger.warning(f"Failed to mark {claim_result['key']} as completed: {str(e)}")
+
+
+def release(claim_result):
+    """Deletes an IN_PROGRESS claim after a failure so a retry can claim it immediately."""
+    if not claim_result.get('key'):
+        return
+    try:
+        get_state_table().delete_item(
+            Key={'state_key': claim_result['key']},
+            ConditionExpression='#s = :in_progress',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={':in_progress': STATUS_IN_PROGRESS},
+        )
+    except Exception as e:
+        # The lease expiry still frees the claim eventually
+        logger.warning(f"Failed to release idempotency claim {claim_result['key']}: {str(e)}")
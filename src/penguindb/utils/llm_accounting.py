@@ -0,0 +1,236 @@
+"""
+Per-item accounting of LLM calls: tokens, latency per attempt, retries and model.
+
+generate_content_with_llm (and its async and packed variants) record every attempt
+in an LlmCallAccounting and return its compact summary as llm_result['llm_usage'],
+which the workers store on the item:
+
+    llm_usage = {
+        'model': 'us.anthropic...',   # model that produced the stored answer
+        'leg': 'primary',             # hedge leg that won (see llm_client)
+        'attempts': 2,                # calls made, including failed ones
+        'winning_attempt': 2,
+        'input_tokens': 812,          # summed over all attempts that reached the model
+        'output_tokens': 164,
+        'latency_ms': 3120,           # winning attempt
+        'attempt_ms': [240000, 3120], # every attempt, backoff sleeps excluded
+        'timeouts': 1,
+        'packed': 8,                  # only for packed prompts: items sharing the call
+        'json_repairs': ['truncated'],# only if a malformed answer was repaired (see llm_json)
+        'follow_up': True,            # only if a follow-up prompt supplied missing fields
+    }
+
+Tokens of a packed call are split evenly across its items. Only the winning leg of a
+hedged call reports tokens, the cancelled leg's usage is not visible to us.
+
+Report percentiles (and retry, hedge, JSON repair and follow-up rates) by content_type and day:
+    python -m penguindb.utils.llm_accounting [--days 14] [--by content_type|day|model]
+"""
+import os
+import sys
+import time
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Item attribute holding the summary
+LLM_USAGE_FIELD = 'llm_usage'
+
+OUTCOME_OK = 'ok'
+OUTCOME_ERROR = 'error'
+OUTCOME_TIMEOUT = 'timeout'
+OUTCOME_INCOMPLETE = 'incomplete'
+
+
+class LlmCallAccounting:
+    """Collects the attempts of one item's LLM generation."""
+
+    def __init__(self, model, packed=None):
+        self.model = model
+        self.packed = packed
+        self.attempts = []
+        self.winner = None
+
+    def record(self, started, outcome, leg=None, follow_up=False, json_repairs=None):
+        """
+        Records one attempt.
+
+        Args:
+            started: time.monotonic() at the start of the attempt
+            outcome: OUTCOME_* value
+            leg: Leg returned by call_claude_hedged (carries 'usage' if the model answered)
+            follow_up: Whether this was a follow-up prompt for missing fields
+            json_repairs: Repairs applied outside llm_client (defaults to those in the usage)
+        """
+        usage = (leg or {}).get('usage') or {}
+        attempt = {
+            'latency_ms': int((time.monotonic() - started) * 1000),
+            'outcome': outcome,
+            'input_tokens': usage.get('input_tokens', 0),
+            'output_tokens': usage.get('output_tokens', 0),
+            'model': usage.get('model_id') or (leg or {}).get('model_id') or self.model,
+            'leg': (leg or {}).get('leg'),
+            'follow_up': follow_up,
+            'json_repairs': list(json_repairs if json_repairs is not None else usage.get('json_repairs') or []),
+        }
+        self.attempts.append(attempt)
+        if outcome == OUTCOME_OK:
+            self.winner = len(self.attempts)
+        return attempt
+
+    def summary(self):
+        """Returns the compact summary stored on the item (integers only, DynamoDB-safe)."""
+        won = self.attempts[self.winner - 1] if self.winner else {}
+        share = self.packed or 1
+        summary = {
+            'model': won.get('model') or self.model,
+            'leg': won.get('leg') or 'primary',
+            'attempts': len(self.attempts),
+            'winning_attempt': self.winner or 0,
+            'input_tokens': sum(a['input_tokens'] for a in self.attempts) // share,
+            'output_tokens': sum(a['output_tokens'] for a in self.attempts) // share,
+            'latency_ms': won.get('latency_ms', 0),
+            'attempt_ms': [a['latency_ms'] for a in self.attempts],
+            'timeouts': sum(1 for a in self.attempts if a['outcome'] == OUTCOME_TIMEOUT),
+        }
+        if self.packed:
+            summary['packed'] = self.packed
+        repairs = sorted({repair for a in self.attempts for repair in a['json_repairs']})
+        if repairs:
+            summary['json_repairs'] = repairs
+        if won.get('follow_up'):
+            summary['follow_up'] = True
+        return summary
+
+    @property
+    def retry_count(self):
+        """Failed attempts before the winning one (all attempts if none won); follow-ups are not retries."""
+        attempts = self.attempts[:self.winner] if self.winner else self.attempts + [{'follow_up': False}]
+        return max(0, sum(1 for a in attempts if not a['follow_up']) - 1)
+
+
+def prepend_attempts(summary, earlier):
+    """
+    Returns an item's summary with the attempts of an earlier accounting in front, e.g. a
+    packed call that did not produce the item before it fell back to a single-item call.
+    """
+    prior = earlier.summary()
+    merged = dict(summary)
+    merged['attempts'] = prior['attempts'] + summary['attempts']
+    if summary.get('winning_attempt'):
+        merged['winning_attempt'] = prior['attempts'] + summary['winning_attempt']
+    for field in ('input_tokens', 'output_tokens', 'timeouts'):
+        merged[field] = prior[field] + summary.get(field, 0)
+    merged['attempt_ms'] = prior['attempt_ms'] + summary.get('attempt_ms', [])
+    repairs = sorted(set(prior.get('json_repairs', [])) | set(summary.get('json_repairs', [])))
+    if repairs:
+        merged['json_repairs'] = repairs
+    return merged
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0
+
+
+def _item_day(item):
+    stamp = item.get('llm_processed_at') or item.get('processed_at') or ''
+    return str(stamp)[:10] or 'unknown'
+
+
+def aggregate_usage(items, group_by=('content_type', 'day'), since=None):
+    """
+    Aggregates stored llm_usage summaries.
+
+    Args:
+        items: Iterable of items with llm_usage, content_type and llm_processed_at/processed_at
+        group_by: Dimensions among 'content_type', 'day' and 'model'
+        since: ISO date; older items are skipped
+
+    Returns:
+        Dictionary group tuple -> stats (items, latency and token percentiles, retry and timeout rates)
+    """
+    groups = {}
+    for item in items:
+        usage = item.get(LLM_USAGE_FIELD)
+        if not usage:
+            continue
+        day = _item_day(item)
+        if since and day < since:
+            continue
+        dimensions = {'content_type': item.get('content_type') or 'unknown', 'day': day,
+                      'model': usage.get('model') or 'unknown'}
+        groups.setdefault(tuple(dimensions[d] for d in group_by), []).append(usage)
+
+    report = {}
+    for key, usages in sorted(groups.items()):
+        latency = [int(u.get('latency_ms', 0)) for u in usages]
+        total_latency = [sum(int(ms) for ms in u.get('attempt_ms') or [u.get('latency_ms', 0)]) for u in usages]
+        input_tokens = [int(u.get('input_tokens', 0)) for u in usages]
+        output_tokens = [int(u.get('output_tokens', 0)) for u in usages]
+        report[key] = {
+            'items': len(usages),
+            'latency_p50_ms': _percentile(latency, 0.5),
+            'latency_p95_ms': _percentile(latency, 0.95),
+            'latency_p99_ms': _percentile(latency, 0.99),
+            'total_latency_p95_ms': _percentile(total_latency, 0.95),
+            'input_tokens_p50': _percentile(input_tokens, 0.5),
+            'input_tokens_p95': _percentile(input_tokens, 0.95),
+            'output_tokens_p50': _percentile(output_tokens, 0.5),
+            'output_tokens_p95': _percentile(output_tokens, 0.95),
+            'input_tokens_total': sum(input_tokens),
+            'output_tokens_total': sum(output_tokens),
+            'retried_share': round(sum(1 for u in usages
+                                       if int(u.get('winning_attempt', 1)) - bool(u.get('follow_up')) > 1) / len(usages), 3),
+            'timeouts': sum(int(u.get('timeouts', 0)) for u in usages),
+            'hedge_share': round(sum(1 for u in usages if u.get('leg') == 'hedge') / len(usages), 3),
+            'json_repaired_share': round(sum(1 for u in usages if u.get('json_repairs')) / len(usages), 3),
+            'follow_up_share': round(sum(1 for u in usages if u.get('follow_up')) / len(usages), 3),
+        }
+    return report
+
+
+def print_report(report, group_by, out=sys.stdout):
+    """Prints the aggregate as a fixed-width table."""
+    if not report:
+        print("No items with llm_usage found", file=out)
+        return
+    key_width = max(len(' / '.join(key)) for key in report)
+    print(f"{' / '.join(group_by):<{key_width}}  {'items':>6}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  "
+          f"{'in p50':>7}  {'in p95':>7}  {'out p50':>7}  {'out p95':>7}  {'retried':>7}  {'hedged':>6}  "
+          f"{'repaired':>8}  {'follow-up':>9}", file=out)
+    for key, stats in report.items():
+        print(f"{' / '.join(key):<{key_width}}  {stats['items']:>6}  {stats['latency_p50_ms']:>8}  "
+              f"{stats['latency_p95_ms']:>8}  {stats['latency_p99_ms']:>8}  {stats['input_tokens_p50']:>7}  "
+              f"{stats['input_tokens_p95']:>7}  {stats['output_tokens_p50']:>7}  {stats['output_tokens_p95']:>7}  "
+              f"{stats['retried_share']:>7.1%}  {stats['hedge_share']:>6.1%}  "
+              f"{stats['json_repaired_share']:>8.1%}  {stats['follow_up_share']:>9.1%}", file=out)
+    total_in = sum(s['input_tokens_total'] for s in report.values())
+    total_out = sum(s['output_tokens_total'] for s in report.values())
+    print(f"\n{sum(s['items'] for s in report.values())} items, {total_in} input and {total_out} output tokens",
+          file=out)
+
+
+if __name__ == '__main__':
+    import json
+    import argparse
+    import boto3
+    from penguindb.utils.parallel_scan import parallel_scan
+
+    parser = argparse.ArgumentParser(description='LLM token, latency and retry report from content_data')
+    parser.add_argument('--table', default=os.environ.get('DYNAMODB_TABLE_NAME', 'content_data'))
+    parser.add_argument('--days', type=int, default=14, help='Only items processed in the last N days (0: all)')
+    parser.add_argument('--by', nargs='+', choices=['content_type', 'day', 'model'], default=['content_type', 'day'])
+    parser.add_argument('--json', action='store_true', help='Print the aggregate as JSON')
+    args = parser.parse_args()
+
+    since = (datetime.now() - timedelta(days=args.days)).date().isoformat() if args.days else None
+    table = boto3.resource('dynamodb').Table(args.table)
+    items = parallel_scan(table, projection=['content_type', 'llm_processed_at', 'processed_at', LLM_USAGE_FIELD])
+    report = aggregate_usage(items, tuple(args.by), since)
+    if args.json:
+        print(json.dumps({' / '.join(key): stats for key, stats in report.items()}, indent=2, default=int))
+    else:
+        print_report(report, args.by)
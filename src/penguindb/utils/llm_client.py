@@ -1,19 +1,92 @@
+import os
 import json
+import time
+import threading
+from collections import deque
 
 import logging
 import asyncio
 import aioboto3
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+
+from penguindb.utils.concurrency_limiter import get_bedrock_limiter, is_throttling_error, LimiterTimeout
+from penguindb.utils.llm_json import parse_llm_json
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Hedged requests: if the primary call has not answered by the learned p95 latency,
+# a duplicate goes to a secondary region (and optionally model); the first answer wins
+BEDROCK_HEDGING = os.environ.get('BEDROCK_HEDGING', 'false').lower() == 'true'
+BEDROCK_PRIMARY_REGION = os.environ.get('BEDROCK_PRIMARY_REGION', 'us-east-1')
+BEDROCK_HEDGE_REGION = os.environ.get('BEDROCK_HEDGE_REGION', 'us-west-2')
+BEDROCK_HEDGE_MODEL_ID = os.environ.get('BEDROCK_HEDGE_MODEL_ID')  # Defaults to the primary model
+BEDROCK_HEDGE_PERCENTILE = float(os.environ.get('BEDROCK_HEDGE_PERCENTILE', '0.95'))
+# Delay used until enough latencies have been observed, and the floor for the learned delay
+BEDROCK_HEDGE_DEFAULT_DELAY = float(os.environ.get('BEDROCK_HEDGE_DEFAULT_DELAY', '20'))
+BEDROCK_HEDGE_MIN_DELAY = float(os.environ.get('BEDROCK_HEDGE_MIN_DELAY', '2'))
+# Maximum share of calls that may send a hedge, so hedging cannot double load under throttling
+BEDROCK_HEDGE_BUDGET = float(os.environ.get('BEDROCK_HEDGE_BUDGET', '0.1'))
+
+# Key under which call_claude_async returns Bedrock's token usage alongside the response;
+# call_claude_hedged_async moves it onto the winning leg
+USAGE_KEY = '_usage'
+
+# One session per container; clients created from it share its credentials cache
+_async_session = None
+
+
+def get_async_session() -> aioboto3.Session:
+    """Returns the shared aioboto3 session."""
+    global _async_session
+    if _async_session is None:
+        _async_session = aioboto3.Session()
+    return _async_session
+
+
+class LatencyTracker:
+    """Rolling window of call latencies per (region, model), used to pick the hedge delay."""
+
+    def __init__(self, window=200, min_samples=20):
+        self.window = window
+        self.min_samples = min_samples
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def observe(self, key, seconds):
+        with self.lock:
+            self.samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key, fraction, default):
+        """Returns the latency percentile for key, or default until min_samples are recorded."""
+        with self.lock:
+            samples = sorted(self.samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return default
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+latency_tracker = LatencyTracker()
+
+# Calls and hedges sent by this container, for the hedge budget
+_hedge_counts = {'calls': 0, 'hedges': 0}
+
+
+def _hedge_allowed() -> bool:
+    """Takes one unit of the hedge budget if available."""
+    if _hedge_counts['hedges'] + 1 > BEDROCK_HEDGE_BUDGET * _hedge_counts['calls'] + 1:
+        return False
+    _hedge_counts['hedges'] += 1
+    return True
+
+
 async def call_claude_async(
     prompt: str,
     model_id: str = "anthropic.claude-3-5-haiku-20241022-v1:0",
     max_tokens: int = 1500,
     region_name: str = "us-east-1",
-    extract_json: bool = False
+    extract_json: bool = False,
+    bedrock_client: Optional[Any] = None
 ) -> Dict[str, Any]:
     """
     Generic async function to call Claude LLM via Amazon Bedrock.
@@ -24,61 +97,183 @@ async def call_claude_async(
         max_tokens (int, optional): Maximum number of tokens in response
         region_name (str, optional): AWS region name
         extract_json (bool, optional): Whether to extract JSON from response
+        bedrock_client (optional): Open aioboto3 bedrock-runtime client to reuse
+            (and its connection pool) instead of creating one for this call
         
     Returns:
-        Dict[str, Any]: The LLM response or extracted JSON
+        Dict[str, Any]: The LLM response or extracted JSON, with Bedrock's token usage
+            under USAGE_KEY whenever the model answered
     """
+    async def _call() -> Dict[str, Any]:
+        try:
+            if bedrock_client is not None:
+                return await _invoke_claude(bedrock_client, prompt, model_id, max_tokens, extract_json)
+
+            # Get async session and client
+            async with get_async_session().client(
+                service_name='bedrock-runtime',
+                region_name=region_name
+            ) as bedrock_runtime:
+                return await _invoke_claude(bedrock_runtime, prompt, model_id, max_tokens, extract_json)
+
+        except Exception as e:
+            logger.error(f"Error calling LLM: {str(e)}")
+            return {"error": str(e)}
+
+    # Cluster-wide AIMD limit on in-flight Bedrock calls (BEDROCK_CONCURRENCY_LIMITER)
+    limiter = get_bedrock_limiter()
+    if limiter is None:
+        return await _call()
     try:
-        # Get async session and client
-        session = aioboto3.Session()
-        async with session.client(
-            service_name='bedrock-runtime',
-            region_name=region_name
-        ) as bedrock_runtime:
-            # Call Claude via Bedrock
-            response = await bedrock_runtime.invoke_model(
-                modelId=model_id,
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": max_tokens,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ]
-                })
-            )
-            
-            # Parse the response
-            response_body = json.loads(await response['body'].read())
-            content = response_body.get('content', [{}])[0].get('text', '')
-            
-            # Return raw response if not extracting JSON
-            if not extract_json:
-                return {"raw_response": content}
-                
-            # Extract JSON from the response if requested
-            try:
-                # Look for JSON within the response
-                json_start = content.find('{')
-                json_end = content.rfind('}') + 1
-                
-                if json_start >= 0 and json_end > json_start:
-                    json_content = content[json_start:json_end]
-                    result = json.loads(json_content)
-                    return result
-                else:
-                    logger.warning("No JSON found in LLM response")
-                    return {"error": "No JSON found in response", "raw_response": content}
-            except json.JSONDecodeError as json_error:
-                logger.warning(f"JSON decode error: {str(json_error)}")
-                return {"error": "Invalid JSON in response", "raw_response": content}
-                
-    except Exception as e:
-        logger.error(f"Error calling LLM: {str(e)}")
+        return await limiter.run_async(_call, lambda result: is_throttling_error(result.get("error")))
+    except LimiterTimeout as e:
+        logger.warning(str(e))
         return {"error": str(e)}
 
+async def _invoke_claude(
+    bedrock_runtime: Any,
+    prompt: str,
+    model_id: str,
+    max_tokens: int,
+    extract_json: bool
+) -> Dict[str, Any]:
+    """Invokes Claude on an open bedrock-runtime client and parses the response."""
+    # Call Claude via Bedrock
+    response = await bedrock_runtime.invoke_model(
+        modelId=model_id,
+        body=json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        })
+    )
+    
+    # Parse the response
+    response_body = json.loads(await response['body'].read())
+    content = response_body.get('content', [{}])[0].get('text', '')
+    usage = response_body.get('usage') or {}
+    usage = {
+        'input_tokens': int(usage.get('input_tokens', 0)),
+        'output_tokens': int(usage.get('output_tokens', 0)),
+        'model_id': model_id,
+    }
+    
+    # Return raw response if not extracting JSON
+    if not extract_json:
+        return {"raw_response": content, USAGE_KEY: usage}
+        
+    # Extract JSON from the response if requested (slightly malformed JSON is repaired)
+    try:
+        result, repairs = parse_llm_json(content)
+    except ValueError as json_error:
+        logger.warning(f"JSON decode error: {str(json_error)}")
+        return {"error": "Invalid JSON in response", "raw_response": content, USAGE_KEY: usage}
+
+    if repairs:
+        logger.info(f"Repaired LLM JSON response: {', '.join(repairs)}")
+        usage['json_repairs'] = repairs
+    if not isinstance(result, dict):
+        return {"error": "JSON response is not an object", "raw_response": content, USAGE_KEY: usage}
+    result[USAGE_KEY] = usage
+    return result
+
+def _with_usage(result: Dict[str, Any], leg: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Moves the token usage from a response onto (a copy of) the leg that produced it."""
+    usage = result.pop(USAGE_KEY, None) if isinstance(result, dict) else None
+    return result, ({**leg, 'usage': usage} if usage else leg)
+
+async def call_claude_hedged_async(
+    prompt: str,
+    model_id: str = "anthropic.claude-3-5-haiku-20241022-v1:0",
+    max_tokens: int = 1500,
+    extract_json: bool = False,
+    bedrock_client: Optional[Any] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Calls Claude with a hedged duplicate request to cut tail latency.
+    
+    The primary call goes to BEDROCK_PRIMARY_REGION. If it has not answered within the
+    learned p95 latency (or fails fast), a duplicate is sent to BEDROCK_HEDGE_REGION /
+    BEDROCK_HEDGE_MODEL_ID. The first successful answer wins and the other call is cancelled.
+    Without BEDROCK_HEDGING this is a plain call_claude_async.
+    
+    Args:
+        prompt (str): The prompt to send to the LLM
+        model_id (str, optional): Bedrock model ID of the primary leg
+        max_tokens (int, optional): Maximum number of tokens in response
+        extract_json (bool, optional): Whether to extract JSON from response
+        bedrock_client (optional): Open bedrock-runtime client for the primary region
+        
+    Returns:
+        Tuple (response, leg): leg has 'leg' ('primary' or 'hedge'), 'region', 'model_id'
+        and, when the model answered, 'usage' (input_tokens, output_tokens, model_id)
+    """
+    primary = {'leg': 'primary', 'region': BEDROCK_PRIMARY_REGION, 'model_id': model_id}
+    hedge = {'leg': 'hedge', 'region': BEDROCK_HEDGE_REGION, 'model_id': BEDROCK_HEDGE_MODEL_ID or model_id}
+    primary_key = (primary['region'], primary['model_id'])
+
+    def _start(leg, client=None):
+        return asyncio.ensure_future(call_claude_async(
+            prompt=prompt, model_id=leg['model_id'], max_tokens=max_tokens,
+            region_name=leg['region'], extract_json=extract_json, bedrock_client=client
+        ))
+
+    started = time.monotonic()
+    primary_task = _start(primary, bedrock_client)
+    _hedge_counts['calls'] += 1
+    if not BEDROCK_HEDGING:
+        result = await primary_task
+        return _with_usage(result, primary)
+
+    delay = max(BEDROCK_HEDGE_MIN_DELAY,
+                latency_tracker.percentile(primary_key, BEDROCK_HEDGE_PERCENTILE, BEDROCK_HEDGE_DEFAULT_DELAY))
+    done, _ = await asyncio.wait({primary_task}, timeout=delay)
+    if done and "error" not in primary_task.result():
+        latency_tracker.observe(primary_key, time.monotonic() - started)
+        return _with_usage(primary_task.result(), primary)
+
+    if not _hedge_allowed():
+        result = await primary_task
+        if "error" not in result:
+            latency_tracker.observe(primary_key, time.monotonic() - started)
+        return _with_usage(result, primary)
+
+    logger.info(f"Hedging Bedrock call to {hedge['region']}/{hedge['model_id']} after "
+                f"{time.monotonic() - started:.1f}s (delay {delay:.1f}s)")
+    legs = {_start(hedge): hedge}
+    if not primary_task.done():
+        legs[primary_task] = primary
+
+    result = primary_task.result() if primary_task.done() else None
+    winner = primary
+    pending = set(legs)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        # Prefer a successful leg if both finished in the same step
+        finished = sorted(done, key=lambda task: "error" in task.result())[0]
+        result, winner = finished.result(), legs[finished]
+        if "error" not in result:
+            break
+
+    for task in pending:
+        task.cancel()
+    # Let the cancelled call close its client before returning
+    await asyncio.gather(*pending, return_exceptions=True)
+    if primary_task in pending:
+        # Censored sample: the primary took at least this long, keeps the p95 from drifting low
+        latency_tracker.observe(primary_key, time.monotonic() - started)
+    elif winner is primary and "error" not in result:
+        latency_tracker.observe(primary_key, time.monotonic() - started)
+
+    logger.info(f"Hedged Bedrock call won by {winner['leg']} leg ({winner['region']}/{winner['model_id']}) "
+                f"in {time.monotonic() - started:.1f}s")
+    return _with_usage(result, winner)
+
 # Synchronous version for compatibility
 def call_claude(
     prompt: str,
@@ -107,4 +302,32 @@ def call_claude(
             region_name=region_name,
             extract_json=extract_json
         )
-    ) 
\ No newline at end of file
+    )
+
+
+def call_claude_hedged(
+    prompt: str,
+    model_id: str,
+    max_tokens: int = 1500,
+    extract_json: bool = False
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Synchronous wrapper for call_claude_hedged_async.
+    
+    Parameters and return value are the same as call_claude_hedged_async.
+    """
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        # If there is no event loop, create one
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+    return loop.run_until_complete(
+        call_claude_hedged_async(
+            prompt=prompt,
+            model_id=model_id,
+            max_tokens=max_tokens,
+            extract_json=extract_json
+        )
+    )
@@ -0,0 +1,134 @@
+"""
+Tolerant parsing of JSON embedded in LLM responses.
+
+Well-formed answers take the same path as before (outermost braces/brackets, json.loads).
+Only when that fails the text is repaired in one pass over the characters:
+
+    code_fence          ```json ... ``` wrappers (including an unclosed fence)
+    trailing_comma      "," directly before "}" or "]"
+    control_characters  raw newlines/tabs inside strings
+    mismatched_bracket  "]" closing an object or "}" closing an array
+    truncated           answer cut off by max_tokens: the last incomplete element is
+                        dropped and the open containers are closed
+    trailing_text       prose after the JSON that contains a brace or bracket
+
+The names of the applied repairs are returned with the value, for llm_accounting.
+"""
+import re
+import json
+
+FENCE_RE = re.compile(r"```(?:json|JSON)?[ \t]*\n?(.*?)(?:```|$)", re.S)
+
+_CLOSERS = {'{': '}', '[': ']'}
+_STRING_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t'}
+
+
+def strip_code_fences(text):
+    """Returns the content of the first Markdown code fence in text, or text itself."""
+    match = FENCE_RE.search(text)
+    return match.group(1) if match else text
+
+
+def parse_llm_json(text, container='{'):
+    """
+    Extracts a JSON object (or array) from an LLM response, repairing common defects.
+
+    Args:
+        text: Raw response text
+        container: '{' for an object, '[' for an array
+
+    Returns:
+        Tuple (value, repairs): repairs is a sorted list of repair names, empty if the
+        JSON was well-formed
+
+    Raises:
+        ValueError: If no JSON of that kind can be recovered
+    """
+    text = text or ''
+    closer = _CLOSERS[container]
+    start = text.find(container)
+    end = text.rfind(closer) + 1
+    if start >= 0 and end > start:
+        try:
+            return json.loads(text[start:end]), []
+        except json.JSONDecodeError:
+            pass
+
+    repairs = set()
+    if '```' in text:
+        unfenced = strip_code_fences(text)
+        if unfenced.find(container) >= 0:
+            text = unfenced
+            repairs.add('code_fence')
+    start = text.find(container)
+    if start < 0:
+        raise ValueError(f"No JSON {'object' if container == '{' else 'array'} found in response")
+    value, applied = _repair(text[start:])
+    repairs.update(applied)
+    return value, sorted(repairs or {'trailing_text'})
+
+
+def _repair(segment):
+    """Single pass repair of a segment starting with '{' or '['. Returns (value, repair names)."""
+    out = []
+    stack = []
+    repairs = set()
+    # Points where the JSON can be cut and closed: (length of out, open containers)
+    safe_points = []
+    in_string = False
+    escape = False
+
+    for ch in segment:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch in _STRING_ESCAPES:
+                out.append(_STRING_ESCAPES[ch])
+                repairs.add('control_characters')
+                continue
+            out.append(ch)
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in _CLOSERS:
+            stack.append(ch)
+            out.append(ch)
+            safe_points.append((len(out), tuple(stack)))
+        elif ch in '}]':
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+                repairs.add('trailing_comma')
+            expected = _CLOSERS[stack.pop()]
+            if ch != expected:
+                repairs.add('mismatched_bracket')
+            out.append(expected)
+            if not stack:
+                # Anything after the outermost container is prose
+                try:
+                    return json.loads(''.join(out), strict=False), repairs
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Unrepairable JSON in response: {str(e)}")
+        elif ch == ',':
+            safe_points.append((len(out), tuple(stack)))
+            out.append(ch)
+        else:
+            out.append(ch)
+
+    # Cut off: close what is open, dropping incomplete trailing elements until it parses
+    repairs.add('truncated')
+    candidates = [] if in_string else [(len(out), tuple(stack))]
+    candidates.extend(reversed(safe_points))
+    for length, open_containers in candidates:
+        candidate = ''.join(out[:length]).rstrip().rstrip(',')
+        candidate += ''.join(_CLOSERS[c] for c in reversed(open_containers))
+        try:
+            return json.loads(candidate, strict=False), repairs
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("Unrepairable truncated JSON in response")
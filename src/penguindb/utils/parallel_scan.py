@@ -0,0 +1,184 @@
+"""
+Parallel segmented DynamoDB scan for whole-table jobs (status sweeps, backfills, reindexing).
+
+Splits the table into TotalSegments segments and scans them on a thread pool, with
+ProjectionExpression pushed down so only the needed attributes are read. Items are
+streamed through a generator backed by a bounded page queue, so memory stays flat
+however large the table is. With a checkpoint_key, per-segment progress is saved to the
+pipeline state table and an interrupted job resumes where it stopped (items of the page
+that was being consumed may be seen again).
+
+    for item in parallel_scan(table, projection=['content_id', 'content_type', 'generated_tags']):
+        ...
+"""
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from penguindb.utils.pipeline_state import load_state, save_state
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+SCAN_TOTAL_SEGMENTS = int(os.environ.get('SCAN_TOTAL_SEGMENTS', '8'))
+SCAN_MAX_WORKERS = int(os.environ.get('SCAN_MAX_WORKERS', '8'))
+# Pages buffered between the scanning threads and the consumer
+SCAN_MAX_BUFFERED_PAGES = int(os.environ.get('SCAN_MAX_BUFFERED_PAGES', '16'))
+# Consumed pages between two checkpoint writes
+SCAN_CHECKPOINT_EVERY_PAGES = int(os.environ.get('SCAN_CHECKPOINT_EVERY_PAGES', '10'))
+
+SEGMENT_DONE = 'DONE'
+
+# Queue sentinels
+_SEGMENT_FINISHED = object()
+
+
+class _ScanFailed:
+    def __init__(self, error):
+        self.error = error
+
+
+def build_projection(attributes, expression_attribute_names=None):
+    """
+    Builds a ProjectionExpression with name placeholders (safe for reserved words like 'status').
+
+    Returns:
+        Tuple (projection_expression, expression_attribute_names)
+    """
+    names = dict(expression_attribute_names or {})
+    placeholders = []
+    for i, attribute in enumerate(attributes):
+        placeholder = f"#p{i}"
+        names[placeholder] = attribute
+        placeholders.append(placeholder)
+    return ', '.join(placeholders), names
+
+
+def _load_checkpoint(checkpoint_key, total_segments):
+    if not checkpoint_key:
+        return {}
+    state = load_state(checkpoint_key) or {}
+    if state.get('complete') or int(state.get('total_segments', 0)) != total_segments:
+        return {}
+    progress = dict(state.get('segments') or {})
+    logger.info(f"Resuming scan '{checkpoint_key}': {sum(1 for v in progress.values() if v == SEGMENT_DONE)}"
+                f"/{total_segments} segments already done")
+    return progress
+
+
+def _save_checkpoint(checkpoint_key, total_segments, progress, scanned):
+    if not checkpoint_key:
+        return
+    complete = len(progress) == total_segments and all(v == SEGMENT_DONE for v in progress.values())
+    save_state(checkpoint_key, {
+        'total_segments': total_segments,
+        'segments': progress,
+        'complete': complete,
+        'items_consumed': scanned,
+    })
+
+
+def parallel_scan(table, projection=None, filter_expression=None, expression_attribute_names=None,
+                  expression_attribute_values=None, total_segments=None, max_workers=None,
+                  page_size=None, checkpoint_key=None, max_buffered_pages=None):
+    """
+    Scans a whole table in parallel segments and yields its items.
+
+    Args:
+        table: boto3 Table resource (its thread-safe low-level client does the scanning)
+        projection: Attribute names to read (None reads whole items)
+        filter_expression: FilterExpression string (evaluated after the read, saves transfer only)
+        expression_attribute_names: Names used by filter_expression
+        expression_attribute_values: Plain Python values used by filter_expression
+        total_segments: Number of scan segments (defaults to SCAN_TOTAL_SEGMENTS)
+        max_workers: Scanning threads (defaults to min(total_segments, SCAN_MAX_WORKERS))
+        page_size: Limit per Scan request (DynamoDB's 1 MB page limit applies anyway)
+        checkpoint_key: Pipeline state key for resumable progress (None disables checkpoints)
+        max_buffered_pages: Pages buffered ahead of the consumer
+
+    Yields:
+        Items as Python dicts (numbers as Decimal, like the Table resource returns them)
+    """
+    total_segments = total_segments or SCAN_TOTAL_SEGMENTS
+    max_workers = max_workers or min(total_segments, SCAN_MAX_WORKERS)
+    # The resource's client is thread-safe and (de)serializes attribute values itself
+    client = table.meta.client
+
+    base_params = {'TableName': table.name}
+    names = dict(expression_attribute_names or {})
+    if projection:
+        base_params['ProjectionExpression'], names = build_projection(projection, names)
+    if filter_expression:
+        base_params['FilterExpression'] = filter_expression
+    if names:
+        base_params['ExpressionAttributeNames'] = names
+    if expression_attribute_values:
+        base_params['ExpressionAttributeValues'] = dict(expression_attribute_values)
+    if page_size:
+        base_params['Limit'] = page_size
+
+    progress = _load_checkpoint(checkpoint_key, total_segments)
+    pages = queue.Queue(maxsize=max_buffered_pages or SCAN_MAX_BUFFERED_PAGES)
+    stop = threading.Event()
+
+    def _put(entry):
+        # Blocks while the consumer is behind, but gives up when the scan is abandoned
+        while not stop.is_set():
+            try:
+                pages.put(entry, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _scan_segment(segment):
+        try:
+            params = {**base_params, 'Segment': segment, 'TotalSegments': total_segments}
+            start_key = progress.get(str(segment))
+            if start_key == SEGMENT_DONE:
+                return
+            if start_key:
+                params['ExclusiveStartKey'] = start_key
+            while not stop.is_set():
+                response = client.scan(**params)
+                last_key = response.get('LastEvaluatedKey')
+                _put((segment, response.get('Items', []), last_key))
+                if not last_key:
+                    break
+                params['ExclusiveStartKey'] = last_key
+        except Exception as e:
+            _put(_ScanFailed(e))
+        finally:
+            _put(_SEGMENT_FINISHED)
+
+    pending_segments = [s for s in range(total_segments) if progress.get(str(s)) != SEGMENT_DONE]
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending_segments) or 1)))
+    for segment in pending_segments:
+        executor.submit(_scan_segment, segment)
+
+    remaining = len(pending_segments)
+    consumed_pages = 0
+    consumed_items = 0
+    try:
+        while remaining:
+            entry = pages.get()
+            if entry is _SEGMENT_FINISHED:
+                remaining -= 1
+                continue
+            if isinstance(entry, _ScanFailed):
+                raise entry.error
+            segment, items, last_key = entry
+            yield from items
+            consumed_items += len(items)
+            # The page is fully consumed, so the segment may resume after it
+            progress[str(segment)] = last_key or SEGMENT_DONE
+            consumed_pages += 1
+            if consumed_pages % SCAN_CHECKPOINT_EVERY_PAGES == 0:
+                _save_checkpoint(checkpoint_key, total_segments, progress, consumed_items)
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
+        _save_checkpoint(checkpoint_key, total_segments, progress, consumed_items)
+        logger.info(f"Parallel scan of {table.name}: {consumed_items} items from {consumed_pages} pages "
+                    f"({total_segments} segments)")
@@ -0,0 +1,70 @@
+"""
+Small key/value state store backed by a DynamoDB table.
+Used by the Lambdas to persist cursors and other bookkeeping between invocations.
+
+Expected table layout: partition key 'state_key' (String), TTL attribute 'expires_at'.
+"""
+import os
+import logging
+from datetime import datetime
+
+import boto3
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+PIPELINE_STATE_TABLE = os.environ.get('PIPELINE_STATE_TABLE', 'pipeline_state')
+
+_state_table = None
+
+
+def get_state_table():
+    """Returns the (lazily created) DynamoDB Table resource for pipeline state."""
+    global _state_table
+    if _state_table is None:
+        _state_table = boto3.resource('dynamodb').Table(PIPELINE_STATE_TABLE)
+    return _state_table
+
+
+def load_state(state_key, default=None):
+    """
+    Loads a state item by key.
+
+    Args:
+        state_key: Key of the state item
+        default: Value returned when the item does not exist or cannot be read
+
+    Returns:
+        Dictionary with the stored attributes (without state_key), or default
+    """
+    try:
+        response = get_state_table().get_item(Key={'state_key': state_key}, ConsistentRead=True)
+    except Exception as e:
+        logger.error(f"Error loading pipeline state '{state_key}': {str(e)}")
+        return default
+
+    item = response.get('Item')
+    if not item:
+        return default
+    item.pop('state_key', None)
+    return item
+
+
+def save_state(state_key, attributes):
+    """
+    Overwrites a state item.
+
+    Args:
+        state_key: Key of the state item
+        attributes: Dictionary of attributes to store
+
+    Returns:
+        True if the write succeeded, False otherwise
+    """
+    item = {**attributes, 'state_key': state_key, 'updated_at': datetime.now().isoformat()}
+    try:
+        get_state_table().put_item(Item=item)
+        return True
+    except Exception as e:
+        logger.error(f"Error saving pipeline state '{state_key}': {str(e)}")
+        return False
@@ -0,0 +1,273 @@
+"""
+Priority lanes for content submissions.
+
+Interactive sheet edits and bulk re-submissions (processNewItems, retryErrorItems,
+backfills) go to separate SQS queues, so a large backfill no longer sits in front of
+fresh edits:
+
+    api_handler     choose_lane() -> SQS_HIGH_PRIORITY_QUEUE_URL / SQS_LOW_PRIORITY_QUEUE_URL
+    sqs_worker      lane_drain_handler: drain_lanes() pulls from both queues under one
+                    shared worker budget, interactive work always first
+
+LaneScheduler is the policy: a free worker takes interactive work whenever there is
+any, and bulk work only while the bulk lane holds less than LOW_LANE_MAX_SHARE of the
+budget, so a slot is always free for the next edit.
+
+Compare the policies offline:
+    python -m penguindb.utils.priority_lanes [--backfill 2000] [--workers 4]
+"""
+import os
+import time
+import heapq
+import random
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+PRIORITY_HIGH = 'high'
+PRIORITY_LOW = 'low'
+LANES = (PRIORITY_HIGH, PRIORITY_LOW)
+
+# Without lane queues everything stays on the single SQS_QUEUE_URL
+SQS_QUEUE_URL = os.environ.get('SQS_QUEUE_URL')
+SQS_HIGH_PRIORITY_QUEUE_URL = os.environ.get('SQS_HIGH_PRIORITY_QUEUE_URL') or SQS_QUEUE_URL
+SQS_LOW_PRIORITY_QUEUE_URL = os.environ.get('SQS_LOW_PRIORITY_QUEUE_URL') or SQS_QUEUE_URL
+
+LANE_WORKERS = int(os.environ.get('LANE_WORKERS', '4'))
+# Bulk work never holds the whole budget, one slot stays free for the next edit
+LOW_LANE_MAX_SHARE = float(os.environ.get('LOW_LANE_MAX_SHARE', '0.75'))
+# Minimum pause between polls of an empty lane
+LANE_EMPTY_POLL_SECONDS = float(os.environ.get('LANE_EMPTY_POLL_SECONDS', '1'))
+
+# Request 'priority' values (or X-Priority header values) routed to the bulk lane
+LOW_PRIORITY_VALUES = frozenset({'low', 'bulk', 'backfill', 'batch'})
+
+
+def choose_lane(body, headers=None):
+    """
+    Picks the lane of a submission from its 'priority' field or the caller's X-Priority header.
+
+    Returns:
+        PRIORITY_LOW for bulk submissions, PRIORITY_HIGH otherwise (interactive is the default)
+    """
+    value = body.get('priority')
+    if not value and headers:
+        value = next((v for k, v in headers.items() if str(k).lower() == 'x-priority'), None)
+    return PRIORITY_LOW if str(value or '').strip().lower() in LOW_PRIORITY_VALUES else PRIORITY_HIGH
+
+
+def queue_url_for_lane(lane):
+    """Returns the queue URL of a lane."""
+    return SQS_LOW_PRIORITY_QUEUE_URL if lane == PRIORITY_LOW else SQS_HIGH_PRIORITY_QUEUE_URL
+
+
+class LaneScheduler:
+    """Strict-priority lane policy with a cap on the bulk lane's share of the worker budget."""
+
+    def __init__(self, budget=None, low_max_share=None):
+        self.budget = max(1, budget or LANE_WORKERS)
+        share = LOW_LANE_MAX_SHARE if low_max_share is None else low_max_share
+        # Bulk work may use at most this many workers (at least one, or it would never finish)
+        self.low_cap = max(1, min(self.budget, int(self.budget * share)))
+
+    def pick(self, pending, in_flight):
+        """
+        Chooses the lane the next free worker takes work from.
+
+        Args:
+            pending: Dictionary lane -> number of items waiting
+            in_flight: Dictionary lane -> number of items being processed
+
+        Returns:
+            The lane, or None if no work may start now
+        """
+        if sum(in_flight.values()) >= self.budget:
+            return None
+        if pending.get(PRIORITY_HIGH):
+            return PRIORITY_HIGH
+        if pending.get(PRIORITY_LOW) and in_flight.get(PRIORITY_LOW, 0) < self.low_cap:
+            return PRIORITY_LOW
+        return None
+
+
+def drain_lanes(sqs_client, process_fn, context=None, scheduler=None, queue_urls=None, safety_ms=15000):
+    """
+    Pulls messages from the lane queues and processes them under one shared worker budget.
+
+    A message is deleted after process_fn returns; if it raises, the message becomes
+    visible again after the queue's visibility timeout and is retried. Messages received
+    but not started before the deadline are released immediately.
+
+    Args:
+        sqs_client: boto3 SQS client
+        process_fn: Callable taking one SQS message (dict with MessageId, ReceiptHandle, Body)
+        context: Lambda context (stops starting work safety_ms before the deadline)
+        scheduler: LaneScheduler (defaults to LANE_WORKERS / LOW_LANE_MAX_SHARE)
+        queue_urls: Dictionary lane -> queue URL (defaults to the configured lane queues)
+        safety_ms: Time kept in reserve before the Lambda deadline
+
+    Returns:
+        Dictionary lane -> {'completed', 'failed'} counts
+    """
+    scheduler = scheduler or LaneScheduler()
+    queue_urls = queue_urls or {lane: queue_url_for_lane(lane) for lane in LANES}
+    # Both lanes on one queue: a single lane holds everything
+    if queue_urls[PRIORITY_LOW] == queue_urls[PRIORITY_HIGH]:
+        queue_urls = {PRIORITY_HIGH: queue_urls[PRIORITY_HIGH]}
+    buffers = {lane: deque() for lane in queue_urls}
+    empty_until = {lane: 0.0 for lane in queue_urls}
+    in_flight = {}
+    report = {lane: {'completed': 0, 'failed': 0} for lane in queue_urls}
+
+    def _deadline_near():
+        if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+            return False
+        return context.get_remaining_time_in_millis() < safety_ms
+
+    def _refill(lane):
+        if buffers[lane] or time.monotonic() < empty_until[lane]:
+            return
+        response = sqs_client.receive_message(QueueUrl=queue_urls[lane], MaxNumberOfMessages=10, WaitTimeSeconds=0)
+        messages = response.get('Messages', [])
+        buffers[lane].extend(messages)
+        if not messages:
+            empty_until[lane] = time.monotonic() + LANE_EMPTY_POLL_SECONDS
+
+    with ThreadPoolExecutor(max_workers=scheduler.budget) as executor:
+        while True:
+            stopping = _deadline_near()
+            while not stopping:
+                # Interactive work is polled first; bulk work only when no edit is waiting
+                _refill(PRIORITY_HIGH)
+                if PRIORITY_LOW in buffers and not buffers[PRIORITY_HIGH]:
+                    _refill(PRIORITY_LOW)
+                running = {lane: sum(1 for l, _ in in_flight.values() if l == lane) for lane in buffers}
+                lane = scheduler.pick({lane: len(buffer) for lane, buffer in buffers.items()}, running)
+                if lane is None:
+                    break
+                message = buffers[lane].popleft()
+                in_flight[executor.submit(process_fn, message)] = (lane, message)
+
+            if not in_flight:
+                if stopping or not any(buffers.values()) and all(time.monotonic() < until for until in empty_until.values()):
+                    break
+                time.sleep(0.05)
+                continue
+
+            done, _ = wait(list(in_flight), timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                lane, message = in_flight.pop(future)
+                try:
+                    future.result()
+                    sqs_client.delete_message(QueueUrl=queue_urls[lane], ReceiptHandle=message['ReceiptHandle'])
+                    report[lane]['completed'] += 1
+                except Exception as e:
+                    logger.error(f"Lane {lane}: message {message.get('MessageId')} failed, left for retry: {str(e)}")
+                    report[lane]['failed'] += 1
+
+    # Hand unstarted messages back right away instead of waiting out the visibility timeout
+    for lane, buffer in buffers.items():
+        for message in buffer:
+            try:
+                sqs_client.change_message_visibility(QueueUrl=queue_urls[lane], ReceiptHandle=message['ReceiptHandle'],
+                                                     VisibilityTimeout=0)
+            except Exception as e:
+                logger.warning(f"Could not release message {message.get('MessageId')}: {str(e)}")
+    logger.info(f"Lane drain finished: {report}")
+    return report
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def simulate(backfill_items=2000, interactive_items=60, interactive_interval=5.0, service_time=2.0,
+             workers=4, low_max_share=0.75, seed=7):
+    """
+    Discrete-event simulation of interactive latency while a backfill is queued.
+
+    The backfill arrives at t=0, interactive edits arrive every interactive_interval
+    seconds (with jitter); service times vary uniformly around service_time. Runs the
+    same workload once through a single shared FIFO queue and once through the lanes.
+
+    Returns:
+        Dictionary policy -> interactive latency stats (seconds) and backfill completion time
+    """
+    results = {}
+    for policy in ('single_queue', 'lanes'):
+        rng = random.Random(seed)
+        arrivals = [(0.0, PRIORITY_LOW, i) for i in range(backfill_items)]
+        arrivals += [(i * interactive_interval + rng.uniform(0, interactive_interval / 2), PRIORITY_HIGH, i)
+                     for i in range(interactive_items)]
+        arrivals.sort()
+        services = {key: service_time * rng.uniform(0.5, 1.5) for key in ((a[1], a[2]) for a in arrivals)}
+
+        scheduler = LaneScheduler(workers, low_max_share)
+        fifo = deque()
+        lanes = {PRIORITY_HIGH: deque(), PRIORITY_LOW: deque()}
+        running = []  # heap of (finish time, lane, index)
+        in_flight = {PRIORITY_HIGH: 0, PRIORITY_LOW: 0}
+        latencies = []
+        backfill_done = 0.0
+        now = 0.0
+        next_arrival = 0
+
+        while next_arrival < len(arrivals) or running or fifo or any(lanes.values()):
+            while next_arrival < len(arrivals) and arrivals[next_arrival][0] <= now:
+                arrival = arrivals[next_arrival]
+                (fifo if policy == 'single_queue' else lanes[arrival[1]]).append(arrival)
+                next_arrival += 1
+
+            while True:
+                if policy == 'single_queue':
+                    if not fifo or sum(in_flight.values()) >= workers:
+                        break
+                    arrival = fifo.popleft()
+                else:
+                    lane = scheduler.pick({k: len(v) for k, v in lanes.items()}, in_flight)
+                    if lane is None:
+                        break
+                    arrival = lanes[lane].popleft()
+                in_flight[arrival[1]] += 1
+                heapq.heappush(running, (now + services[(arrival[1], arrival[2])], arrival[1], arrival[0]))
+
+            next_times = [running[0][0]] if running else []
+            if next_arrival < len(arrivals):
+                next_times.append(arrivals[next_arrival][0])
+            if not next_times:
+                break
+            now = min(next_times)
+            while running and running[0][0] <= now:
+                finished, lane, arrived = heapq.heappop(running)
+                in_flight[lane] -= 1
+                if lane == PRIORITY_HIGH:
+                    latencies.append(finished - arrived)
+                else:
+                    backfill_done = max(backfill_done, finished)
+
+        results[policy] = {
+            'interactive_p50': round(_percentile(latencies, 0.5), 1),
+            'interactive_p95': round(_percentile(latencies, 0.95), 1),
+            'interactive_max': round(max(latencies), 1) if latencies else 0.0,
+            'backfill_done_at': round(backfill_done, 1),
+        }
+    return results
+
+
+if __name__ == '__main__':
+    import json
+    import argparse
+    parser = argparse.ArgumentParser(description='Simulate interactive latency during a backfill')
+    parser.add_argument('--backfill', type=int, default=2000)
+    parser.add_argument('--interactive', type=int, default=60)
+    parser.add_argument('--interval', type=float, default=5.0)
+    parser.add_argument('--service-time', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, default=LANE_WORKERS)
+    parser.add_argument('--low-max-share', type=float, default=LOW_LANE_MAX_SHARE)
+    args = parser.parse_args()
+    print(json.dumps(simulate(args.backfill, args.interactive, args.interval, args.service_time,
+                              args.workers, args.low_max_share), indent=2))
@@ -0,0 +1,380 @@
+"""
+Opt-in per-invocation profiling for the Lambda handlers.
+
+    @profile_handler
+    def lambda_handler(event, context):
+        ...
+
+With LAMBDA_PROFILING=true every invocation runs under cProfile and a wall-clock timer
+per dependency (AWS API calls by service, sheet HTTP, JSON encoding/decoding, sleeps).
+Invocations slower than PROFILE_SLOW_MS are captured: the pstats dump plus a JSON
+summary go to PROFILE_BUCKET/PROFILE_PREFIX when a bucket is set, otherwise to
+PROFILE_DIR on local disk. Disabled, the decorator returns the handler unchanged.
+
+cProfile only sees the handler's thread, so the other threads (executor workers of the
+scans, sheet dispatch and LLM calls) are sampled every PROFILE_SAMPLE_MS instead; the
+summary lists their hottest functions under 'thread_samples'. The dependency timers see
+every thread and coroutine, so their sum can exceed the wall time when calls overlap.
+
+Aggregate captured profiles into a hot function report:
+    python -m penguindb.utils.profiling <dir | s3://bucket/prefix> [--top N] [--sort tottime]
+"""
+import os
+import io
+import sys
+import json
+import time
+import glob
+import pstats
+import cProfile
+import logging
+import tempfile
+import functools
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+LAMBDA_PROFILING = os.environ.get('LAMBDA_PROFILING', 'false').lower() == 'true'
+PROFILE_SLOW_MS = int(os.environ.get('PROFILE_SLOW_MS', '30000'))
+PROFILE_BUCKET = os.environ.get('PROFILE_BUCKET')
+PROFILE_PREFIX = os.environ.get('PROFILE_PREFIX', 'profiles/')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'lambda-profiles'))
+# Hot functions kept in the JSON summary of a captured invocation
+PROFILE_SUMMARY_TOP = int(os.environ.get('PROFILE_SUMMARY_TOP', '25'))
+# Stack sampling interval for the threads cProfile does not see
+PROFILE_SAMPLE_MS = int(os.environ.get('PROFILE_SAMPLE_MS', '10'))
+
+
+class DependencyTimer:
+    """Accumulates wall-clock time per dependency by wrapping its entry points while active."""
+
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+        self._restore = []
+
+    def add(self, category, elapsed):
+        with self.lock:
+            self.totals[category] = self.totals.get(category, 0.0) + elapsed
+            self.counts[category] = self.counts.get(category, 0) + 1
+
+    def _wrap(self, owner, name, categorize):
+        original = getattr(owner, name, None)
+        if original is None:
+            return
+        timer = self
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                timer.add(categorize(args), time.perf_counter() - start)
+
+        setattr(owner, name, timed)
+        self._restore.append((owner, name, original))
+
+    def _wrap_async(self, owner, name, categorize):
+        original = getattr(owner, name, None)
+        if original is None:
+            return
+        timer = self
+
+        @functools.wraps(original)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                timer.add(categorize(args), time.perf_counter() - start)
+
+        setattr(owner, name, timed)
+        self._restore.append((owner, name, original))
+
+    def install(self):
+        import json as json_module
+
+        def aws_category(args):
+            try:
+                return f"aws:{args[0].meta.service_model.service_name}"
+            except Exception:
+                return 'aws:unknown'
+
+        try:
+            from botocore.client import BaseClient
+            self._wrap(BaseClient, '_make_api_call', aws_category)
+        except ImportError:
+            pass
+        try:
+            from aiobotocore.client import AioBaseClient
+            self._wrap_async(AioBaseClient, '_make_api_call', aws_category)
+        except ImportError:
+            pass
+        try:
+            # Only the Apps Script web app is called through requests
+            from requests.sessions import Session
+            self._wrap(Session, 'request', lambda args: 'sheet_http')
+        except ImportError:
+            pass
+        self._wrap(json_module, 'dumps', lambda args: 'json')
+        self._wrap(json_module, 'loads', lambda args: 'json')
+        self._wrap(time, 'sleep', lambda args: 'sleep')
+
+    def uninstall(self):
+        while self._restore:
+            owner, name, original = self._restore.pop()
+            setattr(owner, name, original)
+
+    def breakdown(self):
+        with self.lock:
+            return {category: {'ms': round(total * 1000, 1), 'calls': self.counts[category]}
+                    for category, total in sorted(self.totals.items(), key=lambda kv: -kv[1])}
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+def _is_idle_worker(frame):
+    """True for an executor worker blocked on its work queue (the wait is a C call, so _worker is the leaf)."""
+    return frame.f_code.co_name == '_worker' and frame.f_code.co_filename.endswith(os.path.join('futures', 'thread.py'))
+
+
+class ThreadSampler:
+    """
+    Samples the stacks of every thread except the profiled one at a fixed interval.
+
+    Counts per function how many samples it was on the stack ('samples') and on top of
+    it ('own_samples'); sample counts times the interval approximate cumulative and own time.
+    """
+
+    def __init__(self, interval_ms, ignore_thread_id):
+        self.interval = interval_ms / 1000
+        self.interval_ms = interval_ms
+        self.ignore = {ignore_thread_id}
+        self.ticks = 0
+        self.samples = {}
+        self.own_samples = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def _run(self):
+        self.ignore.add(threading.get_ident())
+        # Event.wait rather than time.sleep, which the dependency timer wraps
+        while not self._stop.wait(self.interval):
+            self.ticks += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in self.ignore or _is_idle_worker(frame):
+                    continue
+                leaf = _frame_label(frame.f_code)
+                self.own_samples[leaf] = self.own_samples.get(leaf, 0) + 1
+                seen = set()
+                while frame is not None:
+                    label = _frame_label(frame.f_code)
+                    if label not in seen:
+                        seen.add(label)
+                        self.samples[label] = self.samples.get(label, 0) + 1
+                    frame = frame.f_back
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self, limit):
+        """Returns the sampling interval, tick count and the hottest sampled functions."""
+        rows = sorted(self.samples.items(), key=lambda kv: -kv[1])[:limit]
+        return {
+            'interval_ms': self.interval_ms,
+            'ticks': self.ticks,
+            'top_functions': [{
+                'function': label,
+                'samples': samples,
+                'own_samples': self.own_samples.get(label, 0),
+                'approx_cumtime_ms': samples * self.interval_ms,
+            } for label, samples in rows],
+        }
+
+
+def top_functions(stats, limit, sort_key='cumulative'):
+    """Returns the hottest functions of a pstats.Stats as a list of dicts."""
+    index = {'cumulative': 3, 'tottime': 2}[sort_key]
+    rows = sorted(stats.stats.items(), key=lambda kv: -kv[1][index])[:limit]
+    return [{
+        'function': f"{os.path.basename(filename)}:{line}({name})",
+        'calls': primitive_calls,
+        'tottime_ms': round(tottime * 1000, 1),
+        'cumtime_ms': round(cumtime * 1000, 1),
+    } for (filename, line, name), (primitive_calls, _, tottime, cumtime, _) in rows]
+
+
+def save_capture(handler_name, request_id, profiler, summary):
+    """Stores the pstats dump and the JSON summary of a slow invocation. Returns the base path."""
+    # Microseconds keep retries of the same request (and local runs) apart
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    base = f"{handler_name}/{stamp}-{request_id}"
+    with tempfile.NamedTemporaryFile(suffix='.prof', delete=False) as tmp:
+        profile_path = tmp.name
+    try:
+        profiler.dump_stats(profile_path)
+        with open(profile_path, 'rb') as f:
+            profile_bytes = f.read()
+    finally:
+        os.unlink(profile_path)
+    summary_bytes = json.dumps(summary, indent=2).encode('utf-8')
+
+    if PROFILE_BUCKET:
+        from penguindb.utils.s3_json import get_s3_client
+        s3 = get_s3_client()
+        s3.put_object(Bucket=PROFILE_BUCKET, Key=f"{PROFILE_PREFIX}{base}.prof", Body=profile_bytes)
+        s3.put_object(Bucket=PROFILE_BUCKET, Key=f"{PROFILE_PREFIX}{base}.json", Body=summary_bytes,
+                      ContentType='application/json')
+        return f"s3://{PROFILE_BUCKET}/{PROFILE_PREFIX}{base}"
+
+    path = os.path.join(PROFILE_DIR, base)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.prof", 'wb') as f:
+        f.write(profile_bytes)
+    with open(f"{path}.json", 'wb') as f:
+        f.write(summary_bytes)
+    return path
+
+
+def profile_handler(handler):
+    """
+    Decorator profiling a Lambda handler when LAMBDA_PROFILING is enabled.
+
+    Args:
+        handler: Lambda handler function (event, context)
+
+    Returns:
+        The handler itself when profiling is disabled, otherwise a profiling wrapper
+    """
+    if not LAMBDA_PROFILING:
+        return handler
+    handler_name = f"{handler.__module__.rsplit('.', 1)[-1]}.{handler.__name__}"
+
+    @functools.wraps(handler)
+    def profiled(event, context):
+        timer = DependencyTimer()
+        profiler = cProfile.Profile()
+        sampler = ThreadSampler(PROFILE_SAMPLE_MS, threading.get_ident())
+        timer.install()
+        sampler.start()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            return handler(event, context)
+        finally:
+            profiler.disable()
+            wall_ms = (time.perf_counter() - start) * 1000
+            sampler.stop()
+            timer.uninstall()
+            breakdown = timer.breakdown()
+            logger.info(f"Profiled {handler_name}: {wall_ms:.0f} ms, dependencies: {json.dumps(breakdown)}")
+            if wall_ms >= PROFILE_SLOW_MS:
+                try:
+                    request_id = getattr(context, 'aws_request_id', None) or 'local'
+                    stats = pstats.Stats(profiler, stream=io.StringIO())
+                    location = save_capture(handler_name, request_id, profiler, {
+                        'handler': handler_name,
+                        'request_id': request_id,
+                        'captured_at': datetime.now(timezone.utc).isoformat(),
+                        'wall_ms': round(wall_ms, 1),
+                        'dependencies': breakdown,
+                        'top_functions': top_functions(stats, PROFILE_SUMMARY_TOP),
+                        'thread_samples': sampler.summary(PROFILE_SUMMARY_TOP),
+                    })
+                    logger.warning(f"Slow invocation of {handler_name} ({wall_ms:.0f} ms), profile saved to {location}")
+                except Exception as e:
+                    logger.error(f"Could not save profile of {handler_name}: {str(e)}")
+
+    return profiled
+
+
+def _fetch_captures(source):
+    """Returns the local directory holding the captures of source (downloading from S3 if needed)."""
+    if not source.startswith('s3://'):
+        return source
+    from penguindb.utils.s3_json import get_s3_client
+    bucket, _, prefix = source[len('s3://'):].partition('/')
+    target = tempfile.mkdtemp(prefix='profiles-')
+    s3 = get_s3_client()
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if obj['Key'].endswith(('.prof', '.json')):
+                path = os.path.join(target, obj['Key'][len(prefix):].lstrip('/'))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                s3.download_file(bucket, obj['Key'], path)
+    return target
+
+
+def aggregate_report(source, top=30, sort_key='cumulative', out=sys.stdout):
+    """
+    Prints the hottest functions across all captured profiles and the summed dependency times.
+
+    Args:
+        source: Local capture directory or s3://bucket/prefix
+        top: Number of functions listed
+        sort_key: 'cumulative' or 'tottime'
+        out: Output stream
+    """
+    directory = _fetch_captures(source)
+    profiles = sorted(glob.glob(os.path.join(directory, '**', '*.prof'), recursive=True))
+    if not profiles:
+        print(f"No profiles found in {source}", file=out)
+        return
+
+    dependencies = {}
+    thread_samples = {}
+    wall_ms = []
+    for summary_path in glob.glob(os.path.join(directory, '**', '*.json'), recursive=True):
+        with open(summary_path) as f:
+            summary = json.load(f)
+        wall_ms.append(summary.get('wall_ms', 0))
+        for category, values in (summary.get('dependencies') or {}).items():
+            totals = dependencies.setdefault(category, {'ms': 0.0, 'calls': 0})
+            totals['ms'] += values.get('ms', 0)
+            totals['calls'] += values.get('calls', 0)
+        for row in (summary.get('thread_samples') or {}).get('top_functions', []):
+            totals = thread_samples.setdefault(row['function'], {'ms': 0, 'own_samples': 0, 'samples': 0})
+            totals['ms'] += row.get('approx_cumtime_ms', 0)
+            totals['samples'] += row.get('samples', 0)
+            totals['own_samples'] += row.get('own_samples', 0)
+
+    print(f"{len(profiles)} captured invocations, {sum(wall_ms) / 1000:.1f} s wall time in total\n", file=out)
+    print("Dependency wall time (summed across invocations):", file=out)
+    for category, totals in sorted(dependencies.items(), key=lambda kv: -kv[1]['ms']):
+        print(f"  {category:<28} {totals['ms'] / 1000:>9.2f} s  {totals['calls']:>7} calls", file=out)
+
+    stats = pstats.Stats(profiles[0], stream=io.StringIO())
+    for path in profiles[1:]:
+        stats.add(path)
+    print(f"\nTop {top} functions by {sort_key}:", file=out)
+    for row in top_functions(stats, top, sort_key):
+        print(f"  {row['cumtime_ms'] / 1000:>9.2f} s cum  {row['tottime_ms'] / 1000:>9.2f} s own  "
+              f"{row['calls']:>8}  {row['function']}", file=out)
+
+    if thread_samples:
+        # Only the functions in each capture's summary are summed, so the tail is incomplete
+        print(f"\nTop {top} functions on other threads (sampled, approximate):", file=out)
+        for function, totals in sorted(thread_samples.items(), key=lambda kv: -kv[1]['ms'])[:top]:
+            print(f"  {totals['ms'] / 1000:>9.2f} s cum  {totals['samples']:>7} samples  "
+                  f"{totals['own_samples']:>7} own  {function}", file=out)
+
+
+if __name__ == '__main__':
+    # python -m penguindb.utils.profiling <dir | s3://bucket/prefix> [--top N] [--sort cumulative|tottime]
+    import argparse
+    parser = argparse.ArgumentParser(description='Aggregate captured Lambda profiles')
+    parser.add_argument('source', nargs='?', default=PROFILE_DIR)
+    parser.add_argument('--top', type=int, default=30)
+    parser.add_argument('--sort', choices=['cumulative', 'tottime'], default='cumulative')
+    args = parser.parse_args()
+    aggregate_report(args.source, args.top, args.sort)
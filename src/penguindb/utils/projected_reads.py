@@ -0,0 +1,127 @@
+"""
+Typed, projection-aware reads of content items.
+
+A caller declares the attributes it needs as a dataclass ("view"); only those are
+requested through ProjectionExpression and only those are deserialized, so status
+decisions don't pay for long descriptions and tag lists in read capacity and parsing.
+
+    @dataclass(frozen=True)
+    class StatusView:
+        content_id: str
+        content_type: Optional[str] = None
+        generated_title: Optional[str] = None
+
+    views = batch_get_views(table, StatusView, [{'content_id': 'a', 'content_type': 'post'}])
+    views = query_views(table, StatusView, ['a', 'b'])   # only the partition key is known
+"""
+import os
+import time
+import logging
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+
+from penguindb.utils.parallel_scan import build_projection
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_ATTEMPTS = int(os.environ.get('BATCH_GET_MAX_ATTEMPTS', '5'))
+PROJECTED_READ_WORKERS = int(os.environ.get('PROJECTED_READ_WORKERS', '8'))
+
+
+def view_attributes(view_cls):
+    """Attribute names declared by a view dataclass."""
+    return [field.name for field in dataclasses.fields(view_cls)]
+
+
+def to_view(view_cls, raw_item):
+    """Builds a view from an item (undeclared attributes are ignored)."""
+    return view_cls(**{name: raw_item[name] for name in view_attributes(view_cls) if name in raw_item})
+
+
+def view_as_item(view):
+    """Returns the attributes of a view that are present, as a plain item dict."""
+    return {key: value for key, value in dataclasses.asdict(view).items() if value is not None}
+
+
+def batch_get_views(table, view_cls, keys, consistent_read=False):
+    """
+    Reads projected views for full primary keys with BatchGetItem.
+
+    Args:
+        table: boto3 Table resource
+        view_cls: View dataclass (its fields are the projected attributes)
+        keys: Iterable of key dicts, e.g. {'content_id': ..., 'content_type': ...}
+        consistent_read: Use strongly consistent reads
+
+    Returns:
+        Dictionary tuple(key values, in key dict order) -> view, for items that exist
+    """
+    keys = list({tuple(key.items()): key for key in keys}.values())  # BatchGetItem rejects duplicates
+    if not keys:
+        return {}
+    # The resource's client (de)serializes attribute values itself
+    client = table.meta.client
+    key_names = list(keys[0])
+    attributes = view_attributes(view_cls)
+    # Key attributes must be projected to match results back to keys
+    projection, names = build_projection(attributes + [name for name in key_names if name not in attributes])
+
+    views = {}
+    for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        request = {table.name: {
+            'Keys': keys[start:start + BATCH_GET_MAX_KEYS],
+            'ProjectionExpression': projection,
+            'ExpressionAttributeNames': names,
+            'ConsistentRead': consistent_read,
+        }}
+        for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+            response = client.batch_get_item(RequestItems=request)
+            for raw_item in response.get('Responses', {}).get(table.name, []):
+                key = tuple(raw_item[name] for name in key_names)
+                views[key] = to_view(view_cls, raw_item)
+            request = response.get('UnprocessedKeys') or {}
+            if not request:
+                break
+            # Throttled keys come back unprocessed, retry them with backoff
+            time.sleep(min(2.0, 0.05 * 2 ** attempt))
+        else:
+            unprocessed = len(request.get(table.name, {}).get('Keys', []))
+            raise RuntimeError(f"BatchGetItem left {unprocessed} keys unprocessed after {BATCH_GET_MAX_ATTEMPTS} attempts")
+    return views
+
+
+def query_views(table, view_cls, partition_values, partition_key='content_id', max_workers=None):
+    """
+    Reads projected views when only the partition key is known (one Query per value, in parallel).
+
+    Returns:
+        Dictionary partition value -> first view found for it (values without items are absent)
+    """
+    values = list(dict.fromkeys(partition_values))
+    if not values:
+        return {}
+    client = table.meta.client
+    projection, names = build_projection(view_attributes(view_cls), {'#pk': partition_key})
+
+    def _query(value):
+        response = client.query(
+            TableName=table.name,
+            KeyConditionExpression='#pk = :pk',
+            ProjectionExpression=projection,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues={':pk': value},
+            Limit=1
+        )
+        items = response.get('Items', [])
+        return value, to_view(view_cls, items[0]) if items else None
+
+    workers = max(1, min(len(values), max_workers or PROJECTED_READ_WORKERS))
+    if workers == 1:
+        results = map(_query, values)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_query, values))
+    return {value: view for value, view in results if view is not None}
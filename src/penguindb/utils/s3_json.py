@@ -0,0 +1,113 @@
+"""
+JSON objects in S3 with optimistic concurrency.
+Used by the stream-maintained read models (feed projection, search index), where
+several shard consumers may update the same object: writes are conditional on the
+ETag that was read and retried on conflict.
+"""
+import gzip
+import json
+import time
+import logging
+from decimal import Decimal
+
+import boto3
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+_s3_client = None
+
+
+def get_s3_client():
+    """Returns the (lazily created) S3 client."""
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client('s3')
+    return _s3_client
+
+
+def json_default(value):
+    """JSON encoder for DynamoDB types (Decimal numbers, string sets)."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+def read_json(bucket, key):
+    """
+    Reads a JSON object (gzip-compressed if stored with ContentEncoding gzip).
+
+    Returns:
+        Tuple (parsed JSON, ETag), or (None, None) if the object does not exist
+    """
+    try:
+        response = get_s3_client().get_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None, None
+        raise
+    payload = response['Body'].read()
+    if response.get('ContentEncoding') == 'gzip':
+        payload = gzip.decompress(payload)
+    return json.loads(payload), response['ETag']
+
+
+def write_json(bucket, key, data, etag=None, conditional=True, compress=False, cache_control='max-age=60'):
+    """
+    Writes data as compact JSON.
+
+    Args:
+        bucket: S3 bucket
+        key: Object key
+        data: JSON-serializable data
+        etag: ETag the object had when it was read (None if it did not exist)
+        conditional: Only write if the object is unchanged since it was read (or still absent)
+        compress: Store gzip-compressed with ContentEncoding gzip
+        cache_control: Cache-Control header for readers
+    """
+    body = json.dumps(data, separators=(',', ':'), default=json_default).encode('utf-8')
+    params = {
+        'Bucket': bucket,
+        'Key': key,
+        'Body': gzip.compress(body) if compress else body,
+        'ContentType': 'application/json',
+        'CacheControl': cache_control,
+    }
+    if compress:
+        params['ContentEncoding'] = 'gzip'
+    if conditional:
+        if etag:
+            params['IfMatch'] = etag
+        else:
+            params['IfNoneMatch'] = '*'
+    get_s3_client().put_object(**params)
+
+
+def is_write_conflict(error):
+    """Returns True if a conditional S3 write failed because the object changed."""
+    return isinstance(error, ClientError) and error.response.get('Error', {}).get('Code') in (
+        'PreconditionFailed', 'ConditionalRequestConflict', '412')
+
+
+def read_modify_write(bucket, key, modify, attempts=5, compress=False):
+    """
+    Applies modify(current or None) -> new data to a JSON object, retrying when another
+    writer changed it in between.
+
+    Returns:
+        The written data
+    """
+    for attempt in range(attempts):
+        current, etag = read_json(bucket, key)
+        updated = modify(current)
+        try:
+            write_json(bucket, key, updated, etag, compress=compress)
+            return updated
+        except ClientError as e:
+            if not is_write_conflict(e) or attempt == attempts - 1:
+                raise
+            logger.info(f"Concurrent update of s3://{bucket}/{key}, retrying ({attempt + 1})")
+            time.sleep(0.1 * (attempt + 1))
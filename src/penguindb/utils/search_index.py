@@ -0,0 +1,222 @@
+"""
+Compact inverted index over the generated title, description and tags of content items.
+
+The index is stored as two gzip-compressed JSON artifacts:
+    base  - sorted term dictionary, delta-encoded postings and a prefix table
+            (2/3-character prefix -> range of the term dictionary) for type-ahead
+    delta - documents changed since the base was built, with their own term weights
+            (None marks a removed document)
+Readers load the base and apply the delta. New or edited posts only touch the small
+delta; it is folded into a new base once it grows past a threshold.
+"""
+import re
+import bisect
+import unicodedata
+
+# Term weight per field: a title match ranks above a tag match, above a description match
+FIELD_WEIGHTS = {
+    'generated_title': 3,
+    'generated_tags': 2,
+    'generated_description': 1,
+}
+INDEXED_FIELDS = frozenset(FIELD_WEIGHTS)
+
+PREFIX_LENGTHS = (2, 3)
+INDEX_VERSION = 1
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'how', 'i', 'in',
+    'into', 'is', 'it', 'its', 'my', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was',
+    'what', 'when', 'why', 'with', 'you', 'your',
+})
+
+# Keeps technical tokens such as 'c++', 'c#', 'node.js' and 'gpt-4o' readable as one term
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9]+)*")
+
+
+def tokenize(text):
+    """Lowercases, strips accents and splits text into index terms (stopwords removed)."""
+    if not text:
+        return []
+    folded = unicodedata.normalize('NFKD', str(text).lower())
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    return [token for token in _TOKEN_PATTERN.findall(folded)
+            if token not in STOPWORDS and (len(token) > 1 or token.isdigit())]
+
+
+def get_doc_key(item):
+    """Identity of an item in the index (the table's hash and range key)."""
+    return f"{item.get('content_id')}#{item.get('content_type', '')}"
+
+
+def extract_terms(item):
+    """
+    Returns the weighted terms of an item, or None if it has no generated content yet.
+
+    Returns:
+        Dictionary term -> weight (highest weight of any field containing the term)
+    """
+    terms = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        value = item.get(field)
+        if not value:
+            continue
+        if isinstance(value, (list, set, tuple)):
+            value = ' '.join(str(v) for v in value)
+        for term in tokenize(value):
+            if terms.get(term, 0) < weight:
+                terms[term] = weight
+    return terms or None
+
+
+def build_delta_entry(item):
+    """Delta entry for an item: its identity and weighted terms, or None if it is not indexable."""
+    terms = extract_terms(item)
+    if terms is None:
+        return None
+    return {'content_id': item.get('content_id'), 'content_type': item.get('content_type', ''), 'terms': terms}
+
+
+class SearchIndex:
+    """In-memory inverted index that (de)serializes to the compact base artifact."""
+
+    def __init__(self):
+        self.docs = []             # doc number -> [content_id, content_type], None once removed
+        self.doc_numbers = {}      # doc key -> doc number
+        self.postings = {}         # term -> {doc number: weight}
+        self._sorted_terms = None
+
+    def __len__(self):
+        return len(self.doc_numbers)
+
+    def remove(self, doc_key):
+        """Removes a document. Its postings are dropped lazily on the next serialization."""
+        number = self.doc_numbers.pop(doc_key, None)
+        if number is not None:
+            self.docs[number] = None
+
+    def add(self, content_id, content_type, terms):
+        """Adds (or replaces) a document with its weighted terms."""
+        doc_key = f"{content_id}#{content_type}"
+        self.remove(doc_key)
+        number = len(self.docs)
+        self.docs.append([content_id, content_type])
+        self.doc_numbers[doc_key] = number
+        for term, weight in terms.items():
+            if term not in self.postings:
+                self._sorted_terms = None
+            self.postings.setdefault(term, {})[number] = weight
+
+    def apply_delta(self, delta):
+        """Applies a delta artifact (upserts and removals) to the index."""
+        for doc_key, entry in ((delta or {}).get('docs') or {}).items():
+            if entry is None:
+                self.remove(doc_key)
+            else:
+                self.add(entry['content_id'], entry['content_type'], entry['terms'])
+        return self
+
+    def _terms(self):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        return self._sorted_terms
+
+    def _matching_terms(self, token, prefix):
+        if not prefix:
+            return [token] if token in self.postings else []
+        terms = self._terms()
+        start = bisect.bisect_left(terms, token)
+        matches = []
+        for term in terms[start:]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query, limit=20):
+        """
+        Finds documents containing every query term; the last term also matches as a prefix.
+
+        Returns:
+            List of (content_id, content_type, score), best first
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores = None
+        for position, token in enumerate(tokens):
+            token_scores = {}
+            for term in self._matching_terms(token, prefix=position == len(tokens) - 1):
+                for number, weight in self.postings[term].items():
+                    if self.docs[number] is not None and token_scores.get(number, 0) < weight:
+                        token_scores[number] = weight
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {number: score + token_scores[number] for number, score in scores.items()
+                          if number in token_scores}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))[:limit]
+        return [(self.docs[number][0], self.docs[number][1], score) for number, score in ranked]
+
+    def to_artifact(self, built_at=None):
+        """
+        Serializes live documents to the base artifact, renumbering them densely.
+
+        Postings are stored per term as a flat list [doc gap, weight, doc gap, weight, ...]
+        so the numbers stay small and compress well.
+        """
+        renumber = {}
+        docs = []
+        for number, doc in enumerate(self.docs):
+            if doc is not None:
+                renumber[number] = len(docs)
+                docs.append(doc)
+
+        terms = []
+        postings = []
+        for term in sorted(self.postings):
+            live = sorted((renumber[number], weight) for number, weight in self.postings[term].items()
+                          if number in renumber)
+            if not live:
+                continue
+            encoded = []
+            previous = 0
+            for number, weight in live:
+                encoded.extend((number - previous, weight))
+                previous = number
+            terms.append(term)
+            postings.append(encoded)
+
+        prefixes = {}
+        for index, term in enumerate(terms):
+            for length in PREFIX_LENGTHS:
+                if len(term) >= length:
+                    entry = prefixes.setdefault(term[:length], [index, index + 1])
+                    entry[1] = index + 1
+
+        return {
+            'version': INDEX_VERSION,
+            'built_at': built_at,
+            'docs': docs,
+            'terms': terms,
+            'postings': postings,
+            'prefixes': prefixes,
+        }
+
+    @classmethod
+    def from_artifact(cls, artifact, delta=None):
+        """Loads a base artifact and applies an optional delta artifact."""
+        index = cls()
+        if artifact:
+            index.docs = [list(doc) for doc in artifact['docs']]
+            index.doc_numbers = {f"{doc[0]}#{doc[1]}": number for number, doc in enumerate(index.docs)}
+            for term, encoded in zip(artifact['terms'], artifact['postings']):
+                entries = {}
+                number = 0
+                for position in range(0, len(encoded), 2):
+                    number += encoded[position]
+                    entries[number] = encoded[position + 1]
+                index.postings[term] = entries
+        return index.apply_delta(delta)
@@ -0,0 +1,273 @@
+"""
+Rate-limited parallel dispatcher for Google Sheet (Apps Script web app) updates.
+Runs updates concurrently under a token bucket that adapts to Apps Script throttling.
+Many status updates can also be sent as batches (Apps Script action 'updateStatuses').
+"""
+import os
+import time
+import logging
+import threading
+
+import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Defaults stay well below the Apps Script web app limits (~30 simultaneous executions)
+SHEET_UPDATE_RATE = float(os.environ.get('SHEET_UPDATE_RATE', '5'))         # requests per second
+SHEET_UPDATE_BURST = int(os.environ.get('SHEET_UPDATE_BURST', '10'))         # bucket capacity
+SHEET_UPDATE_WORKERS = int(os.environ.get('SHEET_UPDATE_WORKERS', '4'))      # concurrent requests
+SHEET_UPDATE_MAX_ATTEMPTS = int(os.environ.get('SHEET_UPDATE_MAX_ATTEMPTS', '4'))
+SHEET_BATCH_SIZE = int(os.environ.get('SHEET_BATCH_SIZE', '100'))           # status updates per request
+
+
+# Apps Script throttling phrases ("Service invoked too many times in a short time", "Too many
+# simultaneous invocations", quota errors, "Rate Limit Exceeded"); a bare 'limit' also matches
+# unrelated errors such as a row limit or an invalid limit parameter
+SHEET_THROTTLE_MARKERS = ('service invoked too many times', 'too many simultaneous invocations',
+                          'quota', 'rate limit', 'too many requests')
+
+
+class SheetRateLimited(Exception):
+    """Raised by a sheet update when Apps Script answers with a 429 or a quota/rate limit message."""
+
+
+def is_quota_message(message):
+    """Returns True if an Apps Script error message indicates throttling."""
+    message = str(message or '').lower()
+    return any(marker in message for marker in SHEET_THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with AIMD rate adaptation.
+
+    The refill rate is halved (and the bucket drained) on throttling and grows back
+    additively on success, never exceeding the configured maximum.
+    """
+
+    def __init__(self, rate, capacity, min_rate=0.5, increase_step=0.25):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min(min_rate, rate)
+        self.increase_step = increase_step
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def try_acquire(self):
+        """Takes one token if available. Returns True on success."""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def time_until_token(self):
+        """Seconds until the next token becomes available."""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def penalize(self):
+        """Multiplicative decrease after a throttling response."""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.last_refill = time.monotonic()
+        logger.warning(f"Sheet update throttled, reducing rate to {self.rate:.2f} req/s")
+
+    def reward(self):
+        """Additive increase after a successful request."""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+
+def dispatch_sheet_updates(items, send_fn, context=None, rate=None, burst=None,
+                           max_workers=None, max_attempts=None, safety_ms=10000):
+    """
+    Runs send_fn for every item concurrently under a token-bucket rate limit.
+
+    send_fn(item) must return True on success and False on a permanent failure, and
+    raise SheetRateLimited when Apps Script throttles. Throttled items are re-queued
+    (up to max_attempts) and the bucket backs off. No new request is started once
+    less than safety_ms remain in the Lambda invocation; in-flight requests are awaited.
+
+    Args:
+        items: List of work items passed to send_fn
+        send_fn: Callable performing one sheet update
+        context: Lambda context (used for get_remaining_time_in_millis), optional
+        rate: Requests per second (defaults to SHEET_UPDATE_RATE)
+        burst: Token bucket capacity (defaults to SHEET_UPDATE_BURST)
+        max_workers: Maximum concurrent requests (defaults to SHEET_UPDATE_WORKERS)
+        max_attempts: Attempts per item on throttling (defaults to SHEET_UPDATE_MAX_ATTEMPTS)
+        safety_ms: Time to keep in reserve before the Lambda deadline
+
+    Returns:
+        Dictionary with 'completed', 'failed', 'deferred', 'throttled' counts and the
+        'completed_items' / 'deferred_items' lists
+    """
+    bucket = TokenBucket(rate or SHEET_UPDATE_RATE, burst or SHEET_UPDATE_BURST)
+    max_workers = max_workers or SHEET_UPDATE_WORKERS
+    max_attempts = max_attempts or SHEET_UPDATE_MAX_ATTEMPTS
+
+    pending = deque((item, 1) for item in items)
+    in_flight = {}
+    completed_items = []
+    failed = 0
+    throttled = 0
+    stopped_early = False
+
+    def _deadline_near():
+        if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+            return False
+        return context.get_remaining_time_in_millis() < safety_ms
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or in_flight:
+            if pending and not stopped_early and _deadline_near():
+                logger.warning(f"Lambda deadline approaching, deferring {len(pending)} sheet updates")
+                stopped_early = True
+
+            # Start as many requests as tokens and workers allow
+            while pending and not stopped_early and len(in_flight) < max_workers and bucket.try_acquire():
+                item, attempt = pending.popleft()
+                in_flight[executor.submit(send_fn, item)] = (item, attempt)
+
+            if not in_flight:
+                if stopped_early or not pending:
+                    break
+                time.sleep(min(1.0, bucket.time_until_token()))
+                continue
+
+            done, _ = wait(list(in_flight), timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                item, attempt = in_flight.pop(future)
+                try:
+                    if future.result():
+                        completed_items.append(item)
+                        bucket.reward()
+                    else:
+                        failed += 1
+                except SheetRateLimited:
+                    throttled += 1
+                    bucket.penalize()
+                    if attempt < max_attempts:
+                        pending.append((item, attempt + 1))
+                    else:
+                        logger.error(f"Giving up on sheet update after {attempt} throttled attempts")
+                        failed += 1
+                except Exception as e:
+                    logger.error(f"Sheet update raised an unexpected error: {str(e)}")
+                    failed += 1
+
+    deferred_items = [item for item, _ in pending]
+    logger.info(f"Sheet dispatch finished: {len(completed_items)} completed, {failed} failed, "
+                f"{len(deferred_items)} deferred, {throttled} throttled responses")
+    return {
+        'completed': len(completed_items),
+        'failed': failed,
+        'deferred': len(deferred_items),
+        'throttled': throttled,
+        'completed_items': completed_items,
+        'deferred_items': deferred_items,
+    }
+
+
+def build_processed_update(item):
+    """Builds the 'processed' status update for an item with generated content."""
+    update = {'content_id': str(item['content_id']), 'status': 'processed',
+              'generated_title': item['generated_title']}
+    if item.get('processed_at'):
+        update['processed_at'] = item['processed_at']
+    if item.get('generated_tags'):
+        update['generated_tags'] = list(item['generated_tags'])
+    return update
+
+
+def send_sheet_batch(sheet_url, updates, timeout=30):
+    """
+    Sends status updates to the Apps Script web app in one 'updateStatuses' request.
+
+    Args:
+        sheet_url: URL of the Apps Script web app
+        updates: List of dicts with content_id, status and optional processed_at,
+                 generated_title and generated_tags
+        timeout: Request timeout in seconds
+
+    Returns:
+        Dictionary with the 'updated' and 'not_found' content_ids
+
+    Raises:
+        SheetRateLimited: On HTTP 429 or an Apps Script quota/rate limit error
+        RuntimeError: On any other failed request
+    """
+    response = requests.post(sheet_url, json={'action': 'updateStatuses', 'updates': updates}, timeout=timeout)
+    if response.status_code == 429:
+        raise SheetRateLimited(f"HTTP 429 for a batch of {len(updates)} updates")
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code} from Google Sheet: {response.text[:200]}")
+    data = response.json()
+    if data.get('status') != 'success':
+        if is_quota_message(data.get('message')):
+            raise SheetRateLimited(data.get('message'))
+        raise RuntimeError(f"Google Apps Script returned error: {data.get('message')}")
+    return data.get('data') or {}
+
+
+def dispatch_sheet_batches(updates, send_batch_fn, batch_size=None, context=None, **dispatch_options):
+    """
+    Splits status updates into batches and dispatches them under the rate limit.
+
+    Args:
+        updates: List of status update dicts
+        send_batch_fn: Callable taking one list of updates, returning the send_sheet_batch result
+        batch_size: Updates per request (defaults to SHEET_BATCH_SIZE)
+        context: Lambda context, optional
+        **dispatch_options: Passed on to dispatch_sheet_updates
+
+    Returns:
+        Dictionary with 'updated', 'not_found', 'failed' and 'deferred' content_id lists and
+        the number of 'requests' made
+    """
+    batch_size = batch_size or SHEET_BATCH_SIZE
+    batches = [updates[start:start + batch_size] for start in range(0, len(updates), batch_size)]
+    results = {}
+
+    def _send(batch):
+        try:
+            results[id(batch)] = send_batch_fn(batch)
+        except SheetRateLimited:
+            raise
+        except Exception as e:
+            logger.error(f"Sheet batch of {len(batch)} updates failed: {str(e)}")
+            return False
+        return True
+
+    report = dispatch_sheet_updates(batches, _send, context=context, **dispatch_options)
+    updated, not_found, failed = [], [], []
+    for batch in batches:
+        result = results.get(id(batch))
+        if result is not None:
+            updated.extend(result.get('updated') or [])
+            not_found.extend(result.get('not_found') or [])
+        elif not any(batch is deferred for deferred in report['deferred_items']):
+            failed.extend(update['content_id'] for update in batch)
+    return {
+        'updated': updated,
+        'not_found': not_found,
+        'failed': failed,
+        'deferred': [update['content_id'] for batch in report['deferred_items'] for update in batch],
+        'requests': len(batches),
+    }
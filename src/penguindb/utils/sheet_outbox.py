@@ -0,0 +1,105 @@
+"""
+Durable outbox for Google Sheet status notifications.
+
+Workers append a notification to the SHEET_OUTBOX_QUEUE_URL SQS queue with one
+send_message instead of calling the Apps Script web app inline or on a daemon thread
+that dies with the container. sheet_outbox_drainer sends them in deduplicated batches;
+SQS keeps the retry state (receive count, redrive to a DLQ).
+
+Within a drained batch only the latest notification per row is sent. Across batches a
+standard queue delivers in best-effort order, so the reconciliation job remains the
+backstop for rows left on an intermediate status.
+
+When no queue is configured, enqueue_sheet_update returns False and callers keep using
+their direct sheet update.
+"""
+import os
+import json
+import time
+import logging
+
+import boto3
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+SHEET_OUTBOX_QUEUE_URL = os.environ.get('SHEET_OUTBOX_QUEUE_URL')
+
+_sqs_client = None
+
+
+def get_sqs_client():
+    """Returns the (lazily created) SQS client."""
+    global _sqs_client
+    if _sqs_client is None:
+        _sqs_client = boto3.client('sqs')
+    return _sqs_client
+
+
+def enqueue_sheet_update(content_id, status, processed_at=None, generated_title=None,
+                         generated_tags=None, error_details=None):
+    """
+    Appends a sheet status notification to the outbox.
+
+    Args:
+        content_id: Content ID of the sheet row
+        status: Sheet status (sent lowercase, as the Apps Script expects)
+        processed_at: Optional timestamp shown on the row
+        generated_title: Optional generated title
+        generated_tags: Optional generated tags
+        error_details: Optional error message (truncated to 500 characters)
+
+    Returns:
+        True if the notification was queued, False if there is no outbox or the write failed
+    """
+    if not SHEET_OUTBOX_QUEUE_URL:
+        return False
+
+    notification = {
+        'content_id': str(content_id),
+        'status': str(status).lower(),
+        # Orders notifications for the same row, the drainer only sends the latest
+        'created_at_ns': time.time_ns(),
+    }
+    if processed_at:
+        notification['processed_at'] = processed_at
+    if generated_title:
+        notification['generated_title'] = generated_title
+    if generated_tags:
+        notification['generated_tags'] = list(generated_tags)
+    if error_details:
+        notification['error_details'] = str(error_details)[:500]
+
+    try:
+        get_sqs_client().send_message(QueueUrl=SHEET_OUTBOX_QUEUE_URL,
+                                      MessageBody=json.dumps(notification, default=str))
+        logger.info(f"Queued '{notification['status']}' sheet notification for {content_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Could not queue sheet notification for {content_id}: {str(e)}")
+        return False
+
+
+def latest_notifications(records):
+    """
+    Parses outbox SQS records and keeps the latest notification per content_id.
+
+    Returns:
+        Tuple (latest, message_ids, unparseable): content_id -> notification,
+        content_id -> all messageIds carrying it, and messageIds that could not be parsed
+    """
+    latest = {}
+    message_ids = {}
+    unparseable = []
+    for record in records:
+        try:
+            notification = json.loads(record.get('body') or '')
+            content_id = notification['content_id']
+        except (ValueError, TypeError, KeyError):
+            unparseable.append(record.get('messageId'))
+            continue
+        message_ids.setdefault(content_id, []).append(record.get('messageId'))
+        current = latest.get(content_id)
+        if current is None or notification.get('created_at_ns', 0) >= current.get('created_at_ns', 0):
+            latest[content_id] = notification
+    return latest, message_ids, unparseable
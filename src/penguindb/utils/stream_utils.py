@@ -0,0 +1,175 @@
+"""
+Helpers for consuming DynamoDB Stream records in the content processing Lambdas.
+Contains change detection between stream images and event source filter criteria.
+"""
+import os
+import json
+import logging
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Fields written back by llm_worker itself. A MODIFY record that only touches
+# these is the echo of our own update_item call and carries no new input.
+LLM_WORKER_OWNED_FIELDS = frozenset({
+    'generated_title',
+    'generated_description',
+    'generated_tags',
+    'llm_processed_at',
+    'llm_retries_used',
+    'used_fallback',
+    'llm_usage',
+})
+
+# Bookkeeping fields written by status_checker after a successful sheet update
+SHEET_BOOKKEEPING_FIELDS = frozenset({
+    'sheet_updated',
+    'sheet_updated_at',
+})
+
+# When enabled, sheet_notifier is the only source of 'processed' sheet updates; llm_worker and
+# sqs_worker stop posting them (and invoking status_checker) themselves
+SHEET_NOTIFIER_ENABLED = os.environ.get('SHEET_NOTIFIER_ENABLED', 'false').lower() == 'true'
+
+# Event source mapping settings for stream consumers that return build_stream_batch_response().
+# Bisecting isolates a poison record if the handler itself crashes before it can report one.
+STREAM_EVENT_SOURCE_SETTINGS = {
+    'FunctionResponseTypes': ['ReportBatchItemFailures'],
+    'BisectBatchOnFunctionError': True,
+    'MaximumRetryAttempts': 5,
+}
+
+# The notifier's micro-batch window: Lambda collects up to BatchSize records or waits this long
+SHEET_NOTIFIER_EVENT_SOURCE_SETTINGS = {
+    **STREAM_EVENT_SOURCE_SETTINGS,
+    'BatchSize': 100,
+    'MaximumBatchingWindowInSeconds': 2,
+}
+
+
+def get_changed_fields(record):
+    """
+    Compares OldImage and NewImage of a stream record and returns the changed attribute names.
+    Works directly on the low-level DynamoDB JSON, so no deserialization is needed.
+
+    Args:
+        record: A single DynamoDB Stream record
+
+    Returns:
+        Set of changed attribute names, or None if the change cannot be determined
+        (e.g. INSERT/REMOVE events or a stream view type without both images)
+    """
+    stream_data = record.get('dynamodb', {})
+    old_image = stream_data.get('OldImage')
+    new_image = stream_data.get('NewImage')
+
+    if record.get('eventName') != 'MODIFY' or old_image is None or new_image is None:
+        return None
+
+    changed = {key for key in new_image.keys() | old_image.keys()
+               if old_image.get(key) != new_image.get(key)}
+    return changed
+
+
+def is_self_write(record, owned_fields=LLM_WORKER_OWNED_FIELDS):
+    """
+    Checks whether a stream record was produced only by writes to the given owned fields.
+
+    Args:
+        record: A single DynamoDB Stream record
+        owned_fields: Attribute names written by the consumer itself
+
+    Returns:
+        True if the record is a MODIFY whose changes are all in owned_fields
+    """
+    changed = get_changed_fields(record)
+    if changed is None:
+        return False
+    # A MODIFY with no visible change is also a no-op for us
+    return changed <= owned_fields
+
+
+def build_stream_filter_criteria(owned_fields=LLM_WORKER_OWNED_FIELDS, marker_field='generated_title'):
+    """
+    Builds Lambda event source mapping FilterCriteria for the LLM worker stream trigger.
+
+    Filter patterns cannot compare OldImage with NewImage, so the filter keeps every
+    INSERT and only those MODIFY events whose NewImage does not carry the marker field yet.
+    Items that already have generated content never reach the function. Runtime
+    self-write detection (is_self_write) still covers anything the filter lets through.
+
+    Args:
+        owned_fields: Attribute names written by the consumer (must include marker_field)
+        marker_field: Attribute whose presence means the item was already processed
+
+    Returns:
+        Dictionary usable as the FilterCriteria argument of
+        lambda.create_event_source_mapping / update_event_source_mapping
+    """
+    if marker_field not in owned_fields:
+        raise ValueError(f"Marker field '{marker_field}' must be one of the owned fields")
+
+    patterns = [
+        {'eventName': ['INSERT']},
+        {
+            'eventName': ['MODIFY'],
+            'dynamodb': {'NewImage': {marker_field: {'S': [{'exists': False}]}}}
+        },
+    ]
+    return {'Filters': [{'Pattern': json.dumps(pattern)} for pattern in patterns]}
+
+
+def marker_appeared(record, marker_field='generated_title'):
+    """
+    Checks whether a stream record is the one in which the marker field first got a value.
+
+    Returns:
+        True for an INSERT carrying the field, or a MODIFY whose OldImage lacks it and NewImage has it
+    """
+    stream_data = record.get('dynamodb', {})
+    new_value = (stream_data.get('NewImage') or {}).get(marker_field)
+    if not new_value or new_value == {'S': ''}:
+        return False
+    if record.get('eventName') == 'INSERT':
+        return True
+    if record.get('eventName') != 'MODIFY':
+        return False
+    old_value = (stream_data.get('OldImage') or {}).get(marker_field)
+    return not old_value or old_value == {'S': ''}
+
+
+def build_marker_filter_criteria(marker_field='generated_title'):
+    """
+    Builds FilterCriteria that only pass records whose NewImage carries the marker field
+    (the notifier still checks the OldImage with marker_appeared, filters cannot).
+    """
+    pattern = {
+        'eventName': ['INSERT', 'MODIFY'],
+        'dynamodb': {'NewImage': {marker_field: {'S': [{'exists': True}]}}}
+    }
+    return {'Filters': [{'Pattern': json.dumps(pattern)}]}
+
+
+def build_stream_batch_response(first_failed_sequence=None):
+    """
+    Builds the partial batch response for a DynamoDB Stream consumer.
+
+    For streams, Lambda checkpoints up to the lowest reported SequenceNumber and retries
+    from there, so only the first failed record is reported. Records after it are
+    expected to be left unprocessed by the caller.
+
+    Args:
+        first_failed_sequence: SequenceNumber of the first failed record, or None
+
+    Returns:
+        Dictionary with the batchItemFailures list (empty when the whole batch succeeded)
+    """
+    if not first_failed_sequence:
+        return {'batchItemFailures': []}
+    return {'batchItemFailures': [{'itemIdentifier': first_failed_sequence}]}
+
+
+if __name__ == "__main__":
+    # Print the filter criteria, e.g. for:
+    # aws lambda update-event-source-mapping --uuid <uuid> --filter-criteria file://filter.json
+    print(json.dumps(build_stream_filter_criteria(), indent=2))
@@ -0,0 +1,295 @@
+"""
+Tag canonicalization for generated_tags.
+
+Collapses near-duplicate tags ("AWS Glue", "aws-glue", "Glue") to one canonical form:
+    1. folding: case, accents, separators and punctuation ("aws-glue" -> "awsglue")
+    2. alias map: folded key -> canonical tag, persisted on the pipeline state table
+       and loaded once per container, so known tags resolve with one dict lookup
+    3. unseen tags: vendor-prefix match ("Glue" -> "AWS Glue"), then a trigram
+       similarity index over the canonical tags ("Kubernetes" ~ "Kubernets");
+       the result is learned into the alias map
+
+Edit the 'aliases' map on the 'tags#canonical' state item to correct a mapping.
+"""
+import os
+import re
+import sys
+import time
+import logging
+import threading
+import unicodedata
+
+from penguindb.utils.pipeline_state import get_state_table
+from penguindb.utils.parallel_scan import parallel_scan
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+TAG_CANONICALIZATION = os.environ.get('TAG_CANONICALIZATION', 'true').lower() == 'true'
+TAG_SIMILARITY_THRESHOLD = float(os.environ.get('TAG_SIMILARITY_THRESHOLD', '0.7'))
+# How long a container keeps its alias map before reloading aliases learned elsewhere
+TAG_ALIAS_REFRESH_SECONDS = int(os.environ.get('TAG_ALIAS_REFRESH_SECONDS', '600'))
+
+ALIAS_STATE_KEY = 'tags#canonical'
+RECANONICALIZE_CHECKPOINT_KEY = 'tags#recanonicalize_scan'
+MIN_FUZZY_KEY_LENGTH = 4
+
+# Prefixes that are often dropped ("Glue" for "AWS Glue")
+VENDOR_PREFIXES = ('aws', 'amazon', 'azure', 'microsoft', 'google', 'gcp', 'apache')
+
+# Seed aliases for spellings that folding and similarity cannot connect
+DEFAULT_ALIASES = {
+    'ml': 'Machine Learning',
+    'ai': 'AI',
+    'genai': 'Generative AI',
+    'largelanguagemodels': 'LLM',
+    'k8s': 'Kubernetes',
+    'gcp': 'Google Cloud',
+    'googlecloudplatform': 'Google Cloud',
+    'amazonwebservices': 'AWS',
+    'postgres': 'PostgreSQL',
+    'js': 'JavaScript',
+}
+
+_FOLD_PATTERN = re.compile(r"[^a-z0-9+#]+")
+
+
+def fold_tag(tag):
+    """Folds case, accents, whitespace, punctuation and plural 's' ('AWS-Glue ' -> 'awsglue')."""
+    folded = unicodedata.normalize('NFKD', str(tag).lower())
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    folded = _FOLD_PATTERN.sub('', folded)
+    if len(folded) > 4 and folded.endswith('s') and not folded.endswith('ss'):
+        folded = folded[:-1]
+    return folded
+
+
+def clean_display_tag(tag):
+    """Trims and collapses whitespace of a tag as it will be stored."""
+    return ' '.join(str(tag).split()).strip(' ,;')
+
+
+def trigrams(key):
+    """Padded character trigrams of a folded key."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TagCanonicalizer:
+    """In-memory alias map plus trigram index over canonical tags."""
+
+    def __init__(self, aliases=None):
+        self.aliases = {}          # folded key -> canonical tag
+        self.canonical_keys = {}   # folded canonical key -> canonical tag
+        self.trigram_index = {}    # trigram -> set of folded canonical keys
+        self.pending = {}          # aliases learned since the last persist
+        self.lock = threading.Lock()
+        for key, canonical in DEFAULT_ALIASES.items():
+            self._learn(fold_tag(key), canonical, persist=False)
+        for key, canonical in (aliases or {}).items():
+            self._learn(key, canonical, persist=False)
+
+    def _add_canonical(self, canonical):
+        key = fold_tag(canonical)
+        if key in self.canonical_keys:
+            return
+        self.canonical_keys[key] = canonical
+        for gram in trigrams(key):
+            self.trigram_index.setdefault(gram, set()).add(key)
+
+    def _learn(self, key, canonical, persist=True):
+        self.aliases[key] = canonical
+        self.aliases.setdefault(fold_tag(canonical), canonical)
+        self._add_canonical(canonical)
+        if persist:
+            self.pending[key] = canonical
+
+    def _most_similar(self, key):
+        """Returns (canonical key, Jaccard similarity) of the closest canonical tag, or (None, 0)."""
+        grams = trigrams(key)
+        overlaps = {}
+        for gram in grams:
+            for candidate in self.trigram_index.get(gram, ()):
+                overlaps[candidate] = overlaps.get(candidate, 0) + 1
+        best, best_score = None, 0.0
+        for candidate, shared in overlaps.items():
+            score = shared / (len(grams) + len(trigrams(candidate)) - shared)
+            if score > best_score:
+                best, best_score = candidate, score
+        return best, best_score
+
+    def _resolve_unseen(self, key, tag):
+        # Very short keys ('ml', 'bi') match too many unrelated tags
+        if len(key) < MIN_FUZZY_KEY_LENGTH:
+            return tag
+        for prefix in VENDOR_PREFIXES:
+            prefixed = self.canonical_keys.get(prefix + key)
+            if prefixed:
+                return prefixed
+            if key.startswith(prefix) and key[len(prefix):] in self.canonical_keys:
+                return self.canonical_keys[key[len(prefix):]]
+        best, score = self._most_similar(key)
+        if best is not None and score >= TAG_SIMILARITY_THRESHOLD:
+            return self.canonical_keys[best]
+        return tag
+
+    def canonicalize(self, tag):
+        """Returns the canonical form of one tag ('' for tags that fold to nothing)."""
+        key = fold_tag(tag)
+        if not key:
+            return ''
+        canonical = self.aliases.get(key)
+        if canonical is not None:
+            return canonical
+        with self.lock:
+            canonical = self.aliases.get(key)
+            if canonical is None:
+                canonical = self._resolve_unseen(key, clean_display_tag(tag))
+                self._learn(key, canonical)
+                if canonical != clean_display_tag(tag):
+                    logger.info(f"Tag '{tag}' canonicalized to '{canonical}'")
+        return canonical
+
+    def canonicalize_tags(self, tags):
+        """Canonicalizes a tag list, dropping empties and duplicates (order kept)."""
+        result = []
+        seen = set()
+        for tag in tags or []:
+            canonical = self.canonicalize(tag)
+            if canonical and canonical not in seen:
+                seen.add(canonical)
+                result.append(canonical)
+        return result
+
+    def take_pending(self):
+        """Returns and clears the aliases learned since the last call."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        return pending
+
+
+def load_aliases():
+    """Loads the persisted alias map (folded key -> canonical tag)."""
+    try:
+        item = get_state_table().get_item(Key={'state_key': ALIAS_STATE_KEY}).get('Item') or {}
+        return dict(item.get('aliases') or {})
+    except Exception as e:
+        logger.warning(f"Could not load tag aliases, using defaults: {str(e)}")
+        return {}
+
+
+def save_aliases(aliases):
+    """
+    Persists newly learned aliases. Existing entries are kept (first writer wins),
+    so containers that learn the same tag concurrently agree on one canonical form.
+    """
+    if not aliases:
+        return
+    table = get_state_table()
+    try:
+        table.update_item(
+            Key={'state_key': ALIAS_STATE_KEY},
+            UpdateExpression='SET aliases = if_not_exists(aliases, :empty)',
+            ExpressionAttributeValues={':empty': {}}
+        )
+        entries = list(aliases.items())
+        # Keep each UpdateExpression well below the expression size limits
+        for start in range(0, len(entries), 50):
+            chunk = entries[start:start + 50]
+            names = {'#a': 'aliases'}
+            values = {}
+            parts = []
+            for i, (key, canonical) in enumerate(chunk):
+                names[f"#k{i}"] = key
+                values[f":v{i}"] = canonical
+                parts.append(f"#a.#k{i} = if_not_exists(#a.#k{i}, :v{i})")
+            table.update_item(
+                Key={'state_key': ALIAS_STATE_KEY},
+                UpdateExpression='SET ' + ', '.join(parts),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+    except Exception as e:
+        # Aliases stay in this container's memory and are relearned elsewhere
+        logger.warning(f"Could not persist {len(aliases)} tag aliases: {str(e)}")
+
+
+_canonicalizer = None
+_loaded_at = 0.0
+
+
+def get_canonicalizer():
+    """Returns the container-wide canonicalizer, (re)loading the alias map when it is stale."""
+    global _canonicalizer, _loaded_at
+    if _canonicalizer is None or time.monotonic() - _loaded_at > TAG_ALIAS_REFRESH_SECONDS:
+        pending = _canonicalizer.take_pending() if _canonicalizer else {}
+        save_aliases(pending)
+        _canonicalizer = TagCanonicalizer(load_aliases())
+        _loaded_at = time.monotonic()
+    return _canonicalizer
+
+
+def canonicalize_tags(tags):
+    """
+    Canonicalizes a generated tag list in a write path and persists any newly learned aliases.
+
+    Args:
+        tags: List of tags (returned unchanged, minus empties, if TAG_CANONICALIZATION is off)
+
+    Returns:
+        List of canonical, de-duplicated tags
+    """
+    if not TAG_CANONICALIZATION:
+        return [tag for tag in tags or [] if str(tag).strip()]
+    canonicalizer = get_canonicalizer()
+    result = canonicalizer.canonicalize_tags(tags)
+    save_aliases(canonicalizer.take_pending())
+    return result
+
+
+def recanonicalize_table(table, apply=False, items=None):
+    """
+    Bulk job: re-canonicalizes generated_tags of every item in the content table.
+
+    Args:
+        table: boto3 Table resource of the content table
+        apply: Write the changes (otherwise only report them)
+        items: Iterable of items (defaults to a checkpointed parallel table scan)
+
+    Returns:
+        Dictionary with scanned/changed/updated counts
+    """
+    if items is None:
+        # Resumable: an interrupted run continues from its last checkpoint
+        items = parallel_scan(table, projection=['content_id', 'content_type', 'generated_tags'],
+                              checkpoint_key=RECANONICALIZE_CHECKPOINT_KEY)
+
+    canonicalizer = get_canonicalizer()
+    stats = {'scanned': 0, 'changed': 0, 'updated': 0}
+    for item in items:
+        stats['scanned'] += 1
+        tags = item.get('generated_tags')
+        if not tags:
+            continue
+        current = list(tags)
+        canonical = canonicalizer.canonicalize_tags(current)
+        if canonical == current:
+            continue
+        stats['changed'] += 1
+        logger.info(f"{item['content_id']}: {current} -> {canonical}")
+        if apply:
+            table.update_item(
+                Key={'content_id': item['content_id'], 'content_type': item['content_type']},
+                UpdateExpression='SET generated_tags = :tags',
+                ExpressionAttributeValues={':tags': canonical}
+            )
+            stats['updated'] += 1
+    save_aliases(canonicalizer.take_pending())
+    return stats
+
+
+if __name__ == '__main__':
+    # python -m penguindb.utils.tag_canonicalizer [--apply]
+    import boto3
+    content_table = boto3.resource('dynamodb').Table(os.environ.get('DYNAMODB_TABLE_NAME', 'content_data'))
+    print(recanonicalize_table(content_table, apply='--apply' in sys.argv))
@@ -0,0 +1,86 @@
+"""
+Shared fixtures: a moto-backed AWS account with the pipeline's DynamoDB tables.
+
+Lambda modules create their boto3 resources at import time, so tests point the
+module-level table (or lazy client) at the moto table with monkeypatch.
+"""
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+
+@pytest.fixture(autouse=True)
+def aws(monkeypatch):
+    """Fake credentials and a fresh moto account for every test."""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_SESSION_TOKEN', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_aws():
+        yield
+
+
+@pytest.fixture
+def dynamodb():
+    return boto3.resource('dynamodb', region_name='us-east-1')
+
+
+@pytest.fixture
+def content_table(dynamodb):
+    """content_data layout: content_id (hash) + content_type (range)."""
+    return dynamodb.create_table(
+        TableName='content_data',
+        KeySchema=[{'AttributeName': 'content_id', 'KeyType': 'HASH'},
+                   {'AttributeName': 'content_type', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'content_id', 'AttributeType': 'S'},
+                              {'AttributeName': 'content_type', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+
+
+@pytest.fixture
+def state_table(dynamodb, monkeypatch):
+    """pipeline_state table, installed as the cached table of penguindb.utils.pipeline_state."""
+    from penguindb.utils import pipeline_state
+    table = dynamodb.create_table(
+        TableName='pipeline_state',
+        KeySchema=[{'AttributeName': 'state_key', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'state_key', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    monkeypatch.setattr(pipeline_state, '_state_table', table)
+    return table
+
+
+def stream_record(sequence_number, item, event_name='INSERT', old_item=None):
+    """Builds a DynamoDB Stream record for an item given as a plain dict."""
+    from boto3.dynamodb.types import TypeSerializer
+    serializer = TypeSerializer()
+    record = {
+        'eventName': event_name,
+        'dynamodb': {
+            'SequenceNumber': sequence_number,
+            'Keys': {key: serializer.serialize(item[key]) for key in ('content_id', 'content_type')},
+            'NewImage': {key: serializer.serialize(value) for key, value in item.items()},
+        },
+    }
+    if old_item is not None:
+        record['dynamodb']['OldImage'] = {key: serializer.serialize(value) for key, value in old_item.items()}
+    return record
+
+
+class FakeContext:
+    """Lambda context stand-in with a fixed deadline."""
+
+    aws_request_id = 'test-request'
+    function_name = 'test-function'
+
+    def __init__(self, remaining_ms=900000):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
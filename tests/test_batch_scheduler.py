@@ -0,0 +1,77 @@
+"""run_deadline_scheduled ordering and deferral against a fake Lambda deadline."""
+from conftest import FakeContext
+from penguindb.utils.batch_scheduler import RecordCostModel, run_deadline_scheduled
+
+
+def _work(message_id, content_type, description=''):
+    return {'message_id': message_id, 'body': {'content_type': content_type, 'description': description}}
+
+
+def test_cheapest_first_and_defers_what_cannot_finish():
+    model = RecordCostModel(priors={'post': 5.0, 'article': 25.0})
+    context = FakeContext(remaining_ms=45000)
+    processed = []
+
+    def process(work_item):
+        processed.append(work_item['message_id'])
+        context.remaining_ms -= 5000
+
+    report = run_deadline_scheduled([_work('article', 'article'), _work('p1', 'post'), _work('p2', 'post')],
+                                    process, context=context, model=model, safety_ms=15000)
+
+    assert processed == ['p1', 'p2']
+    assert report['deferred'] == ['article']
+    assert report['batchItemFailures'] == [{'itemIdentifier': 'article'}]
+
+
+def test_first_record_is_attempted_even_if_predicted_too_long():
+    model = RecordCostModel(priors={'article': 600.0})
+    processed = []
+
+    report = run_deadline_scheduled([_work('a1', 'article'), _work('a2', 'article')],
+                                    lambda w: processed.append(w['message_id']),
+                                    context=FakeContext(remaining_ms=60000), model=model, safety_ms=15000)
+
+    assert processed == ['a1']
+    assert report['completed'] == ['a1']
+    assert report['deferred'] == ['a2']
+
+
+def test_failed_records_are_reported():
+    def process(work_item):
+        if work_item['message_id'] == 'bad':
+            raise ValueError("boom")
+
+    report = run_deadline_scheduled([_work('ok', 'post'), _work('bad', 'post')], process,
+                                    context=FakeContext(), model=RecordCostModel())
+
+    assert report['completed'] == ['ok']
+    assert report['batchItemFailures'] == [{'itemIdentifier': 'bad'}]
+
+
+def test_redelivered_expensive_record_goes_ahead_of_cheap_ones():
+    def run(batch):
+        # Fresh model each run: observed (instant) durations would otherwise lower the priors
+        model = RecordCostModel(priors={'post': 5.0, 'article': 40.0})
+        context = FakeContext(remaining_ms=55000)
+        processed = []
+
+        def process(work_item):
+            processed.append(work_item['message_id'])
+            context.remaining_ms -= model.predict(work_item['body']) * 1000
+
+        return processed, run_deadline_scheduled(batch, process, context=context, model=model, safety_ms=15000)
+
+    batch = [_work(f"p{i}", 'post') for i in range(4)] + [_work('article', 'article')]
+
+    # Fresh, the article is always the one deferred behind the cheap posts
+    processed, report = run(batch)
+    assert processed == ['p0', 'p1', 'p2', 'p3']
+    assert report['deferred'] == ['article']
+
+    # Redelivered, it is attempted first and the cheap posts wait instead
+    batch[-1]['receive_count'] = 2
+    processed, report = run(batch)
+    assert processed == ['article']
+    assert report['completed'] == ['article']
+    assert report['deferred'] == ['p0', 'p1', 'p2', 'p3']
@@ -0,0 +1,113 @@
+"""Claim-check offload and batch resolution against a moto S3 bucket."""
+import gzip
+import json
+import threading
+import time
+
+import boto3
+import pytest
+
+from conftest import FakeContext
+from penguindb.utils import claim_check
+
+BUCKET = 'claim-check-test'
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    client = boto3.client('s3', region_name='us-east-1')
+    client.create_bucket(Bucket=BUCKET)
+    monkeypatch.setattr(claim_check, '_s3_client', client)
+    return client
+
+
+def _large_body(content_id='big-1', size=5000):
+    return json.dumps({'content_id': content_id, 'content_type': 'article', 'description': 'x' * size})
+
+
+def test_small_body_stays_inline(s3):
+    body = _large_body(size=10)
+
+    assert claim_check.offload_if_large(body, 'big-1', bucket=BUCKET, threshold=1024) == body
+    assert 'Contents' not in s3.list_objects_v2(Bucket=BUCKET)
+
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_large_body_is_offloaded_and_fetched_back(s3, compress):
+    body = _large_body()
+
+    pointer_body = claim_check.offload_if_large(body, 'big-1', bucket=BUCKET, threshold=1024, compress=compress)
+
+    pointer = claim_check.get_claim_check(pointer_body)
+    assert pointer['encoding'] == ('gzip' if compress else 'identity')
+    assert pointer['size'] == len(body)
+    stored = s3.get_object(Bucket=BUCKET, Key=pointer['key'])
+    payload = stored['Body'].read()
+    if compress:
+        assert stored['ContentEncoding'] == 'gzip'
+        assert len(payload) < len(body)
+        payload = gzip.decompress(payload)
+    assert payload.decode('utf-8') == body
+    assert claim_check.fetch_body(pointer) == body
+
+
+def test_resolve_record_bodies_fetches_in_parallel(s3, monkeypatch):
+    bodies = [_large_body(f"big-{i}") for i in range(8)]
+    records = [{'messageId': f"m{i}", 'body': claim_check.offload_if_large(body, f"big-{i}", bucket=BUCKET,
+                                                                          threshold=1024)}
+               for i, body in enumerate(bodies)]
+    records.append({'messageId': 'inline', 'body': '{"content_id": "small"}'})
+
+    active = []
+    peak = []
+    lock = threading.Lock()
+    fetch_body = claim_check.fetch_body
+
+    def slow_fetch(pointer):
+        with lock:
+            active.append(pointer['key'])
+            peak.append(len(active))
+        time.sleep(0.05)
+        try:
+            return fetch_body(pointer)
+        finally:
+            with lock:
+                active.remove(pointer['key'])
+
+    monkeypatch.setattr(claim_check, 'fetch_body', slow_fetch)
+
+    assert claim_check.resolve_record_bodies(records, max_workers=4) == 8
+    assert [record['body'] for record in records[:8]] == bodies
+    assert records[8]['body'] == '{"content_id": "small"}'
+    assert 1 < max(peak) <= 4
+
+
+def _pointer_record(message_id, key):
+    pointer = {'content_id': 'gone', 'claim_check': {'bucket': BUCKET, 'key': key, 'encoding': 'identity'}}
+    return {'messageId': message_id, 'receiptHandle': 'handle', 'body': json.dumps(pointer)}
+
+
+def test_missing_object_is_marked_not_raised(s3):
+    records = [_pointer_record('m1', 'sqs-claim-check/gone/missing.json')]
+
+    assert claim_check.resolve_record_bodies(records) == 0
+    assert 'claim_check_error' in records[0]
+
+
+def test_missing_object_becomes_a_batch_item_failure(s3, content_table, state_table, monkeypatch):
+    from penguindb.lambda_function import sqs_worker, content_ingestion
+    monkeypatch.setattr(sqs_worker, 'table', content_table)
+    monkeypatch.setattr(content_ingestion, 'table', content_table)
+    present = claim_check.offload_if_large(_large_body('present'), 'present', bucket=BUCKET, threshold=1024)
+
+    def generate(**kwargs):
+        return {'title': 'Generated', 'description': 'Generated', 'tags': ['data']}
+
+    monkeypatch.setattr(sqs_worker, 'generate_content_with_llm', generate)
+    monkeypatch.setattr(sqs_worker, 'trigger_status_checker', lambda content_ids: None)
+
+    for handler in (sqs_worker.lambda_handler, content_ingestion.lambda_handler):
+        records = [_pointer_record('missing', 'sqs-claim-check/gone/missing.json'),
+                   {'messageId': 'present', 'receiptHandle': 'handle', 'body': present}]
+        response = handler({'Records': records}, FakeContext())
+        assert response['batchItemFailures'] == [{'itemIdentifier': 'missing'}]
@@ -0,0 +1,149 @@
+"""
+AIMD Bedrock limiter with several containers sharing a moto lease table, against a fake
+Bedrock that throttles when more than 'capacity' calls are in flight.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from penguindb.utils import concurrency_limiter
+from penguindb.utils.concurrency_limiter import AIMDConcurrencyLimiter, CONTROLLER_KEY
+
+
+class FakeBedrock:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.in_flight = 0
+        self.peak = 0
+        self.throttled = 0
+
+    async def invoke(self):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+            if self.in_flight > self.capacity:
+                self.throttled += 1
+                return {'error': 'ThrottlingException: Too many requests'}
+            return {'completion': 'ok'}
+        finally:
+            self.in_flight -= 1
+
+
+def _is_throttled(result):
+    return 'error' in result
+
+
+@pytest.fixture(autouse=True)
+def uncached_limit(monkeypatch):
+    # Containers re-read the shared limit on every acquisition
+    monkeypatch.setattr(concurrency_limiter, 'LIMITER_CACHE_SECONDS', 0)
+
+
+def _limit(state_table):
+    item = state_table.get_item(Key={'state_key': CONTROLLER_KEY}).get('Item') or {}
+    return int(item['limit']) if 'limit' in item else None
+
+
+class RecordingTable:
+    """Forwards to the moto table and logs every limit written, in the order it was applied."""
+
+    def __init__(self, table, initial):
+        self.table = table
+        self.limits = [initial]
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def update_item(self, **kwargs):
+        with self.lock:
+            response = self.table.update_item(**kwargs)
+            if ':new' in kwargs['ExpressionAttributeValues']:
+                self.limits.append(int(kwargs['ExpressionAttributeValues'][':new']))
+            else:
+                self.limits.append(int(response['Attributes']['limit']))
+            return response
+
+
+def _run(limiters, bedrock, calls_per_caller, callers_per_container):
+    async def caller(limiter):
+        for _ in range(calls_per_caller):
+            await limiter.run_async(bedrock.invoke, _is_throttled)
+
+    async def main():
+        await asyncio.gather(*(caller(limiter) for limiter in limiters for _ in range(callers_per_container)))
+
+    asyncio.run(main())
+
+
+def test_limit_shrinks_on_throttling_and_grows_back_additively(state_table):
+    table = RecordingTable(state_table, initial=8)
+    limiters = [AIMDConcurrencyLimiter(table=table, initial=8, minimum=1, maximum=16, cooldown=0)
+                for _ in range(3)]
+
+    # Overload: 12 concurrent callers in 3 containers, Bedrock takes 3 at a time
+    overloaded = FakeBedrock(capacity=3)
+    _run(limiters, overloaded, calls_per_caller=4, callers_per_container=4)
+
+    assert overloaded.throttled > 0
+    # In-flight calls never exceed the starting limit, the lease slots are shared
+    assert overloaded.peak <= 8
+    steps = list(zip(table.limits, table.limits[1:]))
+    decreases = [(before, after) for before, after in steps if after < before]
+    assert decreases
+    # Every increase is a single step, even with three containers raising concurrently
+    assert all(after == before + 1 for before, after in steps if after > before)
+    assert min(table.limits) < 8
+    # Later successes in the overload phase may already have raised it again
+    before_recovery = _limit(state_table)
+
+    # Capacity is back: the limit climbs one step at a time
+    recovered = FakeBedrock(capacity=100)
+    start = len(table.limits)
+    _run(limiters, recovered, calls_per_caller=10, callers_per_container=2)
+
+    assert recovered.throttled == 0
+    assert table.limits[start:] == list(range(before_recovery + 1, _limit(state_table) + 1))
+    assert _limit(state_table) > before_recovery
+
+
+def test_one_decrease_per_cooldown_across_containers(state_table):
+    limiters = [AIMDConcurrencyLimiter(table=state_table, initial=8, cooldown=60) for _ in range(3)]
+
+    for limiter in limiters:
+        limiter.on_throttle()
+
+    assert _limit(state_table) == 4
+
+
+def test_limit_stays_within_bounds(state_table):
+    limiter = AIMDConcurrencyLimiter(table=state_table, initial=2, minimum=2, maximum=3, cooldown=0)
+
+    limiter.on_throttle()
+    assert _limit(state_table) == 2
+    for _ in range(20):
+        limiter.on_success()
+    assert _limit(state_table) == 3
+
+
+def test_error_results_do_not_raise_the_limit(state_table):
+    table = RecordingTable(state_table, initial=2)
+    limiter = AIMDConcurrencyLimiter(table=table, initial=2, minimum=1, maximum=8, cooldown=0)
+
+    async def failing():
+        return {'error': 'ValidationException: malformed input'}
+
+    async def main():
+        for _ in range(10):
+            await limiter.run_async(failing, lambda result: False)
+
+    asyncio.run(main())
+
+    # No increase and no decrease, and every slot was released
+    assert table.limits == [2]
+    assert limiter.successes == 0
+    slots = state_table.scan(FilterExpression='begins_with(state_key, :prefix)',
+                             ExpressionAttributeValues={':prefix': concurrency_limiter.SLOT_KEY_PREFIX})
+    assert slots['Items'] == []
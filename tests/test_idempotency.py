@@ -0,0 +1,127 @@
+"""
+Duplicate SQS deliveries against a moto pipeline_state table: the second delivery
+short-circuits to the stored outcome, and an abandoned IN_PROGRESS claim is taken over.
+"""
+import json
+import time
+
+import pytest
+
+from conftest import FakeContext
+from penguindb.utils import idempotency
+
+
+def _body(content_id='item-1'):
+    return {'content_id': content_id, 'content_type': 'post', 'description': 'A post about data pipelines',
+            'tags': 'data, aws'}
+
+
+def _sqs_record(message_id, body):
+    return {'messageId': message_id, 'receiptHandle': f"handle-{message_id}", 'body': json.dumps(body)}
+
+
+class FakeGenerator:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        return {'title': 'Generated', 'description': 'Generated description', 'tags': ['data'],
+                'used_fallback': False, 'retry_count': 0}
+
+
+@pytest.fixture
+def sqs_worker(content_table, state_table, monkeypatch):
+    from penguindb.lambda_function import sqs_worker
+    monkeypatch.setattr(sqs_worker, 'table', content_table)
+    monkeypatch.setattr(sqs_worker, 'trigger_status_checker', lambda content_ids: None)
+    generator = FakeGenerator()
+    monkeypatch.setattr(sqs_worker, 'generate_content_with_llm', generator)
+    sqs_worker.generator = generator
+    return sqs_worker
+
+
+@pytest.fixture
+def content_ingestion(content_table, state_table, monkeypatch):
+    from penguindb.lambda_function import content_ingestion
+    monkeypatch.setattr(content_ingestion, 'table', content_table)
+    monkeypatch.setattr(content_ingestion, 'GOOGLE_SHEET_URL', None)
+    return content_ingestion
+
+
+def _claim_key(scope, body):
+    return idempotency.build_idempotency_key(scope, body['content_id'], idempotency.fingerprint_body(body))
+
+
+def test_sqs_worker_duplicate_delivery_skips_the_llm(sqs_worker, state_table):
+    body = _body()
+
+    first = sqs_worker.lambda_handler({'Records': [_sqs_record('m1', body)]}, FakeContext())
+    second = sqs_worker.lambda_handler({'Records': [_sqs_record('m2', body)]}, FakeContext())
+
+    assert first['batchItemFailures'] == [] and second['batchItemFailures'] == []
+    assert sqs_worker.generator.calls == 1
+    stored = state_table.get_item(Key={'state_key': _claim_key('sqs_worker', body)})['Item']
+    assert stored['status'] == idempotency.STATUS_COMPLETED
+    assert json.loads(stored['outcome']) == {'content_id': 'item-1'}
+
+
+def test_sqs_worker_changed_body_is_processed_again(sqs_worker):
+    sqs_worker.lambda_handler({'Records': [_sqs_record('m1', _body())]}, FakeContext())
+    changed = dict(_body(), description='An edited post about data pipelines')
+    sqs_worker.lambda_handler({'Records': [_sqs_record('m2', changed)]}, FakeContext())
+
+    assert sqs_worker.generator.calls == 2
+
+
+def test_sqs_worker_live_claim_is_retried_later(sqs_worker):
+    body = _body()
+    assert idempotency.claim('sqs_worker', body['content_id'], body)['status'] == 'CLAIMED'
+
+    response = sqs_worker.lambda_handler({'Records': [_sqs_record('m1', body)]}, FakeContext())
+
+    assert response['batchItemFailures'] == [{'itemIdentifier': 'm1'}]
+    assert sqs_worker.generator.calls == 0
+
+
+def test_sqs_worker_takes_over_an_expired_claim(sqs_worker, state_table):
+    body = _body()
+    key = _claim_key('sqs_worker', body)
+    # A crashed invocation left its claim behind, the lease ran out a minute ago
+    state_table.put_item(Item={'state_key': key, 'status': idempotency.STATUS_IN_PROGRESS,
+                               'content_id': body['content_id'], 'lease_expires_at': int(time.time()) - 60,
+                               'expires_at': int(time.time()) + 3600})
+
+    response = sqs_worker.lambda_handler({'Records': [_sqs_record('m1', body)]}, FakeContext())
+
+    assert response['batchItemFailures'] == []
+    assert sqs_worker.generator.calls == 1
+    assert state_table.get_item(Key={'state_key': key})['Item']['status'] == idempotency.STATUS_COMPLETED
+
+
+def test_content_ingestion_duplicate_delivery_keeps_the_first_write(content_ingestion, content_table, state_table):
+    body = _body()
+
+    content_ingestion.lambda_handler({'Records': [_sqs_record('m1', body)]}, FakeContext())
+    first_item = content_table.get_item(Key={'content_id': 'item-1', 'content_type': 'post'})['Item']
+    response = content_ingestion.lambda_handler({'Records': [_sqs_record('m2', body)]}, FakeContext())
+
+    assert 'batchItemFailures' not in response
+    item = content_table.get_item(Key={'content_id': 'item-1', 'content_type': 'post'})['Item']
+    # The duplicate was not written again
+    assert item['sqs_message_id'] == 'm1'
+    assert item['ingested_at'] == first_item['ingested_at']
+    stored = state_table.get_item(Key={'state_key': _claim_key('content_ingestion', body)})['Item']
+    assert json.loads(stored['outcome']) == {'content_id': 'item-1', 'ingested_at': first_item['ingested_at']}
+
+
+def test_content_ingestion_takes_over_an_expired_claim(content_ingestion, content_table, state_table):
+    body = _body()
+    state_table.put_item(Item={'state_key': _claim_key('content_ingestion', body),
+                               'status': idempotency.STATUS_IN_PROGRESS, 'content_id': body['content_id'],
+                               'lease_expires_at': int(time.time()) - 60, 'expires_at': int(time.time()) + 3600})
+
+    response = content_ingestion.lambda_handler({'Records': [_sqs_record('m1', body)]}, FakeContext())
+
+    assert 'batchItemFailures' not in response
+    assert content_table.get_item(Key={'content_id': 'item-1', 'content_type': 'post'})['Item']['sqs_message_id'] == 'm1'
@@ -0,0 +1,53 @@
+"""async_lambda_handler corrects sheet statuses of already processed items like lambda_handler."""
+import contextlib
+
+import pytest
+
+from conftest import stream_record, FakeContext
+
+
+class FakeAsyncSession:
+    """aioboto3 session stand-in: no Bedrock or DynamoDB call is expected for processed items."""
+
+    @contextlib.asynccontextmanager
+    async def client(self, service_name, **kwargs):
+        yield None
+
+    @contextlib.asynccontextmanager
+    async def resource(self, service_name, **kwargs):
+        class Resource:
+            async def Table(self, name):
+                return None
+        yield Resource()
+
+
+@pytest.fixture
+def worker(content_table, monkeypatch):
+    from penguindb.lambda_function import llm_worker
+    from penguindb.utils import llm_client
+    monkeypatch.setattr(llm_worker, 'table', content_table)
+    monkeypatch.setattr(llm_worker, 'GOOGLE_SHEET_URL', 'https://sheet.example')
+    monkeypatch.setattr(llm_worker, 'SHEET_NOTIFIER_ENABLED', False)
+    monkeypatch.setattr(llm_client, 'get_async_session', lambda: FakeAsyncSession())
+    return llm_worker
+
+
+@pytest.mark.parametrize('handler_name', ['lambda_handler', 'async_lambda_handler'])
+def test_processed_items_get_their_sheet_status(worker, content_table, monkeypatch, handler_name):
+    updates = []
+    monkeypatch.setattr(worker, 'async_sheet_update',
+                        lambda content_id, status, llm_result=None, error_message=None:
+                        updates.append((content_id, status, llm_result['title'])))
+    # 'a' carries its output in the stream image, 'b' only in the table (replayed batch)
+    done = {'content_id': 'a', 'content_type': 'post', 'generated_title': 'title a',
+            'generated_description': 'generated a', 'generated_tags': ['tag']}
+    content_table.put_item(Item=done)
+    content_table.put_item(Item={'content_id': 'b', 'content_type': 'post', 'generated_title': 'title b',
+                                 'generated_description': 'generated b', 'generated_tags': ['tag']})
+    records = [stream_record('100', done),
+               stream_record('200', {'content_id': 'b', 'content_type': 'post', 'description': 'draft b'})]
+
+    response = getattr(worker, handler_name)({'Records': records}, FakeContext())
+
+    assert response == {'batchItemFailures': []}
+    assert updates == [('a', 'PROCESSED', 'title a'), ('b', 'PROCESSED', 'title b')]
@@ -0,0 +1,102 @@
+"""
+Stream checkpointing of llm_worker: a failed record in the middle of a batch is
+reported as the first failure, and a replay does not regenerate what was already written.
+"""
+import pytest
+
+from conftest import stream_record, FakeContext
+
+
+def _item(content_id, content_type='post'):
+    return {'content_id': content_id, 'content_type': content_type,
+            'description': f"draft {content_id}", 'tags': ['data']}
+
+
+def _result(content_id):
+    return {'title': f"title {content_id}", 'description': f"generated {content_id}", 'tags': ['tag'],
+            'used_fallback': False, 'retry_count': 0}
+
+
+@pytest.fixture
+def worker(content_table, monkeypatch):
+    from penguindb.lambda_function import llm_worker
+    monkeypatch.setattr(llm_worker, 'table', content_table)
+    monkeypatch.setattr(llm_worker, 'GOOGLE_SHEET_URL', None)
+    for content_id, content_type in [('a', 'post'), ('b', 'article'), ('c', 'post'), ('d', 'post')]:
+        content_table.put_item(Item=_item(content_id, content_type))
+    return llm_worker
+
+
+class FakeGenerator:
+    """generate_content_with_llm stand-in failing for the given content_ids."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, content_type, model, description, tags, logger, **kwargs):
+        content_id = description.split()[-1]
+        self.calls.append(content_id)
+        if content_id in self.failing:
+            raise ValueError(f"Failed to generate content for {content_id}")
+        return _result(content_id)
+
+
+def _batch():
+    return [stream_record('100', _item('a')), stream_record('200', _item('b', 'article')),
+            stream_record('300', _item('c')), stream_record('400', _item('d'))]
+
+
+def test_failure_in_the_middle_reports_first_failed_sequence(worker, content_table, monkeypatch):
+    generator = FakeGenerator(failing={'b'})
+    monkeypatch.setattr(worker, 'generate_content_with_llm', generator)
+
+    response = worker.lambda_handler({'Records': _batch()}, FakeContext())
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': '200'}]}
+    # Processing stops at the failure; later records wait for the replay
+    assert generator.calls == ['a', 'b']
+    assert content_table.get_item(Key={'content_id': 'a', 'content_type': 'post'})['Item']['generated_title'] == 'title a'
+    assert 'generated_title' not in content_table.get_item(Key={'content_id': 'c', 'content_type': 'post'})['Item']
+
+
+def test_replay_does_not_regenerate_records_before_the_failure(worker, monkeypatch):
+    monkeypatch.setattr(worker, 'generate_content_with_llm', FakeGenerator(failing={'b'}))
+    worker.lambda_handler({'Records': _batch()}, FakeContext())
+
+    # Replay the whole batch (e.g. after a bisect): 'a' is already in the table
+    generator = FakeGenerator()
+    monkeypatch.setattr(worker, 'generate_content_with_llm', generator)
+    response = worker.lambda_handler({'Records': _batch()}, FakeContext())
+
+    assert response == {'batchItemFailures': []}
+    assert generator.calls == ['b', 'c', 'd']
+
+
+def test_packed_results_after_the_break_survive_the_replay(worker, content_table, monkeypatch):
+    monkeypatch.setattr(worker, 'LLM_PACKED_MODE', True)
+    packed_calls = []
+
+    def fake_batch(content_type, model, items, logger, **kwargs):
+        packed_calls.append([item['content_id'] for item in items])
+        return {item['content_id']: _result(item['content_id']) for item in items}, {}
+
+    monkeypatch.setattr(worker, 'generate_content_batch_with_llm', fake_batch)
+    monkeypatch.setattr(worker, 'generate_content_with_llm', FakeGenerator(failing={'b'}))
+
+    response = worker.lambda_handler({'Records': _batch()}, FakeContext())
+    assert response == {'batchItemFailures': [{'itemIdentifier': '200'}]}
+    assert packed_calls == [['a', 'c', 'd']]
+    # Prefetched results of c and d were stored although the loop stopped at b
+    for content_id in ('c', 'd'):
+        item = content_table.get_item(Key={'content_id': content_id, 'content_type': 'post'})['Item']
+        assert item['generated_title'] == f"title {content_id}"
+
+    # Lambda replays from the failed record on
+    generator = FakeGenerator()
+    monkeypatch.setattr(worker, 'generate_content_with_llm', generator)
+    response = worker.lambda_handler({'Records': _batch()[1:]}, FakeContext())
+
+    assert response == {'batchItemFailures': []}
+    assert generator.calls == ['b']
+    assert packed_calls == [['a', 'c', 'd']]
@@ -0,0 +1,81 @@
+"""Accounting of packed LLM calls that fail or leave items out, before the single-item fallback."""
+import json
+import time
+import logging
+
+from penguindb.utils import content_processing_utils as cpu
+from penguindb.utils.llm_accounting import LlmCallAccounting, OUTCOME_ERROR, prepend_attempts
+
+MODEL = 'test-model'
+ITEMS = [{'content_id': f"id-{i}", 'description': f"draft {i}", 'tags': ['data']} for i in range(3)]
+
+
+class FakeBedrock:
+    """call_claude_hedged stand-in: packed prompts fail (or sleep), single-item prompts answer."""
+
+    def __init__(self, packed_error=None, packed_sleep=0):
+        self.packed_error = packed_error
+        self.packed_sleep = packed_sleep
+        self.calls = []
+
+    def __call__(self, prompt, model_id, max_tokens, extract_json):
+        leg = {'leg': 'primary', 'model_id': model_id, 'usage': {'input_tokens': 1000, 'output_tokens': 100}}
+        if not extract_json:
+            self.calls.append('packed')
+            time.sleep(self.packed_sleep)
+            if self.packed_error:
+                return {'error': self.packed_error}, leg
+            return {'raw_response': json.dumps([{'content_id': 'id-0', 'title': 'T0', 'tags': ['a']}])}, leg
+        self.calls.append('single')
+        leg['usage'] = {'input_tokens': 400, 'output_tokens': 50}
+        return {'title': 'Single', 'description': 'Single', 'tags': ['b']}, leg
+
+
+def _generate(monkeypatch, fake, timeout=5):
+    monkeypatch.setattr(cpu, 'call_claude_hedged', fake)
+    return cpu.generate_content_batch_with_llm('post', MODEL, ITEMS, logging.getLogger(), timeout=timeout,
+                                               max_retries=1)
+
+
+def test_failed_packed_call_is_the_first_attempt_of_every_item(monkeypatch):
+    results, errors = _generate(monkeypatch, FakeBedrock(packed_error='ThrottlingException'))
+
+    assert errors == {}
+    for content_id in ('id-0', 'id-1', 'id-2'):
+        usage = results[content_id]['llm_usage']
+        assert usage['attempts'] == 2
+        assert usage['winning_attempt'] == 2
+        # A third of the packed call plus the single-item call
+        assert usage['input_tokens'] == 1000 // 3 + 400
+        assert usage['timeouts'] == 0
+
+
+def test_timed_out_packed_call_counts_as_timeout(monkeypatch):
+    fake = FakeBedrock(packed_sleep=0.5)
+    results, _ = _generate(monkeypatch, fake, timeout=0.2)
+
+    assert fake.calls[0] == 'packed'
+    usage = results['id-1']['llm_usage']
+    assert usage['attempts'] == 2 and usage['timeouts'] == 1
+
+
+def test_items_left_out_of_a_packed_answer_carry_the_packed_attempt(monkeypatch):
+    results, _ = _generate(monkeypatch, FakeBedrock())
+
+    assert results['id-0']['llm_usage']['attempts'] == 1
+    assert results['id-0']['llm_usage']['packed'] == 3
+    assert results['id-1']['llm_usage']['attempts'] == 2
+    assert 'packed' not in results['id-1']['llm_usage']
+
+
+def test_prepend_attempts_without_a_winner():
+    earlier = LlmCallAccounting(MODEL, packed=2)
+    earlier.record(time.monotonic(), OUTCOME_ERROR, {'usage': {'input_tokens': 10, 'output_tokens': 0}})
+    failed = LlmCallAccounting(MODEL)
+    failed.record(time.monotonic(), OUTCOME_ERROR)
+
+    merged = prepend_attempts(failed.summary(), earlier)
+
+    assert merged['attempts'] == 2
+    assert merged['winning_attempt'] == 0
+    assert merged['input_tokens'] == 5
@@ -0,0 +1,48 @@
+"""profile_handler captures: worker threads show up in the sampled section."""
+import io
+import json
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from penguindb.utils import profiling
+
+
+def busy_worker(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def test_worker_threads_are_sampled(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'LAMBDA_PROFILING', True)
+    monkeypatch.setattr(profiling, 'PROFILE_SLOW_MS', 0)
+    monkeypatch.setattr(profiling, 'PROFILE_BUCKET', None)
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_MS', 5)
+
+    @profiling.profile_handler
+    def lambda_handler(event, context):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return sum(executor.map(busy_worker, [0.3, 0.3]))
+
+    assert lambda_handler({}, None) > 0
+
+    [summary_path] = glob.glob(os.path.join(str(tmp_path), '**', '*.json'), recursive=True)
+    with open(summary_path) as f:
+        summary = json.load(f)
+    # cProfile of the handler thread never enters the worker function
+    assert not any('busy_worker' in row['function'] for row in summary['top_functions'])
+    sampled = {row['function']: row for row in summary['thread_samples']['top_functions']}
+    worker = next(row for function, row in sampled.items() if 'busy_worker' in function)
+    assert worker['samples'] >= 10
+    assert not any('_worker' in function and 'thread.py' in function and row['own_samples']
+                   for function, row in sampled.items())
+
+    report = io.StringIO()
+    profiling.aggregate_report(str(tmp_path), top=10, out=report)
+    assert 'functions on other threads' in report.getvalue()
+    assert 'busy_worker' in report.getvalue()
@@ -0,0 +1,38 @@
+"""projected_reads against a moto table."""
+from dataclasses import dataclass
+from typing import Optional
+
+from penguindb.utils.projected_reads import batch_get_views, query_views
+
+
+@dataclass(frozen=True)
+class TitleView:
+    content_id: str
+    content_type: Optional[str] = None
+    generated_title: Optional[str] = None
+
+
+def _fill(table):
+    table.put_item(Item={'content_id': 'a', 'content_type': 'post', 'generated_title': 'A', 'description': 'long'})
+    table.put_item(Item={'content_id': 'b', 'content_type': 'article', 'description': 'long'})
+
+
+def test_batch_get_views_matches_results_to_keys(content_table):
+    _fill(content_table)
+
+    views = batch_get_views(content_table, TitleView, [
+        {'content_id': 'a', 'content_type': 'post'},
+        {'content_id': 'a', 'content_type': 'post'},
+        {'content_id': 'b', 'content_type': 'article'},
+        {'content_id': 'missing', 'content_type': 'post'},
+    ])
+
+    assert views == {('a', 'post'): TitleView('a', 'post', 'A'), ('b', 'article'): TitleView('b', 'article')}
+
+
+def test_query_views_by_partition_key(content_table):
+    _fill(content_table)
+
+    views = query_views(content_table, TitleView, ['a', 'b', 'missing'])
+
+    assert views == {'a': TitleView('a', 'post', 'A'), 'b': TitleView('b', 'article')}
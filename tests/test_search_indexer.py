@@ -0,0 +1,58 @@
+"""search_indexer compaction against a moto S3 bucket: concurrent compactions lose nothing."""
+import boto3
+import pytest
+
+from penguindb.utils import s3_json
+
+BUCKET = 'search-index-test'
+
+
+@pytest.fixture
+def indexer(monkeypatch):
+    from penguindb.lambda_function import search_indexer
+    client = boto3.client('s3', region_name='us-east-1')
+    client.create_bucket(Bucket=BUCKET)
+    monkeypatch.setattr(s3_json, '_s3_client', client)
+    monkeypatch.setattr(search_indexer, 'SEARCH_INDEX_BUCKET', BUCKET)
+    monkeypatch.setattr(search_indexer, 'SEARCH_DELTA_MAX_DOCS', 1000)
+    return search_indexer
+
+
+def _item(content_id, title):
+    return {'content_id': content_id, 'content_type': 'post', 'generated_title': title}
+
+
+def _doc_keys(index):
+    return set(index.doc_numbers)
+
+
+def test_compaction_folds_the_delta(indexer):
+    indexer.rebuild_index([_item('a', 'alpha penguins')])
+    indexer.apply_index_changes({'b#post': indexer.build_delta_entry(_item('b', 'beta databases'))})
+
+    indexer.compact_index()
+
+    assert _doc_keys(indexer.load_index()) == {'a#post', 'b#post'}
+    delta, _ = s3_json.read_json(BUCKET, indexer._delta_key())
+    assert delta == {'docs': {}}
+
+
+def test_stale_compaction_does_not_overwrite_a_newer_base(indexer, monkeypatch):
+    indexer.rebuild_index([_item('a', 'alpha penguins')])
+    indexer.apply_index_changes({'b#post': indexer.build_delta_entry(_item('b', 'beta databases'))})
+
+    read_json = indexer.read_json
+    interleaved = []
+
+    def slow_read_json(bucket, key):
+        # The first compaction has read the old base; a second one folds and clears the delta first
+        if key == indexer._delta_key() and not interleaved:
+            interleaved.append(True)
+            indexer.compact_index()
+        return read_json(bucket, key)
+
+    monkeypatch.setattr(indexer, 'read_json', slow_read_json)
+    index = indexer.compact_index()
+
+    assert _doc_keys(index) == {'a#post', 'b#post'}
+    assert _doc_keys(indexer.load_index()) == {'a#post', 'b#post'}
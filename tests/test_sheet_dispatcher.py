@@ -0,0 +1,27 @@
+"""Classification of Apps Script error messages as throttling."""
+import pytest
+
+from penguindb.utils.sheet_dispatcher import is_quota_message
+
+
+@pytest.mark.parametrize('message', [
+    'Service invoked too many times in a short time: exec qps. Try Utilities.sleep(1000) between calls.',
+    'Service invoked too many times for one day: urlfetch.',
+    'Too many simultaneous invocations: Spreadsheets',
+    'Exceeded quota for requests',
+    'Rate Limit Exceeded',
+    'User-rate limit exceeded',
+])
+def test_throttling_messages(message):
+    assert is_quota_message(message)
+
+
+@pytest.mark.parametrize('message', [
+    'This action would increase the number of cells in the workbook above the limit of 10000000 cells.',
+    'Row limit reached for sheet content',
+    'Invalid limit parameter',
+    'Content ID not found',
+    None,
+])
+def test_other_errors_are_not_throttling(message):
+    assert not is_quota_message(message)
@@ -0,0 +1,125 @@
+"""sheet_reconciler: drift planning and a full pass against a moto table."""
+import threading
+
+from penguindb.lambda_function.sheet_reconciler import plan_corrections, reconcile
+
+
+def _sheet():
+    return [
+        {'content_id': 'stale', 'status': 'Pending', 'row': 2},
+        {'content_id': 'done', 'status': 'processed', 'row': 3},
+        {'content_id': 'empty', 'status': 'processed', 'row': 4},
+        {'content_id': 'gone', 'status': 'pending', 'row': 5},
+        {'content_id': 'failed-gone', 'status': 'failed', 'row': 6},
+        {'content_id': 'new', 'status': 'new', 'row': 7},
+        {'content_id': 'multi', 'status': 'pending', 'row': 8},
+        {'status': 'pending', 'row': 9},
+    ]
+
+
+def _table_items():
+    return [
+        {'content_id': 'stale', 'generated_title': 'Stale', 'generated_tags': {'ai'}, 'processed_at': '2024-05-01'},
+        {'content_id': 'done', 'generated_title': 'Done'},
+        {'content_id': 'empty'},
+        {'content_id': 'new'},
+        # The content_type with generated content decides, whatever the scan order
+        {'content_id': 'multi'},
+        {'content_id': 'multi', 'generated_title': 'Multi'},
+        {'content_id': 'orphan', 'generated_title': 'Orphan'},
+    ]
+
+
+def test_plan_corrections_counts_every_drift_category():
+    corrections, drift = plan_corrections(_sheet(), iter(_table_items()))
+
+    assert drift == {
+        'stale_status': 2,
+        'processed_without_content': 1,
+        'missing_in_table': 1,
+        'table_only': 1,
+        'sheet_rows': 7,
+        'table_items': 7,
+        'in_sync': 3,
+    }
+    assert corrections == [
+        {'content_id': 'stale', 'status': 'processed', 'generated_title': 'Stale',
+         'processed_at': '2024-05-01', 'generated_tags': ['ai']},
+        {'content_id': 'multi', 'status': 'processed', 'generated_title': 'Multi'},
+    ]
+
+
+def test_plan_corrections_in_sync_sheet_needs_nothing():
+    corrections, drift = plan_corrections(
+        [{'content_id': 'done', 'status': 'processed'}], [{'content_id': 'done', 'generated_title': 'Done'}])
+
+    assert corrections == []
+    assert drift['in_sync'] == 1
+    assert sum(drift[category] for category in ('stale_status', 'processed_without_content',
+                                                'missing_in_table', 'table_only')) == 0
+
+
+class FakeSheet:
+    """Sheet web app stand-in: answers getAllItems and applies updateStatuses batches."""
+
+    def __init__(self, rows):
+        self.rows = {row['content_id']: dict(row) for row in rows}
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def fetch(self):
+        return [dict(row) for row in self.rows.values()]
+
+    def send_batch(self, updates):
+        with self.lock:
+            self.batches.append([update['content_id'] for update in updates])
+            updated = []
+            for update in updates:
+                self.rows[update['content_id']]['status'] = update['status']
+                updated.append(update['content_id'])
+        return {'updated': updated, 'not_found': []}
+
+
+def _fill(table, count):
+    with table.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={'content_id': f"id-{i:02d}", 'content_type': 'post',
+                                 'generated_title': f"Title {i}", 'description': 'x' * 100})
+        batch.put_item(Item={'content_id': 'draft', 'content_type': 'post', 'description': 'x'})
+
+
+def test_reconcile_corrects_stale_rows_and_converges(content_table, monkeypatch):
+    from penguindb.utils import sheet_dispatcher
+    monkeypatch.setattr(sheet_dispatcher, 'SHEET_BATCH_SIZE', 4)
+    _fill(content_table, 10)
+    sheet = FakeSheet([{'content_id': f"id-{i:02d}", 'status': 'processed' if i < 3 else 'pending'}
+                       for i in range(10)] + [{'content_id': 'draft', 'status': 'new'}])
+
+    report = reconcile(content_table=content_table, fetch_sheet=sheet.fetch, send_batch=sheet.send_batch)
+
+    assert report['drift']['stale_status'] == 7
+    assert report['drift']['in_sync'] == 4
+    assert report['corrections'] == 7
+    assert (report['applied'], report['failed'], report['deferred'], report['requests']) == (7, 0, 0, 2)
+    assert sorted(content_id for batch in sheet.batches for content_id in batch) == [f"id-{i:02d}" for i in range(3, 10)]
+    assert all(row['status'] == 'processed' for content_id, row in sheet.rows.items() if content_id != 'draft')
+    assert sheet.rows['draft']['status'] == 'new'
+
+    # A second pass finds nothing left to correct
+    second = reconcile(content_table=content_table, fetch_sheet=sheet.fetch, send_batch=sheet.send_batch)
+    assert second['corrections'] == 0
+    assert 'applied' not in second
+    assert len(sheet.batches) == 2
+
+
+def test_reconcile_dry_run_sends_nothing(content_table):
+    _fill(content_table, 3)
+    sheet = FakeSheet([{'content_id': f"id-{i:02d}", 'status': 'pending'} for i in range(3)])
+
+    report = reconcile(content_table=content_table, fetch_sheet=sheet.fetch, send_batch=sheet.send_batch,
+                       dry_run=True)
+
+    assert report['corrections'] == 3
+    assert report['drift']['table_only'] == 1
+    assert sheet.batches == []
+    assert all(row['status'] == 'pending' for row in sheet.rows.values())
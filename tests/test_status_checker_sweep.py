@@ -0,0 +1,29 @@
+"""status_checker only sweeps the table for pending items when the event asks for it."""
+import pytest
+
+
+@pytest.fixture
+def checker(content_table, monkeypatch):
+    from penguindb.lambda_function import status_checker
+    monkeypatch.setattr(status_checker, 'table', content_table)
+    content_table.put_item(Item={'content_id': 'a', 'content_type': 'post', 'status': 'pending'})
+    content_table.put_item(Item={'content_id': 'b', 'content_type': 'post'})
+    return status_checker
+
+
+def test_scheduled_poll_does_not_scan(checker, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("scheduled poll scanned the table")
+
+    monkeypatch.setattr(checker, 'parallel_scan', fail)
+
+    assert checker.get_pending_items_from_event({}) == []
+    assert checker.get_pending_items_from_event({'source': 'aws.events'}) == []
+
+
+def test_sweep_event_scans_for_pending_items(checker):
+    assert checker.get_pending_items_from_event({'sweep': True}) == [{'content_id': 'a'}]
+
+
+def test_explicit_content_ids_win(checker):
+    assert checker.get_pending_items_from_event({'content_ids': ['x'], 'sweep': True}) == [{'content_id': 'x'}]